@@ -0,0 +1,258 @@
+'''
+This file contains the bulk analysis of recorded games, every guess of a
+player is scored against the best guess of the solver at the same state.
+
+Games are read from a json lines file, one game per line:
+    {"id": "any id", "guesses": ["crane", "moist"], "patterns": ["00102", "22222"]}
+Patterns are strings as returned by game_core.compare. For every game a json
+line is written with a record per turn:
+    guess, pattern: as in the log
+    candidates: number of available words before the guess
+    info: expected information of the guess
+    best, best_info: the solver's best guess and its expected information
+    info_loss: best_info - info
+    gained: the information the guess actually gave
+    remaining: number of available words after the guess
+
+States (the available words after some guesses) are cached and shared across
+games, so a state is updated once whatever the number of games reaching it.
+Different histories leaving the same available words share the entry of the
+language's StateCache too.
+Games are sorted by their guesses before being dispatched in chunks to a pool
+of processes, so games sharing a prefix are mostly analyzed by the same cache.
+
+Usage:
+    python analysis.py games.jsonl --language engwordle --output scores.jsonl --processes 4
+
+File contents:
+    imports
+    class Analyzer:
+        Constructor
+        Methods:
+            state
+            guess_info
+            analyze
+    Functions to run the analysis over a pool of processes:
+        analyze_chunk
+        read_games
+        analyze_logs
+    Main Code
+'''
+
+import argparse
+import json
+import multiprocessing as mp
+import sys
+from collections import OrderedDict
+from math import log2
+from time import perf_counter
+
+import control as ctrl
+from game_core import comparen
+from language import Language, Word
+from cache import StateCache
+
+
+class Analyzer():
+    '''
+    Class of analyzer
+    Static Variables:
+        None
+    Dynamic Variables:
+        root: Language object, the whole language, updated and sorted
+        states: OrderedDict, keys are tuples of (guess, pattern) tuples, values
+            are the updated and sorted Language objects of these histories
+        guess_infos: dictionary, keys are histories, values are dictionaries
+            of the expected information of guesses which are not available words
+        max_states: int, the most states to be kept (least recently used first out)
+    '''
+
+    def __init__(self, language='engwordle', max_states=10000, cache_bytes=256 * 2**20):
+        '''
+        Constructor of the Analyzer object
+        Parameters:
+            language: string, the language of the games (its csv has to exist)
+            max_states: int, see the class docstring
+            cache_bytes: int, memory cap of the StateCache of the language
+        '''
+        lang_params = ctrl.lang_params(language)
+        self.root = Language(alphabet=lang_params['alphabet'],
+                             length=lang_params['length'],
+                             from_csv=language+'.csv',
+                             approx_threshold=None,  # exact and reproducible scores
+                             cache=StateCache(max_bytes=cache_bytes))
+        self.root.update_prob()
+        self.root.sort()
+        self.states = OrderedDict()
+        self.guess_infos = {}
+        self.max_states = max_states
+
+    # Methods of Analyzer class
+
+    def state(self, history=()):
+        '''
+        Getting the language of the available words after some guesses, it's
+        derived from the state of the history without its last guess
+        Parameters:
+            history: tuple of (guess, pattern) tuples
+        Return:
+            Language object, updated and sorted
+        '''
+        if not history:
+            return self.root
+
+        if history in self.states:
+            self.states.move_to_end(history)
+            return self.states[history]
+
+        parent = self.state(history[:-1])
+        guess, pattern = history[-1]
+        pattern = int(pattern, 3)
+        language = parent.sub_language(
+            [word_ for word_ in parent.all_words if comparen(guess, word_) == pattern])
+        if language.all_words:
+            language.update_everything()
+
+        self.states[history] = language
+        if len(self.states) > self.max_states:
+            evicted, _ = self.states.popitem(last=False)
+            self.guess_infos.pop(evicted, None)
+        return language
+
+    def guess_info(self, history=(), guess=''):
+        '''
+        Getting the expected information of a guess at some state
+        Parameters:
+            history: as history in state method
+            guess: string, the guess
+        Return:
+            float, expected information
+        '''
+        language = self.state(history)
+        if guess in language.all_words:
+            return language.all_words[guess].info
+
+        infos = self.guess_infos.setdefault(history, {})
+        if guess not in infos:
+            word = Word(str=guess)
+            word.calc_possible_points(language.all_words)
+            word.calc_info()
+            infos[guess] = word.info
+        return infos[guess]
+
+    def analyze(self, game={}):
+        '''
+        Scoring every guess of a game
+        Parameters:
+            game: dictionary, a parsed line of the log (see the file docstring)
+        Return:
+            dictionary, keys are 'id' and 'turns' (list of dictionaries, see
+                the file docstring), and 'error' if the patterns are inconsistent
+        '''
+        record = {'id': game.get('id'), 'turns': []}
+        history = ()
+        for guess, pattern in zip(game['guesses'], game['patterns']):
+            guess = guess.lower()
+            before = self.state(history)
+            info = self.guess_info(history, guess)
+            best = next(iter(before.all_words.values()))
+
+            history = history + ((guess, pattern),)
+            after = self.state(history)
+            record['turns'].append({'guess': guess, 'pattern': pattern,
+                                    'candidates': len(before.all_words),
+                                    'info': info, 'best': best.str, 'best_info': best.info,
+                                    'info_loss': best.info - info,
+                                    'gained': log2(before.total_points / after.total_points)
+                                        if after.all_words else None,
+                                    'remaining': len(after.all_words)})
+            if not after.all_words:
+                record['error'] = 'no available words are consistent with the patterns'
+                break
+        return record
+
+
+# Functions to run the analysis over a pool of processes
+
+ANALYZER = None  # set before the pool is forked, so every process inherits it
+
+
+def analyze_chunk(chunk):
+    '''
+    Analyzing a chunk of games (in a process of the pool)
+    Parameters:
+        chunk: list of (index, game) tuples
+    Return:
+        list of (index, record) tuples
+    '''
+    return [(index, ANALYZER.analyze(game)) for index, game in chunk]
+
+
+def read_games(file_name='games.jsonl'):
+    '''
+    Reading games lazily from a json lines file
+    Parameters:
+        file_name: string, path of the log
+    Return:
+        generator of (index, game) tuples, index is the line number (from 0)
+    '''
+    with open(file_name) as f:
+        for index, line in enumerate(f):
+            if line.strip():
+                yield index, json.loads(line)
+
+
+def analyze_logs(file_name='games.jsonl', output='scores.jsonl', language='engwordle',
+                 processes=None, chunk_size=200, batch_size=20000):
+    '''
+    Analyzing all the games of a log and writing their records in the same order
+    The log is read in batches, every batch is sorted by guesses and split into
+    chunks, so the chunks keep the games sharing states together.
+    Parameters:
+        file_name: string, path of the log
+        output: string, path of the records
+        language: string, the language of the games
+        processes: int or None, size of the pool (number of cores if None)
+        chunk_size: int, number of games sent to a process at once
+        batch_size: int, number of games read at once
+    Return:
+        int, number of analyzed games
+    '''
+    global ANALYZER
+    ANALYZER = Analyzer(language=language)
+
+    n_games = 0
+    start = perf_counter()
+    games = read_games(file_name)
+    with mp.get_context('fork').Pool(processes) as pool, open(output, 'w') as f:
+        while True:
+            batch = [game for _, game in zip(range(batch_size), games)]
+            if not batch:
+                break
+
+            batch.sort(key=lambda x: tuple(zip(x[1]['guesses'], x[1]['patterns'])))
+            chunks = [batch[i:i+chunk_size] for i in range(0, len(batch), chunk_size)]
+            records = [record for records in pool.imap(analyze_chunk, chunks)
+                       for record in records]
+
+            for _, record in sorted(records, key=lambda x: x[0]):
+                f.write(json.dumps(record) + '\n')
+            n_games += len(batch)
+            print(f'{n_games} games, {n_games / (perf_counter() - start):.0f} games/s',
+                  file=sys.stderr)
+
+    return n_games
+
+
+# # # # # # MAIN # # # # # #
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scoring the guesses of recorded games.')
+    parser.add_argument('log', help='json lines file of games')
+    parser.add_argument('--language', default='engwordle')
+    parser.add_argument('--output', default='scores.jsonl')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=200)
+    args = parser.parse_args()
+
+    analyze_logs(file_name=args.log, output=args.output, language=args.language,
+                 processes=args.processes, chunk_size=args.chunk_size)
@@ -0,0 +1,385 @@
+'''
+This file contains the micro benchmarks of the hot paths of the solver, they
+run over the shipped data (english.json and nerdle.csv) at several sizes and
+can be compared against a stored baseline to catch regressions.
+
+Every case runs in its own process, so its peak RSS is not polluted by the
+other cases. Results are printed as json (a list of records with the keys
+'case', 'time_per_call', 'ops_per_s', 'calls' and 'peak_rss_kb'). A case whose
+process crashes or runs longer than CASE_TIMEOUT gets a record with the keys
+'case' and 'error' instead, and the run exits with 1.
+
+No baseline is shipped (timings depend on the machine), store one with --save
+on the machine it's compared on.
+
+Usage:
+    python benchmark.py                                 run all the fast cases
+    python benchmark.py --slow                          run the slow cases too
+    python benchmark.py --only compare update_everything
+    python benchmark.py --save benchmark_baseline.json  store a new baseline
+    python benchmark.py --baseline benchmark_baseline.json --threshold 0.25
+
+File contents:
+    imports
+    Constants
+    Functions to load the shipped data:
+        load_words
+        make_language
+    Benchmark cases (every one returns a prepare and a run function):
+        case_compare
+        case_comparen
+        case_calc_possible_points
+        case_update_everything
+        case_massive_remove
+        case_from_csv
+        case_to_csv
+        case_primel_create
+        case_nerdle_one_op
+        case_nerdle_two_op
+        case_nerdle_generate
+    Functions to run the cases:
+        measure
+        run_case
+        run_all
+    Functions to compare against a baseline:
+        compare_to_baseline
+    Main Code
+'''
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+from queue import Empty
+from random import Random
+from time import perf_counter
+
+
+# Constants
+
+# (case name, datasets, sizes, slow), size None means the case has no size
+CASES = [
+    ('compare', ['engwordle', 'nerdle'], [1000], False),
+    ('comparen', ['engwordle', 'nerdle'], [1000], False),
+    ('calc_possible_points', ['engwordle', 'nerdle'], [1000, 10000], False),
+    ('update_everything', ['engwordle', 'nerdle'], [100, 300, 1000], False),
+    ('massive_remove', ['engwordle', 'nerdle'], [1000, 10000], False),
+    ('from_csv', ['engwordle', 'nerdle'], [1000, 10000], False),
+    ('to_csv', ['engwordle', 'nerdle'], [1000, 10000], False),
+    ('primel_create', ['primel'], [None], False),
+    ('nerdle_one_op', ['nerdle'], [None], True),
+    ('nerdle_two_op', ['nerdle'], [None], True),
+    ('nerdle_generate', ['nerdle'], [None], True),
+]
+LENGTHS = {'engwordle': 5, 'primel': 5, 'nerdle': 8}
+MIN_TIME = 1.0    # seconds spent on every case at least (unless MAX_CALLS)
+MAX_CALLS = 1000
+CASE_TIMEOUT = 600  # seconds a case may take, preparing included
+SEED = 0
+
+
+# Loading the shipped data
+
+def load_words(dataset='engwordle', size=None):
+    '''
+    Loading words of a dataset with their points
+    Parameters:
+        dataset: string ('engwordle' or 'nerdle'), english.json or nerdle.csv
+        size: int or None, number of words sampled (reproducibly), None for all
+    Return:
+        list of (string, numerical value) tuples, words and their points
+    '''
+    if dataset == 'engwordle':
+        with open('english.json') as f:
+            words = list(json.load(f).items())
+    else:   # dataset == 'nerdle'
+        import pandas as pd
+        df = pd.read_csv('nerdle.csv')
+        words = list(zip(df.Word.astype(str), df.Points))
+
+    if size is None or size >= len(words):
+        return words
+    return Random(SEED).sample(words, size)
+
+
+def make_language(dataset='engwordle', size=None):
+    '''
+    Creating a language of sampled words (without any update)
+    Parameters:
+        dataset: as dataset in load_words function
+        size: as size in load_words function
+    Return:
+        Language object
+    '''
+    from language import Word, Language
+
+    language = Language(length=LENGTHS[dataset])
+    for word_, points in load_words(dataset, size):
+        language.add_word(Word(str=word_, points=points))
+    return language
+
+
+# Benchmark cases
+# Every case returns (prepare, run, ops): prepare is called before every run
+# and is not timed (it may be None), run is timed and does ops operations
+
+def case_compare(dataset='engwordle', size=1000):
+    from game_core import compare
+
+    words = [word_ for word_, _ in load_words(dataset)]
+    rand = Random(SEED)
+    pairs = [(rand.choice(words), rand.choice(words)) for _ in range(size)]
+
+    def run():
+        for word_, the_word in pairs:
+            compare(word_, the_word)
+
+    return None, run, size
+
+
+def case_comparen(dataset='engwordle', size=1000):
+    from game_core import comparen
+
+    words = [word_ for word_, _ in load_words(dataset)]
+    rand = Random(SEED)
+    pairs = [(rand.choice(words), rand.choice(words)) for _ in range(size)]
+
+    def run():
+        for word_, the_word in pairs:
+            comparen(word_, the_word)
+
+    return None, run, size
+
+
+def case_calc_possible_points(dataset='engwordle', size=1000):
+    language = make_language(dataset, size)
+    word = next(iter(language.all_words.values()))
+
+    def run():
+        word.calc_possible_points(language.all_words)
+
+    return None, run, 1
+
+
+def case_update_everything(dataset='engwordle', size=100):
+    language = make_language(dataset, size)
+
+    def run():
+        language.update_everything()
+
+    return None, run, 1
+
+
+def case_massive_remove(dataset='engwordle', size=1000):
+    from game_core import comparen
+
+    language = make_language(dataset, size)
+    all_words = language.all_words.copy()
+    total_points = language.total_points
+    word_, the_word = Random(SEED).sample(list(all_words), 2)
+    pattern = comparen(word_, the_word)
+
+    def prepare():
+        language.all_words = all_words.copy()
+        language.total_points = total_points
+
+    def run():
+        language.massive_remove(word_=word_, pattern=pattern)
+
+    return prepare, run, 1
+
+
+def case_from_csv(dataset='engwordle', size=1000):
+    from language import Language
+
+    file_name = os.path.join(tempfile.mkdtemp(), 'language.csv')
+    make_language(dataset, size).to_csv(file_name=file_name)
+
+    def run():
+        Language(length=LENGTHS[dataset], from_csv=file_name)
+
+    return None, run, 1
+
+
+def case_to_csv(dataset='engwordle', size=1000):
+    language = make_language(dataset, size)
+    file_name = os.path.join(tempfile.mkdtemp(), 'language.csv')
+
+    def run():
+        language.to_csv(file_name=file_name)
+
+    return None, run, 1
+
+
+def case_primel_create(dataset='primel', size=None):
+    import primel
+
+    return None, primel.create, 1
+
+
+def case_nerdle_one_op(dataset='nerdle', size=None):
+    import nerdle
+
+    return None, nerdle.one_op, 1
+
+
+def case_nerdle_two_op(dataset='nerdle', size=None):
+    import nerdle
+
+    return None, nerdle.two_op, 1
+
+
+def case_nerdle_generate(dataset='nerdle', size=None):
+    import nerdle
+
+    def run():
+        for _ in nerdle.generate():
+            pass
+
+    return None, run, 1
+
+
+# Running the cases
+
+def measure(prepare, run, ops):
+    '''
+    Timing a case, run is called until MIN_TIME is spent or MAX_CALLS is reached
+    Parameters:
+        prepare: function or None, called untimed before every call of run
+        run: function, the timed function
+        ops: int, number of operations done by every call of run
+    Return:
+        dictionary, keys are 'time_per_call' (best time of one operation in
+            seconds), 'ops_per_s' and 'calls'
+    '''
+    best = float('inf')
+    spent = 0
+    calls = 0
+    while spent < MIN_TIME and calls < MAX_CALLS:
+        if prepare is not None:
+            prepare()
+        start = perf_counter()
+        run()
+        elapsed = perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        calls += 1
+
+    time_per_call = best / ops
+    return {'time_per_call': time_per_call,
+            'ops_per_s': 1 / time_per_call if time_per_call else float('inf'),
+            'calls': calls}
+
+
+def run_case(name, dataset, size, queue):
+    '''
+    Running a single case and putting its record in the queue (to be called in
+    a dedicated process)
+    Parameters:
+        name: string, case name (the function case_<name>)
+        dataset: string, the dataset of the case
+        size: int or None, the size of the case
+        queue: multiprocessing Queue, where the record is put
+    Return:
+        None
+    '''
+    # tqdm progress bars of the measured functions would pollute the output
+    sys.stderr = open(os.devnull, 'w')
+    prepare, run, ops = globals()['case_' + name](dataset, size)
+    record = measure(prepare, run, ops)
+    record['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put(record)
+
+
+def run_all(only=[], slow=False, timeout=CASE_TIMEOUT):
+    '''
+    Running the selected cases, each one in a new process
+    Parameters:
+        only: list of strings, names of the cases to run, if empty run all
+        slow: boolean, if the slow cases are included
+        timeout: float, seconds a case may take before it's killed
+    Return:
+        list of dictionaries, a record per case (see the file docstring)
+    '''
+    ctx = mp.get_context('fork')
+    records = []
+    for name, datasets, sizes, is_slow in CASES:
+        if (only and name not in only) or (is_slow and not slow and not only):
+            continue
+        for dataset in datasets:
+            for size in sizes:
+                key = f'{name}[{dataset}]' + (f'/{size}' if size else '')
+                print(f'running {key}...', file=sys.stderr)
+                queue = ctx.Queue()
+                process = ctx.Process(target=run_case, args=(name, dataset, size, queue))
+                process.start()
+                record, deadline = None, perf_counter() + timeout
+                while record is None:
+                    try:
+                        record = queue.get(timeout=1)
+                    except Empty:
+                        if process.exitcode is not None and queue.empty():
+                            record = {'error': f'exited with code {process.exitcode}'}
+                        elif perf_counter() > deadline:
+                            process.kill()
+                            record = {'error': f'timed out after {timeout:g}s'}
+                process.join()
+                if 'error' in record:
+                    print(f"{key} failed: {record['error']}", file=sys.stderr)
+                records.append({'case': key, **record})
+    return records
+
+
+# Comparing against a baseline
+
+def compare_to_baseline(records, baseline, threshold=0.2):
+    '''
+    Finding the cases which got slower than the baseline
+    Parameters:
+        records: list of dictionaries, as returned by run_all
+        baseline: list of dictionaries, stored records of a previous run
+        threshold: float, the tolerated slow down (0.2 means 20%)
+    Return:
+        list of strings, a message per regression
+    '''
+    stored = {record['case']: record for record in baseline}
+    regressions = []
+    for record in records:
+        if 'error' in record or 'time_per_call' not in stored.get(record['case'], {}):
+            continue
+        ratio = record['time_per_call'] / stored[record['case']]['time_per_call']
+        if ratio > 1 + threshold:
+            regressions.append(f"{record['case']}: {ratio:.2f}x slower than baseline")
+    return regressions
+
+
+# # # # # # MAIN # # # # # #
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarking the solver hot paths.')
+    parser.add_argument('--only', nargs='*', default=[], help='names of the cases to run')
+    parser.add_argument('--slow', action='store_true', help='run the slow cases too')
+    parser.add_argument('--baseline', default='', help='stored records to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='tolerated slow down')
+    parser.add_argument('--save', default='', help='path to store the records as a baseline')
+    parser.add_argument('--timeout', type=float, default=CASE_TIMEOUT,
+                        help='seconds a case may take')
+    args = parser.parse_args()
+
+    records = run_all(only=args.only, slow=args.slow, timeout=args.timeout)
+    failed = any('error' in record for record in records)
+    print(json.dumps(records, indent=1))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(records, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(records, json.load(f), args.threshold)
+        for regression in regressions:
+            print('REGRESSION', regression, file=sys.stderr)
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
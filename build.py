@@ -0,0 +1,537 @@
+'''
+This file contains the build of the languages' artifacts, every language has:
+    words: its words and their points (LANGUAGE_words.csv)
+    info: the language installed, its words scored and sorted (LANGUAGE.csv,
+        the csv the games read)
+    patterns: the pattern matrix of its words in the order of the info csv
+        (LANGUAGE_patterns.npy), built only if it takes no more than
+        max_pattern_bytes
+    compressed: the same matrix compressed (LANGUAGE_patterns.npz, see
+        compressed.py), given to Language as patterns_file, built under the
+        same condition
+    book: the opening book, the best first guess and the best second guess
+        after every pattern of it (LANGUAGE_book.json)
+
+Every artifact is built from its inputs only: the files it reads (like
+english.json), the parameters of its language module (like the length and
+the alphabet), the source files of the code building it (the modules of
+ARTIFACTS with all the modules of the repository they import, directly or
+not, see source_closure) and the artifacts it depends on. The hash of all of them is the key of the artifact, and the keys
+of the built artifacts are kept in a manifest (build_manifest.json) with the
+hashes of their outputs, so an artifact is skipped if its key is unchanged and
+its outputs are untouched. The artifacts depending on another one hash its
+outputs (not its key), so rebuilding an artifact identically doesn't rebuild
+the ones depending on it.
+The artifacts of different languages (and the independent artifacts of a
+language) are built concurrently on one pool of processes.
+A shipped artifact (nerdle's info, nerdle.csv is in the repository and its
+install takes hours in pure Python) is taken as it is, without building it
+nor its dependencies, unless --force is given.
+
+Usage:
+    python build.py                          # all the languages
+    python build.py engwordle primel --processes 2
+    python build.py nerdle --artifacts words info --force
+
+File contents:
+    imports
+    Languages and their artifacts
+    Functions of hashing and the manifest:
+        file_hash
+        source_closure
+        artifact_key
+        read_manifest
+        write_manifest
+        is_built
+    Functions building the artifacts (in the processes of the pool):
+        build_words
+        build_info
+        load_info
+        build_patterns
+        build_compressed
+        build_book
+        run
+    Functions of the orchestration:
+        is_shipped
+        dependencies
+        plan
+        build
+    Main Code
+'''
+
+import argparse
+import ast
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from hashlib import blake2b
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+import patterns as pt
+from compressed import CompressedPatterns
+from language import Language
+
+
+# Languages and their artifacts
+
+MANIFEST = 'build_manifest.json'
+
+# For every language: the files its words are read from, the names of the
+# parameters of its module (module attributes) the artifacts depend on and the
+# artifacts whose outputs are shipped in the repository
+LANGUAGES = {
+    'engwordle': {'inputs': ['english.json'], 'params': ['alphabet', 'length'], 'shipped': []},
+    'primel': {'inputs': [], 'params': ['alphabet', 'length'], 'shipped': []},
+    'nerdle': {'inputs': [], 'params': ['alphabet', 'length', 'operators', 'zero'],
+               'shipped': ['info']},
+}
+
+# For every artifact: the artifacts it depends on, the source files of the
+# code building it (besides the language module for words and info, their
+# imports are followed, except build.py's whose builders' modules are listed)
+# and its output file (formatted by the language)
+ARTIFACTS = {
+    'words': {'depends': [], 'sources': ['build.py'], 'output': '{}_words.csv'},
+    'info': {'depends': ['words'], 'sources': ['build.py', 'language.py'], 'output': '{}.csv'},
+    'patterns': {'depends': ['info'], 'sources': ['build.py', 'patterns.py'],
+                 'output': '{}_patterns.npy'},
+    'compressed': {'depends': ['info'], 'sources': ['build.py', 'compressed.py'],
+                   'output': '{}_patterns.npz'},
+    'book': {'depends': ['info'], 'sources': ['build.py', 'language.py'],
+             'output': '{}_book.json'},
+}
+
+
+# Functions of hashing and the manifest
+
+def file_hash(file_name=''):
+    '''
+    Hashing the content of a file
+    Parameters:
+        file_name: string, path of the file
+    Return:
+        string, hex digest (blake2b), None if the file doesn't exist
+    '''
+    if not os.path.exists(file_name):
+        return None
+    digest = blake2b(digest_size=16)
+    with open(file_name, 'rb') as file:
+        for chunk in iter(lambda: file.read(2**20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_closure(sources=[]):
+    '''
+    Getting the source files and all the modules of the repository they
+    import, directly or not (build.py itself is not followed, it imports the
+    code of all the artifacts)
+    Parameters:
+        sources: list of strings, paths of python files
+    Return:
+        list of strings, sorted paths of the source files and their imports
+    '''
+    closure = set()
+    todo = list(sources)
+    while todo:
+        file_name = todo.pop()
+        if file_name in closure or not os.path.exists(file_name):
+            continue
+        closure.add(file_name)
+        if os.path.basename(file_name) == 'build.py':
+            continue
+        with open(file_name) as file:
+            tree = ast.parse(file.read(), filename=file_name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module_file = os.path.join(os.path.dirname(file_name),
+                                           name.split('.')[0] + '.py')
+                if os.path.exists(module_file):
+                    todo.append(module_file)
+    return sorted(closure)
+
+
+def artifact_key(language='engwordle', artifact='words', built={}, max_pattern_bytes=2**28):
+    '''
+    Hashing the inputs of an artifact
+    Parameters:
+        language: string, a language of LANGUAGES
+        artifact: string, an artifact of ARTIFACTS
+        built: dictionary, keys are (language, artifact) tuples, values are the
+            manifest entries of the artifacts built so far (with their outputs'
+            hashes)
+        max_pattern_bytes: int, the most bytes of a pattern matrix
+    Return:
+        string, hex digest (blake2b)
+    '''
+    module = __import__(language)
+    sources = ARTIFACTS[artifact]['sources']
+    if artifact in ('words', 'info'):
+        sources = sources + [language + '.py']
+    sources = source_closure(sources)
+    inputs = {
+        'language': language,
+        'artifact': artifact,
+        'params': {name: getattr(module, name) for name in LANGUAGES[language]['params']},
+        'files': {file_name: file_hash(file_name) for file_name in LANGUAGES[language]['inputs']}
+            if artifact == 'words' else {},
+        'sources': {file_name: file_hash(file_name) for file_name in sources},
+        'depends': {dependency: built[(language, dependency)]['outputs']
+                    for dependency in ARTIFACTS[artifact]['depends']},
+    }
+    if artifact in ('patterns', 'compressed'):
+        inputs['max_pattern_bytes'] = max_pattern_bytes
+    return blake2b(json.dumps(inputs, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def read_manifest(file_name=MANIFEST):
+    '''
+    Reading the manifest of the built artifacts
+    Parameters:
+        file_name: string, path of the manifest
+    Return:
+        dictionary, keys are 'LANGUAGE/ARTIFACT', values are dictionaries with
+            'key' (the artifact's key), 'outputs' (dictionary of the output
+            files and their hashes) and 'seconds' (time of the build)
+    '''
+    if not os.path.exists(file_name):
+        return {}
+    with open(file_name) as file:
+        return json.load(file)
+
+
+def write_manifest(manifest={}, file_name=MANIFEST):
+    '''
+    Writing the manifest (replaced atomically)
+    Parameters:
+        manifest: dictionary, as read_manifest returns it
+        file_name: string, path of the manifest
+    Return:
+        None
+    '''
+    temporary = file_name + '.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(temporary, file_name)
+
+
+def is_built(entry=None, key=''):
+    '''
+    Checking if an artifact is up to date: built with the same key and its
+    outputs unchanged since
+    Parameters:
+        entry: dictionary or None, the artifact's entry in the manifest
+        key: string, the artifact's current key
+    Return:
+        boolean
+    '''
+    if entry is None or entry['key'] != key:
+        return False
+    return all([file_hash(file_name) == digest for file_name, digest in entry['outputs'].items()])
+
+
+# Functions building the artifacts (in the processes of the pool)
+
+def build_words(language='engwordle', output=''):
+    '''
+    Creating the words of a language (by the create function of its module)
+    Parameters:
+        language: string, a language of LANGUAGES
+        output: string, path of the csv file (columns Word and Points)
+    Return:
+        None
+    '''
+    words = __import__(language).create()
+    words = [(word, 1) if isinstance(word, str) else word for word in words]
+    pd.DataFrame(words, columns=['Word', 'Points']).to_csv(output, index=False)
+
+
+def build_info(language='engwordle', output='', words_file=''):
+    '''
+    Installing a language from its words (by the install function of its module)
+    Parameters:
+        language: string, a language of LANGUAGES
+        output: string, path of the csv file of the language
+        words_file: string, path of the words artifact
+    Return:
+        None
+    '''
+    df = pd.read_csv(words_file, dtype={'Word': str})
+    __import__(language).install(words=list(zip(df['Word'], df['Points'])), file_name=output)
+
+
+def load_info(language='engwordle', info_file=''):
+    '''
+    Loading a language from its info artifact
+    Parameters:
+        language: string, a language of LANGUAGES
+        info_file: string, path of the info artifact
+    Return:
+        Language object
+    '''
+    module = __import__(language)
+    return Language(alphabet=module.alphabet, length=module.length, from_csv=info_file)
+
+
+def build_patterns(language='engwordle', output='', info_file='', max_pattern_bytes=2**28,
+                   block_size=256):
+    '''
+    Computing the pattern matrix of a language, row block by row block into a
+    memory mapped npy file, the rows and columns are in the order of its csv
+    Parameters:
+        language: string, a language of LANGUAGES
+        output: string, path of the npy file
+        info_file: string, path of the info artifact
+        max_pattern_bytes: int, the most bytes of the matrix, a bigger matrix
+            is not built (an empty matrix is saved instead)
+        block_size: int, number of rows computed at once
+    Return:
+        None
+    '''
+    words_ = pd.read_csv(info_file, dtype={'Word': str})['Word'].tolist()
+    codes, _ = pt.encode(words_)
+    dtype = pt.pattern_dtype(codes.shape[1])
+    if len(words_)**2 * np.dtype(dtype).itemsize > max_pattern_bytes:
+        np.save(output, np.zeros((0, 0), dtype=dtype))
+        return
+
+    matrix = np.lib.format.open_memmap(output, mode='w+', dtype=dtype,
+                                       shape=(len(words_), len(words_)))
+    for start in range(0, len(words_), block_size):
+        matrix[start:start+block_size] = pt.pattern_block(codes[start:start+block_size], codes)
+    matrix.flush()
+    del matrix
+
+
+def build_compressed(language='engwordle', output='', info_file='', max_pattern_bytes=2**28):
+    '''
+    Compressing the pattern matrix of a language (computed block by block, the
+    raw matrix is never held whole), the rows and columns are in the order of
+    its csv
+    Parameters:
+        language: string, a language of LANGUAGES
+        output: string, path of the npz file
+        info_file: string, path of the info artifact
+        max_pattern_bytes: int, the most bytes of the raw matrix, a bigger
+            matrix is not compressed (a matrix of no words is saved instead)
+    Return:
+        None
+    '''
+    words_ = pd.read_csv(info_file, dtype={'Word': str})['Word'].tolist()
+    itemsize = np.dtype(pt.pattern_dtype(len(words_[0]))).itemsize
+    if len(words_)**2 * itemsize > max_pattern_bytes:
+        words_ = []
+    CompressedPatterns.compress(words_).save(output)
+
+
+def build_book(language='engwordle', output='', info_file=''):
+    '''
+    Computing the opening book of a language: its best first guess and the
+    best second guess after every pattern of it, all the second guesses are
+    ranked at once by Language.rank_batch
+    Parameters:
+        language: string, a language of LANGUAGES
+        output: string, path of the json file
+        info_file: string, path of the info artifact
+    Return:
+        None
+    '''
+    root = load_info(language, info_file)
+    vocabulary = list(root.index)
+    first = max(root.all_words.values(), key=lambda word: word.info).str
+    codes, _ = pt.encode([first] + vocabulary)
+    row = pt.pattern_block(codes[:1], codes[1:])[0].astype(np.int64)
+
+    patterns, masks = [], []
+    for pattern in np.unique(row).tolist():
+        bits = np.packbits(row == pattern, bitorder='little')
+        patterns.append(pattern)
+        masks.append(bytes(bits))
+    rankings = root.rank_batch(masks, k=1)
+
+    book = {'first': first,
+            'second': {np.base_repr(pattern, 3).zfill(root.length): ranking[0][0]
+                       for pattern, ranking in zip(patterns, rankings)}}
+    with open(output, 'w') as file:
+        json.dump(book, file, indent=1, sort_keys=True)
+
+
+BUILDERS = {'words': build_words, 'info': build_info, 'patterns': build_patterns,
+            'compressed': build_compressed, 'book': build_book}
+
+
+def run(language='engwordle', artifact='words', max_pattern_bytes=2**28):
+    '''
+    Building an artifact (the job of a process of the pool)
+    Parameters:
+        language: string, a language of LANGUAGES
+        artifact: string, an artifact of ARTIFACTS
+        max_pattern_bytes: int, the most bytes of a pattern matrix
+    Return:
+        float, seconds of the build
+    '''
+    start = perf_counter()
+    kwargs = {'max_pattern_bytes': max_pattern_bytes} if artifact in ('patterns', 'compressed') else {}
+    for dependency in ARTIFACTS[artifact]['depends']:
+        kwargs[dependency + '_file'] = ARTIFACTS[dependency]['output'].format(language)
+    BUILDERS[artifact](language, ARTIFACTS[artifact]['output'].format(language), **kwargs)
+    return perf_counter() - start
+
+
+# Functions of the orchestration
+
+def is_shipped(language='engwordle', artifact='words'):
+    '''
+    Checking if an artifact is shipped in the repository (its output exists)
+    Parameters:
+        language: string, a language of LANGUAGES
+        artifact: string, an artifact of ARTIFACTS
+    Return:
+        boolean
+    '''
+    return artifact in LANGUAGES[language]['shipped'] and\
+        os.path.exists(ARTIFACTS[artifact]['output'].format(language))
+
+
+def dependencies(language='engwordle', artifact='words', force=False):
+    '''
+    Getting the artifacts an artifact is built from, none if it's shipped
+    (and not forced)
+    Parameters:
+        language: string, a language of LANGUAGES
+        artifact: string, an artifact of ARTIFACTS
+        force: boolean, if the shipped artifacts are rebuilt
+    Return:
+        list of strings, artifacts of ARTIFACTS
+    '''
+    if not force and is_shipped(language, artifact):
+        return []
+    return ARTIFACTS[artifact]['depends']
+
+
+def plan(languages=[], artifacts=[], force=False):
+    '''
+    Getting the artifacts to be built and the ones they depend on
+    Parameters:
+        languages: list of strings, languages of LANGUAGES
+        artifacts: list of strings, artifacts of ARTIFACTS
+        force: boolean, if the shipped artifacts are rebuilt (so their
+            dependencies are planned too)
+    Return:
+        list of (language, artifact) tuples, every artifact after the ones it
+            depends on
+    '''
+    planned = []
+
+    def add(language, artifact):
+        for dependency in dependencies(language, artifact, force):
+            add(language, dependency)
+        if (language, artifact) not in planned:
+            planned.append((language, artifact))
+
+    for language in languages:
+        for artifact in artifacts:
+            add(language, artifact)
+    return planned
+
+
+def build(languages=list(LANGUAGES), artifacts=list(ARTIFACTS), processes=None, force=False,
+          max_pattern_bytes=2**28, manifest_file=MANIFEST):
+    '''
+    Building the artifacts of some languages, every artifact is built once its
+    dependencies are, on a pool of processes, unless it's up to date
+    Parameters:
+        languages: list of strings, languages of LANGUAGES
+        artifacts: list of strings, artifacts of ARTIFACTS (their dependencies
+            are built too)
+        processes: int or None, size of the pool, number of CPUs if None
+        force: boolean, if the up to date and the shipped artifacts are rebuilt
+            too
+        max_pattern_bytes: int, the most bytes of a pattern matrix
+        manifest_file: string, path of the manifest
+    Return:
+        dictionary, keys are (language, artifact) tuples, values are 'skipped',
+            'shipped' or 'built'
+    '''
+    manifest = read_manifest(manifest_file)
+    planned = plan(languages, artifacts, force)
+    built, status = {}, {}
+    running = {}
+
+    def ready():
+        return [(language, artifact) for language, artifact in planned
+                if (language, artifact) not in status
+                and (language, artifact) not in running.values()
+                and all([(language, dependency) in built
+                         for dependency in dependencies(language, artifact, force)])]
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        keys = {}
+        while len(status) < len(planned):
+            for language, artifact in ready():
+                name = f'{language}/{artifact}'
+                if not force and is_shipped(language, artifact):
+                    output = ARTIFACTS[artifact]['output'].format(language)
+                    built[(language, artifact)] = {'outputs': {output: file_hash(output)}}
+                    status[(language, artifact)] = 'shipped'
+                    print(f'{name}: shipped {output} kept (--force rebuilds it)')
+                    continue
+                key = keys[name] = artifact_key(language, artifact, built, max_pattern_bytes)
+                if not force and is_built(manifest.get(name), key):
+                    built[(language, artifact)] = manifest[name]
+                    status[(language, artifact)] = 'skipped'
+                    print(f'{name}: up to date')
+                    continue
+                print(f'{name}: building...')
+                future = pool.submit(run, language, artifact, max_pattern_bytes)
+                running[future] = (language, artifact)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                language, artifact = running.pop(future)
+                name = f'{language}/{artifact}'
+                seconds = future.result()
+                output = ARTIFACTS[artifact]['output'].format(language)
+                manifest[name] = {'key': keys[name], 'outputs': {output: file_hash(output)},
+                                  'seconds': round(seconds, 3)}
+                write_manifest(manifest, manifest_file)
+                built[(language, artifact)] = manifest[name]
+                status[(language, artifact)] = 'built'
+                print(f'{name}: built in {seconds:.1f}s')
+    return status
+
+
+# Main Code
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the artifacts of the languages')
+    # No choices, argparse checks them against the empty default too
+    parser.add_argument('languages', nargs='*', default=[],
+                        help=f"languages to build ({', '.join(LANGUAGES)}), all by default")
+    parser.add_argument('--artifacts', nargs='+', default=list(ARTIFACTS),
+                        choices=list(ARTIFACTS), help='artifacts to build, all by default')
+    parser.add_argument('--processes', type=int, default=None, help='size of the pool')
+    parser.add_argument('--force', action='store_true',
+                        help='rebuild the up to date and the shipped artifacts')
+    parser.add_argument('--max-pattern-bytes', type=int, default=2**28,
+                        help='the most bytes of a pattern matrix')
+    args = parser.parse_args()
+    unknown = [language for language in args.languages if language not in LANGUAGES]
+    if unknown:
+        parser.error(f"unknown languages {', '.join(unknown)}, choose from {', '.join(LANGUAGES)}")
+
+    status = build(args.languages or list(LANGUAGES), args.artifacts, processes=args.processes,
+                   force=args.force, max_pattern_bytes=args.max_pattern_bytes)
+    print(f"{sum([s == 'built' for s in status.values()])} built, "
+          f"{sum([s != 'built' for s in status.values()])} up to date")
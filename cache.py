@@ -0,0 +1,130 @@
+'''
+This file contains the cache of solver states, a state is the set of the
+available words of a language, so different guess histories which leave the
+same words share the same entry.
+
+Entries are keyed by Language.candidates_key (a hash of the vocabulary of
+the language, its scoring configuration and the bitset of the available
+words' indices, so a cache may be shared by many languages) and hold what
+update_everything computes: the ranked top-k words and the info of every
+available word.
+
+File contents:
+    imports
+    class StateCache:
+        Constructor
+        Methods:
+            get
+            put
+            clear
+            stats
+'''
+
+from array import array
+from collections import OrderedDict
+from sys import getsizeof
+
+
+class StateCache():
+    '''
+    Class of state cache (least recently used entries are evicted first)
+    Static Variables:
+        None
+    Dynamic Variables:
+        entries: OrderedDict, keys are candidates keys, values are dictionaries
+            with keys 'ranking' (tuple of the top_k words), 'infos' and 'errs'
+            (arrays of info and info_err of the available words in the order
+            of their indices)
+        max_bytes: int, the most bytes the entries may use
+        top_k: int, number of ranked words kept per entry
+        nbytes: int, bytes used by the entries
+        hits, misses, evictions: int, counters
+    '''
+
+    def __init__(self, max_bytes=64 * 2**20, top_k=10):
+        '''
+        Constructor of the StateCache object
+        Parameters:
+            max_bytes: int, see the class docstring
+            top_k: int, see the class docstring
+        '''
+        self.entries = OrderedDict()
+        self.max_bytes = max_bytes
+        self.top_k = top_k
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Methods of StateCache class
+
+    def get(self, key):
+        '''
+        Looking up an entry and counting the hit or the miss
+        Parameters:
+            key: bytes, a candidates key
+        Return:
+            dictionary (see the class docstring) or None if there is no entry
+        '''
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, ranking=[], infos=[], errs=[]):
+        '''
+        Storing an entry, evicting the least recently used ones if needed
+        Parameters:
+            key: bytes, a candidates key
+            ranking: list of strings, the available words ranked (only the
+                first top_k are kept)
+            infos: list of floats, info of the available words in the order of
+                their indices
+            errs: list of floats, info_err of the same words
+        Return:
+            None
+        '''
+        entry = {'ranking': tuple(ranking[:self.top_k]),
+                 'infos': array('d', infos), 'errs': array('d', errs)}
+        size = getsizeof(entry['ranking']) + getsizeof(entry['infos']) + getsizeof(entry['errs'])
+        if size > self.max_bytes:
+            return
+
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)['size']
+        entry['size'] = size
+        self.entries[key] = entry
+        self.nbytes += size
+
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted['size']
+            self.evictions += 1
+
+    def clear(self):
+        '''
+        Removing all entries (the counters are kept)
+        Parameters:
+            None
+        Return:
+            None
+        '''
+        self.entries.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        '''
+        Summarizing the cache usage
+        Parameters:
+            None
+        Return:
+            dictionary, keys are 'entries', 'nbytes', 'hits', 'misses',
+                'evictions' and 'hit_rate'
+        '''
+        lookups = self.hits + self.misses
+        return {'entries': len(self.entries), 'nbytes': self.nbytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0}
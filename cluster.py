@@ -0,0 +1,496 @@
+'''
+This file contains the scoring of a language sharded across machines: a
+coordinator splits the words (the rows of the pattern matrix) into units of
+consecutive rows and hands them to workers over TCP
+(multiprocessing.connection), every worker computes the info of the words of
+its units against all the words (and their histograms if asked) and sends
+them back.
+
+A worker is given the words once (setup), then the units one by one. If a
+worker dies, disconnects or doesn't answer a unit within unit_timeout, its
+unit goes back to the queue and another worker computes it (a unit is tried
+max_attempts times at most). The results are merged by the position of their
+rows, so the output doesn't depend on which worker computed which unit nor on
+the order they finished.
+
+The connections exchange pickled objects, so whoever connects with the key
+can run code on the other side: the coordinator listens on localhost unless
+told otherwise, and there is no default key, it's taken from the environment
+variable AUTHKEY_VARIABLE (WORDLE_CLUSTER_KEY) or generated by the
+coordinator (then it's printed, to be given to the remote workers).
+The coordinator gives up once it has had no worker for idle_timeout seconds
+(or after its timeout).
+
+Usage (the workers can be started before or after the coordinator, they
+retry connecting for a while):
+    export WORDLE_CLUSTER_KEY=SOME_SECRET
+    python cluster.py coordinator --language nerdle --host 0.0.0.0 --port 6000 --local 2
+    python cluster.py worker --host COORDINATOR_HOST --port 6000
+
+File contents:
+    imports
+    class Coordinator:
+        Constructor
+        Methods:
+            start
+            serve
+            run
+            merge
+    Functions of the key:
+        get_authkey
+    Functions of the workers:
+        compute_unit
+        work
+    Functions to install a language over the workers:
+        start_local_workers
+        install
+    Main Code
+'''
+
+import argparse
+import multiprocessing as mp
+import os
+import secrets
+from collections import deque
+from multiprocessing.connection import Listener, Client
+from threading import Thread, Condition
+from time import sleep, perf_counter
+
+import numpy as np
+import pandas as pd
+
+import patterns as pt
+from language import Language, Word
+from progress import Progress
+
+AUTHKEY_VARIABLE = 'WORDLE_CLUSTER_KEY'
+
+
+class Coordinator():
+    '''
+    Class of coordinator
+    Static Variables:
+        None
+    Dynamic Variables:
+        words_: list of strings, the words, in the order of the rows
+        points: array, the words' points
+        length: int, length of the words
+        histograms: boolean, if the workers send the histograms too
+        units: list of (start, end) tuples, the row ranges
+        pending: deque of ints, the units waiting for a worker
+        attempts: list of ints, number of times every unit was handed out
+        results: dictionary, keys are units, values are their results (see
+            compute_unit function)
+        failed: list of ints, the units given up after max_attempts
+        condition: threading Condition, guarding all the above
+        unit_timeout: float, seconds to wait for a unit before dropping its worker
+        max_attempts: int, the most times a unit is handed out
+        listener: Listener object or None, the socket of the coordinator
+        address: tuple of (host, port), the address of the listener
+        n_workers: int, number of workers which have connected so far
+        n_active: int, number of workers connected now
+        idle_since: float, perf_counter time since there is no worker (when
+            n_active is 0)
+        progress: Progress object, the count of the computed words
+    '''
+
+    def __init__(self, words_=[], points=[], length=5, histograms=False, unit_size=1024,
+                 unit_timeout=600, max_attempts=3):
+        '''
+        Constructor of the Coordinator object
+        Parameters:
+            words_: list of strings, see the class docstring
+            points: list of numbers, see the class docstring
+            length: int, see the class docstring
+            histograms: boolean, see the class docstring
+            unit_size: int, number of rows of a unit
+            unit_timeout: float, see the class docstring
+            max_attempts: int, see the class docstring
+        '''
+        self.words_ = list(words_)
+        self.points = np.asarray(points, dtype=np.float64)
+        self.length = length
+        self.histograms = histograms
+        self.units = [(start, min(start + unit_size, len(self.words_)))
+                      for start in range(0, len(self.words_), unit_size)]
+        self.pending = deque(range(len(self.units)))
+        self.attempts = [0] * len(self.units)
+        self.results = {}
+        self.failed = []
+        self.condition = Condition()
+        self.unit_timeout = unit_timeout
+        self.max_attempts = max_attempts
+        self.listener = None
+        self.address = None
+        self.n_workers = 0
+        self.n_active = 0
+        self.idle_since = perf_counter()
+        self.progress = Progress(total=len(self.words_), desc='Scoring')
+
+    # Methods of Coordinator class
+
+    def start(self, address=('localhost', 0), authkey=None):
+        '''
+        Listening for the workers (in a background thread)
+        Parameters:
+            address: tuple of (host, port), port 0 for any free port
+            authkey: bytes, the key the workers have to know (required)
+        Return:
+            tuple of (host, port), the address listened on
+        '''
+        if not authkey:
+            raise ValueError('an authkey is required (see get_authkey)')
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+
+        def accept():
+            while True:
+                try:
+                    connection = self.listener.accept()
+                except OSError:
+                    return
+                self.n_workers += 1
+                Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+        Thread(target=accept, daemon=True).start()
+        return self.address
+
+    def _finished(self):
+        return len(self.results) + len(self.failed) == len(self.units)
+
+    def _next_unit(self):
+        '''
+        Waiting for a unit to hand out, None once all the units are done
+        '''
+        with self.condition:
+            while not self.pending and not self._finished():
+                self.condition.wait()
+            if self._finished():
+                return None
+            unit = self.pending.popleft()
+            self.attempts[unit] += 1
+            return unit
+
+    def _give_back(self, unit):
+        '''
+        Putting back the unit of a lost worker (or giving it up)
+        '''
+        with self.condition:
+            if unit in self.results:
+                pass
+            elif self.attempts[unit] >= self.max_attempts:
+                self.failed.append(unit)
+            else:
+                self.pending.appendleft(unit)
+            self.condition.notify_all()
+
+    def serve(self, connection):
+        '''
+        Handing out the units to a worker until all are done or the worker is
+        lost (in the thread of the worker's connection)
+        Parameters:
+            connection: Connection object, of the worker
+        Return:
+            None
+        '''
+        tally = self.progress.tally()
+        unit = None
+        with self.condition:
+            self.n_active += 1
+        try:
+            connection.send(('setup', self.words_, self.points, self.length, self.histograms))
+            while True:
+                unit = self._next_unit()
+                if unit is None:
+                    connection.send(('stop',))
+                    return
+                start, end = self.units[unit]
+                connection.send(('unit', unit, start, end))
+                if not connection.poll(self.unit_timeout):
+                    raise TimeoutError(f'unit {unit} timed out')
+                _, done_unit, result = connection.recv()
+                with self.condition:
+                    self.results.setdefault(done_unit, result)
+                    self.condition.notify_all()
+                tally.add(end - start)
+                tally.flush()
+                unit = None
+        except (EOFError, OSError, TimeoutError):
+            if unit is not None:
+                self._give_back(unit)
+        finally:
+            connection.close()
+            with self.condition:
+                self.n_active -= 1
+                if not self.n_active:
+                    self.idle_since = perf_counter()
+                self.condition.notify_all()
+
+    def run(self, timeout=None, idle_timeout=60):
+        '''
+        Waiting until all the units are computed, or the timeout expires, or
+        there is no worker for idle_timeout seconds (all died or none came)
+        Parameters:
+            timeout: float or None, the most seconds to wait, None for no limit
+            idle_timeout: float, the most seconds to wait without any worker
+        Return:
+            boolean, True if all the units are computed
+        '''
+        deadline = None if timeout is None else perf_counter() + timeout
+        with self.progress:
+            with self.condition:
+                while not self._finished():
+                    now = perf_counter()
+                    lefts = [] if deadline is None else [deadline - now]
+                    if not self.n_active:
+                        lefts.append(self.idle_since + idle_timeout - now)
+                    if lefts and min(lefts) <= 0:
+                        break
+                    self.condition.wait(min(lefts) if lefts else None)
+        self.listener.close()
+        return len(self.results) == len(self.units)
+
+    def merge(self):
+        '''
+        Merging the results of the units by the position of their rows
+        Parameters:
+            None
+        Return:
+            tuple of (infos, histograms), infos is an array of the words'
+                infos, histograms is None or a tuple of (offsets, patterns,
+                points) arrays, the nonzero entries of the words' histograms
+                (as Language.save_histograms saves them)
+        '''
+        if len(self.results) != len(self.units):
+            missing = sorted(set(range(len(self.units))) - set(self.results))
+            raise RuntimeError(f'units {missing} are not computed')
+        infos = np.concatenate([self.results[unit][0] for unit in range(len(self.units))])
+        if not self.histograms:
+            return infos, None
+
+        offsets, patterns, points = [np.zeros(1, dtype=np.int64)], [], []
+        for unit in range(len(self.units)):
+            _, counts, unit_patterns, unit_points = self.results[unit]
+            offsets.append(offsets[-1][-1] + np.cumsum(counts))
+            patterns.append(unit_patterns)
+            points.append(unit_points)
+        return infos, (np.concatenate(offsets), np.concatenate(patterns), np.concatenate(points))
+
+
+# Functions of the key
+
+def get_authkey(authkey=None, generate=False):
+    '''
+    Getting the key of the coordinator and the workers
+    Parameters:
+        authkey: bytes or None, the key if given
+        generate: boolean, if a random key is generated when there is none
+    Return:
+        bytes, the given key, otherwise the value of the environment variable
+            AUTHKEY_VARIABLE, otherwise a generated one (if generate)
+    '''
+    if authkey:
+        return authkey
+    if os.environ.get(AUTHKEY_VARIABLE):
+        return os.environ[AUTHKEY_VARIABLE].encode()
+    if generate:
+        return secrets.token_hex(16).encode()
+    raise ValueError(f'an authkey is required, set the environment variable {AUTHKEY_VARIABLE}')
+
+
+# Functions of the workers
+
+def compute_unit(codes, points, length=5, start=0, end=0, histograms=False, block_size=256):
+    '''
+    Computing the infos of the words of some rows against all the words
+    Parameters:
+        codes: array, the words' codes (see patterns.encode)
+        points: array, the words' points
+        length: int, length of the words
+        start, end: int, the rows of the unit
+        histograms: boolean, if the histograms are computed too
+        block_size: int, number of rows computed at once
+    Return:
+        tuple of (infos,) or of (infos, counts, patterns, points) with the
+            histograms, counts is the number of nonzero entries of every row,
+            patterns and points are the nonzero entries row by row
+    '''
+    infos, counts, nonzero_patterns, nonzero_points = [], [], [], []
+    for first in range(start, end, block_size):
+        block = pt.pattern_block(codes[first:min(first + block_size, end)], codes)
+        if not histograms:
+            infos.append(pt.patterns_info(block, points, length))
+            continue
+        block_infos, hist = pt.patterns_info(block, points, length, histograms=True)
+        infos.append(block_infos)
+        rows, block_patterns = np.nonzero(hist)
+        counts.append(np.bincount(rows, minlength=len(hist)))
+        nonzero_patterns.append(block_patterns.astype(np.uint32))
+        nonzero_points.append(hist[rows, block_patterns])
+
+    if not histograms:
+        return (np.concatenate(infos),)
+    return (np.concatenate(infos), np.concatenate(counts), np.concatenate(nonzero_patterns),
+            np.concatenate(nonzero_points))
+
+
+def work(address=('localhost', 6000), authkey=None, connect_timeout=60):
+    '''
+    Running a worker: connecting to the coordinator and computing its units
+    until it's told to stop
+    Parameters:
+        address: tuple of (host, port), the address of the coordinator
+        authkey: bytes or None, the key of the coordinator, None for the
+            environment variable AUTHKEY_VARIABLE
+        connect_timeout: float, seconds to keep retrying to connect
+    Return:
+        int, number of computed units
+    '''
+    authkey = get_authkey(authkey)
+    deadline = perf_counter() + connect_timeout
+    while True:
+        try:
+            connection = Client(address, authkey=authkey)
+            break
+        except ConnectionRefusedError:
+            if perf_counter() > deadline:
+                raise
+            sleep(0.5)
+
+    n_units = 0
+    with connection:
+        _, words_, points, length, histograms = connection.recv()
+        codes, _ = pt.encode(words_)
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                break
+            if message[0] == 'stop':
+                break
+            _, unit, start, end = message
+            result = compute_unit(codes, points, length, start, end, histograms)
+            connection.send(('done', unit, result))
+            n_units += 1
+    return n_units
+
+
+# Functions to install a language over the workers
+
+def start_local_workers(address=('localhost', 6000), n_workers=2, authkey=None):
+    '''
+    Starting workers as local processes (standing in for other machines)
+    Parameters:
+        address: tuple of (host, port), the address of the coordinator
+        n_workers: int, number of processes
+        authkey: bytes or None, the key of the coordinator (see work)
+    Return:
+        list of Process objects, started
+    '''
+    processes = [mp.Process(target=work, args=(address, authkey), daemon=True)
+                 for _ in range(n_workers)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def install(language='nerdle', words=None, file_name=None, histograms_file=None,
+            address=('localhost', 6000), n_local=0, unit_size=1024, unit_timeout=600,
+            authkey=None, timeout=None, idle_timeout=60):
+    '''
+    Installing a language with its scoring sharded over the workers, as the
+    install function of its module does it on one host
+    Parameters:
+        language: string, the language (has to be the same as the language python file name)
+        words: list of (string, points) tuples or None, the words, created by
+            the create function of the language module if None
+        file_name: string or None, path of the csv file, LANGUAGE.csv if None
+        histograms_file: string or None, path of the histograms (as
+            Language.save_histograms), not computed if None
+        address: tuple of (host, port), the address listened on (localhost
+            by default, remote workers need another host, '' for all the
+            interfaces)
+        n_local: int, number of local worker processes to start
+        unit_size: int, number of rows of a unit
+        unit_timeout: float, seconds to wait for a unit before dropping its worker
+        authkey: bytes or None, the key the workers have to know, None for the
+            environment variable AUTHKEY_VARIABLE or else a generated one
+        timeout: float or None, the most seconds to wait for the scoring
+        idle_timeout: float, the most seconds to wait without any worker
+    Return:
+        Language object, installed
+    '''
+    generated = not authkey and not os.environ.get(AUTHKEY_VARIABLE)
+    authkey = get_authkey(authkey, generate=True)
+    module = __import__(language)
+    if words is None:
+        words = [(word, 1) if isinstance(word, str) else word for word in module.create()]
+
+    # Creating the language, without scoring it
+    installed = Language(alphabet=module.alphabet, length=module.length, approx_threshold=None)
+    for word_, points in words:
+        installed.add_word(Word(str=word_, points=points))
+    installed.update_prob()
+    words_ = list(installed.all_words)
+
+    coordinator = Coordinator(words_, [installed.all_words[word_].points for word_ in words_],
+                              length=module.length, histograms=histograms_file is not None,
+                              unit_size=unit_size, unit_timeout=unit_timeout)
+    address = coordinator.start(address, authkey)
+    print(f'Coordinator listening on {address[0]}:{address[1]}, {len(coordinator.units)} units')
+    if generated and address[0] not in ['localhost', '127.0.0.1']:
+        print(f'Workers key (set {AUTHKEY_VARIABLE} to it): {authkey.decode()}')
+    local_workers = start_local_workers(address, n_local, authkey)
+    finished = coordinator.run(timeout=timeout, idle_timeout=idle_timeout)
+    for process in local_workers:
+        process.join(timeout=5)
+    if not finished:
+        raise RuntimeError(f'the scoring is not finished ({len(coordinator.results)} of '
+                           f'{len(coordinator.units)} units computed, {coordinator.n_active} '
+                           f'workers connected)')
+
+    infos, histograms = coordinator.merge()
+    for word_, info in zip(words_, infos.tolist()):
+        installed.all_words[word_].info = info
+    installed.sort()
+    installed.to_csv(file_name=file_name or language + '.csv')
+    if histograms is not None:
+        offsets, patterns, points = histograms
+        np.savez_compressed(histograms_file, words=np.array(words_), offsets=offsets,
+                            patterns=patterns, points=points)
+    return installed
+
+
+# Main Code
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a language over workers')
+    parser.add_argument('role', choices=['coordinator', 'worker'])
+    parser.add_argument('--language', default='nerdle')
+    parser.add_argument('--words', default=None,
+                        help='csv of the words (Word, Points), as build.py makes it')
+    parser.add_argument('--output', default=None, help='csv of the language')
+    parser.add_argument('--histograms', default=None, help='npz of the histograms')
+    parser.add_argument('--host', default='localhost',
+                        help="the coordinator listens on localhost only unless given ('' for all)")
+    parser.add_argument('--port', type=int, default=6000)
+    parser.add_argument('--local', type=int, default=0, help='local workers to start')
+    parser.add_argument('--unit-size', type=int, default=1024)
+    parser.add_argument('--unit-timeout', type=float, default=600)
+    parser.add_argument('--timeout', type=float, default=None)
+    parser.add_argument('--idle-timeout', type=float, default=60,
+                        help='seconds to wait without any worker before giving up')
+    args = parser.parse_args()
+
+    if args.role == 'worker':
+        n_units = work((args.host or 'localhost', args.port))
+        print(f'{n_units} units computed')
+    else:
+        words = None
+        if args.words:
+            df = pd.read_csv(args.words, dtype={'Word': str})
+            words = list(zip(df['Word'], df['Points']))
+        install(args.language, words, file_name=args.output, histograms_file=args.histograms,
+                address=(args.host, args.port), n_local=args.local,
+                unit_size=args.unit_size, unit_timeout=args.unit_timeout,
+                timeout=args.timeout, idle_timeout=args.idle_timeout)
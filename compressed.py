@@ -0,0 +1,396 @@
+'''
+This file contains the compressed pattern matrix of a language, the patterns
+of every word against every word stored in less space than the raw matrix
+(uint8 for engwordle, uint16 for nerdle) and decoded row by row on demand.
+
+Every row (a guess) is encoded by its own dictionary: its distinct patterns
+sorted by their frequency in the row (the most frequent first), then every
+pattern of the row is stored as its rank in the dictionary:
+    in a code of width bits if the rank is less than the escape code (the
+        largest code),
+    as the escape code and the rank in the escapes of the row otherwise.
+The codes take a nibble (4 bits, two per byte) if the raw patterns take a
+byte (length 5) and a byte if they take two (nerdle). Most answers of a guess
+fall in a few patterns (all grays, one yellow...), so most ranks take a code
+only. A row is decoded at once by unpacking its codes, filling the escapes
+and looking the ranks up in its dictionary, so random rows are read without
+decoding the others, and row blocks are streamed over the columns for
+calc_possible_points and massive_remove. The infos are computed from the
+ranks without the dictionaries, as relabeling the patterns of a row doesn't
+change its info.
+
+A CompressedPatterns object has the interface of PatternTiles used by
+Language (row, info, nbytes, stats), so a language given a compressed matrix
+(patterns_file) takes its patterns from it instead of tiles.
+
+Usage (compressing a language's matrix and reporting against the raw one):
+    python compressed.py --language engwordle --games 5
+
+File contents:
+    imports
+    class CompressedPatterns:
+        Constructor
+        Methods:
+            decode_ranks
+            decode_rows
+            row
+            info
+            save
+            nbytes
+            stats
+        Static Methods:
+            encode_rows
+            compress
+            load
+    Functions of the report:
+        report
+    Main Code
+'''
+
+import argparse
+from time import perf_counter
+
+import numpy as np
+
+import patterns as pt
+
+
+class CompressedPatterns():
+    '''
+    Class of compressed patterns
+    Static Variables:
+        None
+    Dynamic Variables:
+        words_: list of strings, the words by their numbers (rows and columns)
+        index: dictionary, keys = string words, values = their numbers
+        n: int, number of words
+        length: int, length of the words
+        dtype: numpy dtype of the decoded patterns
+        dictionary: array, the dictionaries of all the rows one after another
+        dictionary_offsets: array of n + 1 ints, the start of every row's
+            dictionary in dictionary
+        width: int, bits of a code (4 or 8)
+        escape: int, the escape code (2^width - 1)
+        codes: uint8 array of shape (n, ceil(n * width / 8)), the codes of
+            the ranks (with nibbles, column 2j is in the low nibble of the byte
+            j and column 2j + 1 in the high one)
+        escapes: array, rank - escape of the escaped patterns, row by row
+        escape_offsets: array of n + 1 ints, the start of every row's escapes
+        decoded: int, number of patterns decoded so far
+    '''
+
+    def __init__(self, words_=[], dictionary=None, dictionary_offsets=None, width=4,
+                 codes=None, escapes=None, escape_offsets=None):
+        '''
+        Constructor of the CompressedPatterns object (see compress and load)
+        Parameters:
+            words_: list of strings, see the class docstring
+            width: int, see the class docstring
+            dictionary, dictionary_offsets, codes, escapes, escape_offsets:
+                arrays, see the class docstring
+        '''
+        self.words_ = list(words_)
+        self.index = {word_: i for i, word_ in enumerate(self.words_)}
+        self.n = len(self.words_)
+        self.length = len(self.words_[0]) if self.words_ else 0
+        self.dtype = pt.pattern_dtype(self.length)
+        self.dictionary = dictionary
+        self.dictionary_offsets = dictionary_offsets
+        self.width = width
+        self.escape = 2**width - 1
+        self.codes = codes
+        self.escapes = escapes
+        self.escape_offsets = escape_offsets
+        self.decoded = 0
+
+    # Methods of CompressedPatterns class
+
+    @staticmethod
+    def encode_rows(patterns, width=4):
+        '''
+        Encoding a block of rows
+        Parameters:
+            patterns: array of shape (rows, n), as returned by pattern_block
+            width: int, bits of a code (4 or 8)
+        Return:
+            tuple of (dictionaries, codes, escapes), dictionaries is a list of
+                arrays, codes is a uint8 array of shape (rows, ceil(n * width / 8))
+                and escapes is a list of arrays (rank - escape code)
+        '''
+        escape = 2**width - 1
+        n_rows, n = patterns.shape
+        ranks = np.zeros((n_rows, n + n % 2), dtype=np.int64)
+        dictionaries, escapes = [], []
+        for i, row in enumerate(patterns):
+            counts = np.bincount(row)
+            order = np.argsort(-counts, kind='stable')  # the most frequent first (ties by value)
+            rank_of = np.empty(len(order), dtype=np.int64)
+            rank_of[order] = np.arange(len(order))
+            ranks[i, :n] = rank_of[row]
+            dictionaries.append(order[:np.count_nonzero(counts)])
+            escapes.append(ranks[i, :n][ranks[i, :n] >= escape] - escape)
+
+        codes = np.minimum(ranks, escape).astype(np.uint8)
+        if width == 4:
+            codes = codes[:, 0::2] | (codes[:, 1::2] << 4)
+        else:
+            codes = codes[:, :n]
+        return dictionaries, codes, escapes
+
+    def decode_ranks(self, rows=[]):
+        '''
+        Decoding the ranks of some rows (their patterns relabeled row by row,
+        enough to compute their infos)
+        Parameters:
+            rows: array of ints, the rows (in any order)
+        Return:
+            int32 array of shape (len(rows), n), the ranks
+        '''
+        rows = np.asarray(rows, dtype=np.int64)
+        codes = self.codes[rows]
+        if self.width == 4:
+            nibbles = codes
+            codes = np.empty((len(rows), 2 * nibbles.shape[1]), dtype=np.uint8)
+            np.bitwise_and(nibbles, 0x0F, out=codes[:, 0::2])
+            np.right_shift(nibbles, 4, out=codes[:, 1::2])
+            codes = codes[:, :self.n]
+
+        # The escapes of the rows one after another (row by row as the codes)
+        starts = self.escape_offsets[rows]
+        counts = self.escape_offsets[rows + 1] - starts
+        firsts = np.cumsum(counts) - counts
+        escapes = self.escapes[np.repeat(starts - firsts, counts) + np.arange(counts.sum())]
+
+        ranks = codes.astype(np.int32)
+        ranks.ravel()[np.flatnonzero(codes == self.escape)] += escapes
+        self.decoded += ranks.size
+        return ranks
+
+    def decode_rows(self, rows=[]):
+        '''
+        Decoding some rows
+        Parameters:
+            rows: array of ints, the rows (in any order)
+        Return:
+            array of shape (len(rows), n), the patterns
+        '''
+        rows = np.asarray(rows, dtype=np.int64)
+        ranks = self.decode_ranks(rows)
+        ranks += self.dictionary_offsets[rows, None].astype(np.int32)
+        return self.dictionary[ranks]
+
+    def row(self, word_='', words_=[]):
+        '''
+        Getting the patterns of a word against some words (as comparen)
+        Parameters:
+            word_: string, the guess
+            words_: iterable of strings, the answers
+        Return:
+            array of the patterns, in the order of words_
+        '''
+        ids = np.array([self.index[some_word_] for some_word_ in words_], dtype=np.int64)
+        return self.decode_rows([self.index[word_]])[0][ids]
+
+    def info(self, ids, points, block_size=256, progress=None):
+        '''
+        Computing the expected information of some words over the same words,
+        streaming the decoded rows block by block
+        Parameters:
+            ids: array of ints, numbers of the words
+            points: array, the words' points (in the order of ids)
+            block_size: int, the most rows decoded at once
+            progress: Tally object or None, counts the scored words
+        Return:
+            array of the infos, in the order of ids
+        '''
+        ids = np.asarray(ids, dtype=np.int64)
+        points = np.asarray(points, dtype=np.float64)
+        infos = np.zeros(len(ids))
+        all_columns = np.array_equal(ids, np.arange(self.n))
+        for first in range(0, len(ids), block_size):
+            ranks = self.decode_ranks(ids[first:first+block_size])
+            if not all_columns:
+                ranks = ranks[:, ids]
+            # The info doesn't depend on the labels of the patterns, the ranks do
+            infos[first:first+block_size] = pt.patterns_info(ranks, points, self.length)
+            if progress is not None:
+                progress.add(len(ranks))
+        return infos
+
+    @staticmethod
+    def compress(words_=[], block_size=256, matrix=None, progress=None):
+        '''
+        Compressing the pattern matrix of some words, block of rows by block
+        of rows (the raw matrix is never held whole)
+        Parameters:
+            words_: list of strings, the words (rows and columns)
+            block_size: int, number of rows encoded at once
+            matrix: array or None, the raw matrix (can be memory mapped), the
+                rows are computed by pattern_block if None
+            progress: Tally object or None, counts the compressed rows
+        Return:
+            CompressedPatterns object
+        '''
+        words_codes, _ = pt.encode(words_)
+        dtype = pt.pattern_dtype(words_codes.shape[1])
+        width = 4 if np.dtype(dtype).itemsize == 1 else 8
+        dictionaries, codes, escapes = [], [], []
+        for start in range(0, len(words_), block_size):
+            if matrix is None:
+                block = pt.pattern_block(words_codes[start:start+block_size], words_codes)
+            else:
+                block = np.asarray(matrix[start:start+block_size])
+            block_dictionaries, block_codes, block_escapes = CompressedPatterns.encode_rows(block, width)
+            dictionaries += block_dictionaries
+            codes.append(block_codes)
+            escapes += block_escapes
+            if progress is not None:
+                progress.add(len(block))
+
+        # The escapes take a byte if no dictionary is longer than escape + 256
+        longest = max([len(dictionary) for dictionary in dictionaries], default=0)
+        escape_dtype = np.uint8 if longest <= 2**width - 1 + 256 else np.uint16
+        return CompressedPatterns(
+            words_,
+            dictionary=np.concatenate([np.zeros(0)] + dictionaries).astype(dtype),
+            dictionary_offsets=np.cumsum([0] + [len(d) for d in dictionaries]),
+            width=width,
+            codes=np.concatenate(codes) if codes else np.zeros((0, 0), dtype=np.uint8),
+            escapes=np.concatenate([np.zeros(0)] + escapes).astype(escape_dtype),
+            escape_offsets=np.cumsum([0] + [len(e) for e in escapes]))
+
+    def save(self, file_name='patterns.npz'):
+        '''
+        Saving the compressed matrix (npz, not compressed again)
+        Parameters:
+            file_name: string, destination file path
+        Return:
+            None
+        '''
+        np.savez(file_name, words=np.array(self.words_), dictionary=self.dictionary,
+                 dictionary_offsets=self.dictionary_offsets, width=self.width,
+                 codes=self.codes, escapes=self.escapes, escape_offsets=self.escape_offsets)
+
+    @staticmethod
+    def load(file_name='patterns.npz'):
+        '''
+        Loading a compressed matrix saved by save
+        Parameters:
+            file_name: string, source file path
+        Return:
+            CompressedPatterns object
+        '''
+        data = np.load(file_name)
+        return CompressedPatterns(data['words'].tolist(), dictionary=data['dictionary'],
+                                  dictionary_offsets=data['dictionary_offsets'],
+                                  width=int(data['width']), codes=data['codes'],
+                                  escapes=data['escapes'], escape_offsets=data['escape_offsets'])
+
+    def nbytes(self):
+        '''
+        Getting the RAM used by the compressed matrix
+        Parameters:
+            None
+        Return:
+            int, bytes
+        '''
+        return (self.dictionary.nbytes + self.dictionary_offsets.nbytes + self.codes.nbytes
+                + self.escapes.nbytes + self.escape_offsets.nbytes)
+
+    def stats(self):
+        '''
+        Getting the sizes of the compressed matrix
+        Parameters:
+            None
+        Return:
+            dictionary, keys are 'raw_bytes', 'bytes', 'ratio', 'escaped'
+                (fraction of the patterns stored as escapes) and 'decoded'
+        '''
+        raw_bytes = self.n**2 * np.dtype(self.dtype).itemsize
+        return {'raw_bytes': raw_bytes, 'bytes': self.nbytes(),
+                'ratio': raw_bytes / max(self.nbytes(), 1),
+                'escaped': len(self.escapes) / max(self.n**2, 1), 'decoded': self.decoded}
+
+
+# Functions of the report
+
+def report(language='engwordle', n_games=20, seed=0):
+    '''
+    Comparing the compressed matrix of a language with its raw matrix:
+    compression ratio, decode throughput and the latency of the turns of some
+    games (update_everything then massive_remove) taking the patterns from
+    either of them
+    Parameters:
+        language: string, the language (its csv has to exist)
+        n_games: int, number of games played with each matrix
+        seed: int, seed of the hidden words
+    Return:
+        dictionary of the measures
+    '''
+    import control as ctrl
+    from game_core import comparen
+    from language import Language
+    from tiles import PatternTiles
+
+    lang_params = ctrl.lang_params(language)
+    root = Language(alphabet=lang_params['alphabet'], length=lang_params['length'],
+                    from_csv=language + '.csv', approx_threshold=None)
+    words_ = list(root.index)
+
+    start = perf_counter()
+    compressed = CompressedPatterns.compress(words_)
+    seconds = {'compress': perf_counter() - start}
+    raw = PatternTiles(index=root.index, tile_size=len(words_), max_bytes=2**40, spill=False)
+    start = perf_counter()
+    raw_matrix = raw.block(0, 0, np.arange(len(words_)), np.arange(len(words_)))
+    seconds['compute'] = perf_counter() - start
+
+    # Decoding all the rows (block by block) against reading them from RAM
+    start = perf_counter()
+    for first in range(0, len(words_), 256):
+        assert np.array_equal(compressed.decode_rows(np.arange(first, min(first + 256, len(words_)))),
+                              raw_matrix[first:first+256])
+    seconds['decode'] = perf_counter() - start
+    start = perf_counter()
+    for first in range(0, len(words_), 256):
+        np.array(raw_matrix[first:first+256])
+    seconds['read'] = perf_counter() - start
+
+    # Playing the same games with the patterns of both matrices
+    hidden_words = root.choose_words(k=n_games, seed=seed)
+    latencies = {}
+    for name, matrix in [('raw', raw), ('compressed', compressed)]:
+        turns = []
+        root.tile_size, root.tiles = len(words_), matrix  # shared by the sub languages
+        for the_word in hidden_words:
+            game = root.sub_language(root.all_words)
+            for _ in range(lang_params['n_tryouts']):
+                start = perf_counter()
+                game.update_everything()
+                guess = next(iter(game.all_words))
+                pattern = comparen(guess, the_word)
+                game.massive_remove(guess, pattern)
+                turns.append(perf_counter() - start)
+                if guess == the_word:
+                    break
+        latencies[name] = 1000 * sum(turns) / len(turns)
+
+    n_patterns = len(words_)**2
+    return {'words': len(words_), **compressed.stats(),
+            'compress_s': seconds['compress'], 'compute_s': seconds['compute'],
+            'decode_patterns_per_s': n_patterns / seconds['decode'],
+            'read_patterns_per_s': n_patterns / seconds['read'],
+            'raw_turn_ms': latencies['raw'], 'compressed_turn_ms': latencies['compressed']}
+
+
+# Main Code
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compress a pattern matrix and compare it with the raw one')
+    parser.add_argument('--language', default='engwordle')
+    parser.add_argument('--games', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for key, value in report(args.language, args.games, args.seed).items():
+        print(f'{key:24} {value:,.3f}' if isinstance(value, float) else f'{key:24} {value:,}')
@@ -16,8 +16,8 @@ File contents:
             summary
             end_game
         Functions to get game and language Parameters:
-            get_lang_params
-            get_params
+            lang_params
+            mode_params
 '''
 
 import game_core as gc
@@ -77,14 +77,13 @@ def get_theword(type='none', language=None):
         return gc.take_theword()  # TBC
 
     if type == 'bg':
-        list_of_points = [language.all_words[word_].points for word_ in language.all_words]
-        return gc.choose_word(language_dict=language.all_words, list_of_points=list_of_points)
+        return language.choose_words()[0]
 
     # if type == 'nan'
     return ''
 
 
-def get_word(type='io', alphabet=[], language_dict={}, length=5):
+def get_word(type='io', alphabet=[], language_dict={}, length=5, trie=None):
     '''
     Getting word from any available way
     Parameters:
@@ -93,11 +92,12 @@ def get_word(type='io', alphabet=[], language_dict={}, length=5):
         alphabet: list of characters, of all valid characters of the language
         language_dict: list of all words as strings or dictionary with keys = words as strings
         length: int, the exact number of characters of the word
+        trie: Trie object or None, the vocabulary for validation and completion
     Return:
         string, a valid word
     '''
     if type == 'io':
-        return gc.scan_word(alphabet=alphabet, language_dict=language_dict, length=length)
+        return gc.scan_word(alphabet=alphabet, language_dict=language_dict, length=length, trie=trie)
 
     # if type == 'gui':
     return gc.listen_word()  # TBC
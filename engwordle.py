@@ -1,6 +1,6 @@
 import pandas as pd
 from language import Word, Language
-from tqdm import tqdm
+from progress import track
 
 
 lower_letters = [chr(i) for i in range(ord('a'), ord('z')+1)]
@@ -10,12 +10,28 @@ length = 5
 n_tryouts = 6
 
 
-def install():
+def create():
+    '''
+    Reading all the words of english.json with their points
+    Parameters:
+        None
+    Return:
+        list of (string, points) tuples
+    '''
+    df = pd.read_json('english.json', orient='index')
+    df = df.reset_index()
+    df.rename(columns={'index': 'Word', 0: 'Points'}, inplace=True)
+    return list(zip(df['Word'], df['Points']))
+
+
+def install(words=None, file_name='engwordle.csv'):
     '''
     Installing function
     To be called only once, then the language will be saved in a csv file
     Parameters:
-        None
+        words: list of (string, points) tuples or None, the words (as create
+            returns them), created if None
+        file_name: string, path of the csv file
     Return:
         None
     '''
@@ -25,20 +41,19 @@ def install():
     upper_letters = [chr(i) for i in range(ord('A'), ord('Z')+1)]
 
     # Handling json file
-    df = pd.read_json('english.json', orient='index')
-    df = df.reset_index()
-    df.rename(columns={'index': 'Word', 0: 'Points'}, inplace=True)
+    if words is None:
+        words = create()
 
     # Creating an empty language object
-    engwordle = Language(alphabet=lower_letters+upper_letters, length=5)
+    engwordle = Language(alphabet=lower_letters+upper_letters, length=5, approx_threshold=None)
 
     # Adding all words
-    for i, row in tqdm(df.iterrows()):
-        word = Word(str=row['Word'], points=row['Points'])
+    for word_, points in track(words):
+        word = Word(str=word_, points=points)
         engwordle.add_word(word)
 
     # Doing all the information job
     engwordle.update_everything(True, True, True)
 
     # Saving language
-    engwordle.to_csv(file_name='engwordle.csv')
+    engwordle.to_csv(file_name=file_name)
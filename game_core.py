@@ -6,15 +6,16 @@ strings, numerical variables and lists.
 
 File contents:
     imports
+    The registered languages
     Colors (and other commands) for terminals
     Functions to check the validity of words and color patterns:
         check_word
         check_pattern
+        complete_word
     Functions to compute game core calculations:
         compare
         comparen
         gotit
-        choose_word
     Functions to scan words or patterns from terminal or GUI:
         scan_language
         listen_language
@@ -29,6 +30,7 @@ File contents:
     Functions to display outputs in terminal or GUI:
         print_error
         print_word
+        print_completions
         send_word
         print_summary
         send_summary
@@ -36,9 +38,11 @@ File contents:
         disp_end
 '''
 
-from random import choices
 import game_gui as gg
 
+# The registered languages (a python file and a csv each)
+LANGUAGES = ['engwordle', 'primel', 'nerdle']
+
 # Colors (and other commands) for terminals
 _GRAY = "\033[100m"
 _GREEN = "\033[42m"
@@ -52,7 +56,7 @@ _ERASE = "\033[A                             \033[A"
 
 # Checking the validity of words and color patterns
 
-def check_word(alphabet=[], language_dict={}, length=5, word=''):
+def check_word(alphabet=[], language_dict={}, length=5, word='', trie=None):
     '''
     Check if a given word is valid
     A given word is valid if and only if it's totally consisted of characters
@@ -64,12 +68,16 @@ def check_word(alphabet=[], language_dict={}, length=5, word=''):
         alphabet: list of chars, contains all valid chars, if empty then ignore alphabet check
         language_dict: list of strings or dictionary with string keys, of all valid words, if empty then ignore language check
         length: int, the exact valid length of the word
+        trie: Trie object or None, the vocabulary, if given the word has to be
+            in it, which checks the alphabet too in O(length)
     Return:
         boolean, True if the word is valid, False otherwise
     '''
     res = len(word) == length
-    res = res and not (len(alphabet) > 0 and sum(
-        [1 for ch in word if ch not in alphabet]))
+    if trie is not None:
+        res = res and trie.contains(word)
+    else:
+        res = res and not (len(alphabet) > 0 and not set(word).issubset(alphabet))
     res = res and (not language_dict or word in language_dict)
     return res
 
@@ -90,6 +98,21 @@ def check_pattern(length=5, pattern=''):
             and sum([1 for ch in pattern if ch in ['0', '1', '2']]) == length
 
 
+def complete_word(prefix='', trie=None, language_dict={}, k=10):
+    '''
+    Complete a prefix into valid words
+    Parameters:
+        prefix: string, the beginning of a word
+        trie: Trie object, the vocabulary
+        language_dict: list of strings or dictionary with string keys, if not
+            empty then only words in it are found (the still consistent words)
+        k: int, the most words to be found
+    Return:
+        list of strings, the found words
+    '''
+    return trie.complete(prefix=prefix.lower(), k=k, among=language_dict or None)
+
+
 # Computing the game core calculations
 
 
@@ -145,19 +168,6 @@ def gotit(pattern='', length=5):
     return int(pattern,3) == 3**length - 1
 
 
-def choose_word(language_dict={}, list_of_points=[]):
-    '''
-    Choosing word according to language words probability distribution instead
-    of scanning it
-    Parameters:
-        language_dict: dictionary with keys = word strings
-        list_of_points: list of numerical values, words' corresponding weights
-    Return:
-        string, a chosen word
-    '''
-    return choices(list(language_dict), weights=tuple(list_of_points), k=1)[0]
-
-
 # Scanning functions
 
 
@@ -169,14 +179,13 @@ def scan_language():
     Return:
         string, the selected language
     '''
-    languages = ['engwordle', 'primel', 'nerdle']
     while True:
-        for i, language in enumerate(languages):
+        for i, language in enumerate(LANGUAGES):
             print(f'For {language} press {i+1}')
         print("")
         try:
             x = int(input())
-            return languages[x-1]
+            return LANGUAGES[x-1]
         except:
             print_error('INPUT')
 
@@ -235,20 +244,26 @@ def listen_mode():
     return mode
 
 
-def scan_word(alphabet=[], language_dict={}, length=5):
+def scan_word(alphabet=[], language_dict={}, length=5, trie=None):
     '''
     Scan word from terminal
+    If a trie is given then entering a prefix followed by '?' prints the valid
+    words starting with it instead.
     Parameters:
         alphabet: as alphabet in check_word function
         language_dict: as language_dict in check_word function
         length: as length in check_word function
+        trie: as trie in check_word function
     Return:
         string, a valid word
     '''
     while True:
         word = input()
         word = word.lower()
-        if check_word(alphabet=alphabet, language_dict=language_dict, length=length, word=word):
+        if trie is not None and word.endswith('?'):
+            print_completions(complete_word(prefix=word[:-1], trie=trie, language_dict=language_dict))
+            continue
+        if check_word(alphabet=alphabet, language_dict=language_dict, length=length, word=word, trie=trie):
             return word
         print_error('WORD')
 
@@ -368,6 +383,17 @@ def print_word(word='', pattern=''):
     print(_RESET)
 
 
+def print_completions(words=[]):
+    '''
+    Print completions of a prefix in terminal
+    Parameters:
+        words: list of strings, the completions
+    Return:
+        None
+    '''
+    print(' '.join(words) if words else 'No words start with that')
+
+
 def send_word(word='', pattern=''):
     '''
     sending word to display in GUI according to a given color-coded pattern
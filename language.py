@@ -10,31 +10,98 @@ File contents:
             calc_prob
             calc_possible_points
             calc_info
+            calc_sampled_info
+            calc_freq_score
+            shift_possible_points
+            calc_shifted_info
+            set_histogram
             copy
     class Language:
         Constructor
         Functions to add/remove words to/from the language:
+            load_csv
             add_word
             remove_word
+            add_words
+            remove_words
+            update_incrementally
+        Functions to draw words according to their points:
+            get_sampler
+            choose_words
+        Functions to validate and complete words:
+            get_trie
+            completions
+        Functions of the pattern matrix:
+            is_tiled
+            get_tiles
+            get_packed
+        Functions of the guesses (easy mode):
+            get_guesses
+            best_guesses
         Functions to apply on all the words of the language:
             update_prob
             update_possible_points
             update_info
+            update_sampled_info
+            update_streamed_info
+            update_freq_scores
+            update_shortlisted_info
+            update_budgeted_info
+            update_planned_info
+            update_vectorized_info
+            update_tiled_info
+            update_deduplicated_info
+            update_guess_info
         Functions to apply on the language globally:
             sort
             massive_remove
+            shortlist
+            sub_language
             update_everything
             print
+        A function to rank many sets of available words at once:
+            rank_batch
+        Functions to refine a partial ranking in the background:
+            refine_in_background
+            stop_refining
+        Functions to cache the computed states:
+            candidates_bitset
+            candidates_key
+            artifact_id
+            scoring_id
+            cache_state
+            restore_state
+        Functions to account for the memory of the language:
+            memory_report
+            histograms_bytes
+            over_budget
         A function to save tha language as csv file:
             to_csv
+        Functions to save/load the histograms (for incremental updates):
+            save_histograms
+            load_histograms
 '''
 
 
-from math import log2, ceil
-from tqdm import tqdm
+from math import log2, log, sqrt
+from progress import Progress, track
 from game_core import comparen
 import pandas as pd
-from copy import deepcopy
+from sys import getsizeof
+from warnings import warn
+from sampling import AliasTable
+from hashlib import blake2b
+from heapq import nlargest
+from itertools import islice
+from trie import Trie
+from tiles import PatternTiles
+from compressed import CompressedPatterns
+from packed import PackedWords
+import numpy as np
+from threading import Thread, Event
+from time import perf_counter
+from planner import default_planner
+import patterns as pt
 
 
 class Word():
@@ -48,8 +115,18 @@ class Word():
         list_of_all_possible_points: list of (3^length) numerical values,
             each index represents specific color pattern, and each value represents
             sum of all points we can get from this pattern with this word
+            (empty until calc_possible_points is called)
         prob: float between 0 and 1, probability of appearing for this word
         info: float, expected information we can get by choosing this word
+        info_err: float, half width of the confidence interval of info, 0 when
+            info is computed exactly over all the available words
+        freq_score: float, cheap heuristic score from the frequencies of the
+            word's letters among the available words
+        plogp: float or None, summation of pts * log2(pts) over the histogram,
+            kept by shift_possible_points, None when not computed yet
+        histogram_total: numerical value or None, summation of the histogram
+            (the total points of the words it was computed over), kept by
+            shift_possible_points, None when there is no histogram
     '''
     length = 5
 
@@ -70,9 +147,13 @@ class Word():
         self.points = points
 
         # Changeable
-        self.list_of_all_possible_points = [0] * (3**Word.length)   # initially
+        self.list_of_all_possible_points = []   # initially
         self.prob = 0    # initially
         self.info = 0    # initially
+        self.info_err = 0    # initially
+        self.freq_score = 0    # initially
+        self.plogp = None    # initially
+        self.histogram_total = None    # initially
 
     # Methods of Word class
 
@@ -86,18 +167,31 @@ class Word():
         '''
         self.prob = self.points/total_points
 
-    def calc_possible_points(self, language_dict):
+    def calc_possible_points(self, language_dict, tiles=None, packed=None):
         '''
         Calculating possible points of each pattern we may get
         Parameters:
             language_dict: dictionary, key = words in strings, values = word objects of the all available words
+            tiles: PatternTiles or CompressedPatterns object or None, if given the patterns are taken
+                from it (tile by tile) instead of being compared one by one
+            packed: PackedWords object or None, if given (and not tiles) the words are compared
+                packed (see packed.py) instead of by comparen
         Return:
             None, working inplace and updating self.list_of_all_possible_points
         '''
-        self.list_of_all_possible_points = [0] * (3**Word.length)
-        for word_ in language_dict:
-            self.list_of_all_possible_points[comparen(self.str, word_)] +=\
-                language_dict[word_].points
+        # Not Word.length, languages of other lengths may be loaded meanwhile
+        self.list_of_all_possible_points = [0] * (3**len(self.str))
+        self.plogp = None
+        self.histogram_total = sum([word.points for word in language_dict.values()])
+        if tiles is not None:
+            patterns = tiles.row(self.str, language_dict).tolist()
+        elif packed is not None:
+            pack = packed.pack
+            patterns = packed.row(pack(self.str), [pack(word_) for word_ in language_dict])
+        else:
+            patterns = [comparen(self.str, word_) for word_ in language_dict]
+        for word, pattern in zip(language_dict.values(), patterns):
+            self.list_of_all_possible_points[pattern] += word.points
 
     def calc_info(self):
         '''
@@ -109,6 +203,107 @@ class Word():
         '''
         ss = sum(self.list_of_all_possible_points)
         self.info = sum([pts/ss * log2(ss/pts) for pts in self.list_of_all_possible_points if pts])
+        self.info_err = 0
+        self.plogp = None
+
+    def calc_sampled_info(self, sample, z=1.96):
+        '''
+        Estimating expected information from a sample of the available words
+        instead of all of them
+        The sample is supposed to be drawn with replacement according to the
+        words' points, so every drawn word counts once. The estimate is
+        corrected for its bias (Miller-Madow) and self.info_err is set to z
+        times its standard error.
+        Parameters:
+            sample: list of strings, words drawn from the language
+            z: float, normal quantile of the required confidence (1.96 for 95%)
+        Return:
+            None, working inplace and updating self.info and self.info_err
+        '''
+        self.set_histogram([])  # the histogram of another state would be stale
+        counts = {}
+        for word_ in sample:
+            pattern = comparen(self.str, word_)
+            counts[pattern] = counts.get(pattern, 0) + 1
+
+        n = len(sample)
+        terms = [(c/n, log2(n/c)) for c in counts.values()]
+        entropy = sum([p * bits for p, bits in terms])
+        variance = max(sum([p * bits**2 for p, bits in terms]) - entropy**2, 0) / n
+        self.info = entropy + (len(counts) - 1) / (2 * n * log(2))
+        self.info_err = z * sqrt(variance)
+
+    def calc_freq_score(self, positional, overall, total_points):
+        '''
+        Calculating the heuristic score of the word by the frequencies of its
+        letters: the probability of every letter to be green plus the
+        probability of every distinct letter to be in the solution
+        Parameters:
+            positional: list of dictionaries, one per position, keys = characters,
+                values = summation of points of the words having it there
+            overall: dictionary, keys = characters, values = summation of points
+                of the words having it anywhere
+            total_points: numerical value, summation of all points of all words
+        Return:
+            None, working inplace and updating self.freq_score
+        '''
+        self.freq_score = (sum([positional[i].get(ch, 0) for i, ch in enumerate(self.str)]) +
+                           sum([overall.get(ch, 0) for ch in set(self.str)])) / total_points
+
+    def shift_possible_points(self, word_='', points=0):
+        '''
+        Updating the histogram for a single word added to (positive points) or
+        removed from (negative points) the available words, in O(1)
+        Parameters:
+            word_: string, the added or removed word
+            points: numerical value, its points (negative if removed)
+        Return:
+            None, working inplace and updating self.list_of_all_possible_points,
+            self.plogp and self.histogram_total
+        '''
+        if self.plogp is None:
+            self.plogp = sum([pts * log2(pts) for pts in self.list_of_all_possible_points if pts])
+
+        pattern = comparen(self.str, word_)
+        old = self.list_of_all_possible_points[pattern]
+        new = old + points
+        if new <= abs(points) * 1e-9:   # what remains of a removal is rounding errors
+            new = 0
+        self.list_of_all_possible_points[pattern] = new
+        self.plogp += (new * log2(new) if new else 0) - (old * log2(old) if old else 0)
+        self.histogram_total += points
+
+    def calc_shifted_info(self, total_points):
+        '''
+        Calculating expected information from self.plogp, which is the same as
+        calc_info but in O(1) (info = log2(S) - plogp / S)
+        Parameters:
+            total_points: numerical value, summation of all points of all words
+                (which is the summation of the histogram)
+        Return:
+            None, working inplace and updating self.info
+        '''
+        self.info = log2(total_points) - self.plogp / total_points
+        self.info_err = 0
+
+    def set_histogram(self, histogram=[], total=None):
+        '''
+        Replacing the histogram (list_of_all_possible_points), an empty one
+        releases it so it's computed in full when needed
+        Parameters:
+            histogram: list of numerical values, the new histogram or empty
+            total: numerical value or None, its summation if known (it's summed
+                otherwise)
+        Return:
+            None, working inplace and updating self.list_of_all_possible_points,
+            self.plogp and self.histogram_total
+        '''
+        self.list_of_all_possible_points = histogram
+        self.plogp = None
+        if not histogram:
+            self.histogram_total = None
+        else:
+            self.histogram_total = total if total is not None else sum(histogram)
 
     def copy(self):
         '''
@@ -121,6 +316,10 @@ class Word():
         copied_word = Word(str=self.str, points=self.points)
         copied_word.info = self.info
         copied_word.prob = self.prob
+        copied_word.info_err = self.info_err
+        copied_word.freq_score = self.freq_score
+        copied_word.plogp = self.plogp
+        copied_word.histogram_total = self.histogram_total
         copied_word.list_of_all_possible_points = self.list_of_all_possible_points.copy()
         return copied_word
 
@@ -134,9 +333,68 @@ class Language():
         total_points: numerical value, summation of the points of all words in language
         all_words: dictionary, keys = string words, values = word objects
         alphabet: list of character constants, contains all valid characters
+        approx_threshold: int or None, number of available words above which
+            update_everything estimates info from a sample instead of computing
+            it exactly, None to always compute it exactly (the default, the
+            pure Python sampling is slower than the exact NumPy scoring unless
+            the words are many tens of thousands)
+        sample_size: int, number of words drawn for the estimation
+        n_refine: int, maximum number of top contenders whose info is
+            recomputed exactly after the estimation
+        memory_budget: int or None, bytes the language may use, if keeping the
+            histograms of all words would exceed it then update_everything
+            computes them on the fly instead, None for no budget
+        sampler: AliasTable object or None, built on demand to draw words
+            according to their points, None whenever the words are changed
+        index: dictionary, keys = string words, values = int, a stable index
+            given to every word once added (removing the word keeps it)
+        vocabulary_id: tuple of (int or None, bytes or None), the size of the
+            index and its artifact_id when last computed
+        cache: StateCache object or None, consulted by update_everything before
+            computing anything, None for no caching
+        partial: boolean, True if the last update_everything ran out of its time
+            budget, so only some words are scored (the others have info 0)
+        refiner: tuple of (Thread, Event) or None, the background refinement
+            of a partial ranking and its stop flag
+        planner: Planner object or None, chooses the backend of the exact
+            scoring in update_everything, None for the shared default planner
+        trie: Trie object or None, the vocabulary (all the words ever added)
+            for validation and completion, None whenever a new word is added
+        shortlist_size: int or None, if there are more available words than it
+            then update_everything computes info exactly only for this number of
+            words with the best freq_score (the other words get info 0), None
+            to score all the words
+        tile_size: int or None, if given the patterns are taken from a tiled
+            pattern matrix (see tiles.py) by update_everything and
+            massive_remove, None to compare the words directly
+        tile_memory: int, the most bytes of hot tiles kept in RAM
+        patterns_file: string or None, path of a compressed pattern matrix of
+            the indexed words (see compressed.py), if given the patterns are
+            taken from it (as from tiles) instead
+        tiles: PatternTiles or CompressedPatterns object or None, built on
+            demand by get_tiles over the index, None whenever a new word is added
+        packed: PackedWords object or None, the bit-packed words of the index
+            (see packed.py) the Python compares are made with, built on demand
+            by get_packed, None whenever a new word is added
+        dedup_threshold: int or None, if there are no more available words
+            than it then update_everything scores one word per class of
+            equivalent words (see update_deduplicated_info), None to never do
+        equivalents: dictionary, keys = string words (the scored ones), values
+            = lists of string words equivalent to them, found by the last
+            update_deduplicated_info (only for display)
+        hard_mode: boolean, if True only the available words are guessed (and
+            scored), otherwise any word of the vocabulary (all the words ever
+            added) is, even if it can't be the answer it may split the
+            available words better
+        guesses: dictionary, keys = string words, values = Word objects, the
+            fixed guess vocabulary of the easy mode with their info over the
+            available words, sorted as all_words (built by get_guesses)
     '''
 
-    def __init__(self, alphabet=[], length=5, from_csv=''):
+    def __init__(self, alphabet=[], length=5, from_csv='', approx_threshold=None,
+                 sample_size=1000, n_refine=20, memory_budget=None, cache=None,
+                 shortlist_size=None, planner=None, tile_size=None, tile_memory=2**28,
+                 dedup_threshold=None, hard_mode=True, patterns_file=None, progress_bar=True):
         '''
         Constructor of the Language object
         Parameters:
@@ -144,21 +402,74 @@ class Language():
             from_csv: string, empty or path of csv file
                 if empty then the language is initially empty,
                 if such file exists then it will be uploaded
+            approx_threshold: int or None, see the class docstring
+            sample_size: int, see the class docstring
+            n_refine: int, see the class docstring
+            memory_budget: int or None, see the class docstring
+            cache: StateCache object or None, see the class docstring
+            shortlist_size: int or None, see the class docstring
+            planner: Planner object or None, see the class docstring
+            tile_size: int or None, see the class docstring
+            tile_memory: int, see the class docstring
+            dedup_threshold: int or None, see the class docstring
+            hard_mode: boolean, see the class docstring
+            patterns_file: string or None, see the class docstring
+            progress_bar: boolean, if the progress bar of loading from_csv is
+                activated
         '''
         self.total_points = 0  # initially
         self.all_words = {}  # initially
         self.length = Word.length = length   #permenantly
         self.alphabet = alphabet.copy()  # permenantly
+        self.approx_threshold = approx_threshold  # permenantly
+        self.sample_size = sample_size  # permenantly
+        self.n_refine = n_refine  # permenantly
+        self.memory_budget = memory_budget  # permenantly
+        self.sampler = None  # initially
+        self.index = {}  # initially
+        self.vocabulary_id = (None, None)  # initially
+        self.cache = cache  # permenantly
+        self.shortlist_size = shortlist_size  # permenantly
+        self.planner = planner  # permenantly
+        self.tile_size = tile_size  # permenantly
+        self.tile_memory = tile_memory  # permenantly
+        self.patterns_file = patterns_file  # permenantly
+        self.tiles = None  # initially
+        self.packed = None  # initially
+        self.dedup_threshold = dedup_threshold  # permenantly
+        self.equivalents = {}  # initially
+        self.hard_mode = hard_mode  # permenantly
+        self.guesses = {}  # initially
+        self.trie = None  # initially
+        self.partial = False  # initially
+        self.refiner = None  # initially
 
         if from_csv:
-            df = pd.read_csv(from_csv)
-            for _, row in tqdm(df.iterrows()):
-                word = Word(str(row.Word), row.Points)
-                self.add_word(word)
-                word.info = row.Info
+            self.load_csv(from_csv, progress_bar=progress_bar)
 
     # Methods to add/remove words to/from language
 
+    def load_csv(self, file_name='language.csv', progress_bar=True, cancelled=None):
+        '''
+        Adding the words of a csv file (as to_csv saves them) with their info
+        Parameters:
+            file_name: string, path of the csv file
+            progress_bar: boolean, if the progress bar is activated
+            cancelled: threading.Event or None, if it's set the loading stops
+                (the language is left partly loaded)
+        Return:
+            boolean, True if all the words are loaded
+        '''
+        df = pd.read_csv(file_name, dtype={'Word': str})
+        for _, row in track(df.iterrows(), total=len(df), enabled=progress_bar):
+            if cancelled is not None and cancelled.is_set():
+                return False
+            word = Word(str(row.Word), row.Points)
+            self.add_word(word)
+            word.info = row.Info
+        self.get_trie()
+        return True
+
     def add_word(self, word):
         '''
         Adding word to the language (the word itself, not a copy)
@@ -169,6 +480,12 @@ class Language():
         '''
         self.all_words[word.str] = word
         self.total_points += word.points
+        self.sampler = None
+        if word.str not in self.index:
+            self.index[word.str] = len(self.index)
+            self.trie = None
+            self.tiles = None
+            self.packed = None
 
     def remove_word(self, word):
         '''
@@ -180,6 +497,217 @@ class Language():
         '''
         self.total_points -= word.points
         del self.all_words[word.str]
+        self.sampler = None
+
+    def add_words(self, words=[], incremental=True, progress_bar=False):
+        '''
+        Adding many words to the language and updating the info of all words
+        If incremental, the histograms of the words already in the language are
+        shifted by the added words only, so it's O(change * N) instead of the
+        O(N^2) of update_everything. The words having no histogram yet (never
+        updated, updated from a sample or on the fly) are computed in full.
+        Parameters:
+            words: list of Word objects, to be added
+            incremental: boolean, if False update_everything is called instead
+            progress_bar: boolean, if the progress bar is activated
+        Return:
+            None, working inplace and updating self.all_words and its elements
+        '''
+        self.stop_refining()
+        old_words = list(self.all_words.values())
+        for word in words:
+            self.add_word(word)
+        if not incremental:
+            self.update_everything()
+            return
+        self.update_incrementally(old_words, [(word.str, word.points) for word in words],
+                                  words, progress_bar=progress_bar)
+
+    def remove_words(self, words_=[], incremental=True, progress_bar=False):
+        '''
+        Removing many words from the language and updating the info of the rest
+        (see add_words)
+        Parameters:
+            words_: list of strings, the words to be removed
+            incremental: boolean, if False update_everything is called instead
+            progress_bar: boolean, if the progress bar is activated
+        Return:
+            None, working inplace and updating self.all_words and its elements
+        '''
+        self.stop_refining()
+        shifts = []
+        for word_ in words_:
+            word = self.all_words[word_]
+            shifts.append((word_, -word.points))
+            self.remove_word(word)
+        if not incremental:
+            self.update_everything()
+            return
+        self.update_incrementally(list(self.all_words.values()), shifts, [],
+                                  progress_bar=progress_bar)
+
+    def update_incrementally(self, words=[], shifts=[], new_words=[], progress_bar=False):
+        '''
+        Shifting the histograms of some words and computing new words in full,
+        then updating prob and sorting (used by add_words and remove_words)
+        A histogram is shifted only if it was computed over the words before the
+        shifts (its total is the total points before them), any other (released,
+        or left from another state) is computed in full.
+        Parameters:
+            words: list of Word objects, the words to be shifted
+            shifts: list of (string, numerical value) tuples, the added words
+                with their points and the removed words with minus their points
+            new_words: list of Word objects, the words to be computed in full
+        Return:
+            None, working inplace and updating self.all_words and its elements
+        '''
+        self.update_prob()
+        new_words = list(new_words)
+        old_total = self.total_points - sum([points for _, points in shifts])
+        tolerance = 1e-9 * max(abs(old_total), 1)
+        iterative_object = track(words, enabled=progress_bar)
+        for word in iterative_object:
+            if (not word.list_of_all_possible_points or word.histogram_total is None
+                    or abs(word.histogram_total - old_total) > tolerance):
+                new_words.append(word)
+                continue
+            for word_, points in shifts:
+                word.shift_possible_points(word_, points)
+            word.calc_shifted_info(self.total_points)
+
+        for word in new_words:
+            word.calc_possible_points(self.all_words, packed=self.get_packed())
+            word.calc_info()
+        self.sort()
+
+    # Methods to draw words according to their points
+
+    def get_sampler(self):
+        '''
+        Getting the alias table of the language, building it if the words were
+        changed since it was last built
+        Parameters:
+            None
+        Return:
+            AliasTable object, its items are the words as strings
+        '''
+        if self.sampler is None:
+            self.sampler = AliasTable(items=self.all_words,
+                                      weights=[word.points for word in self.all_words.values()])
+        return self.sampler
+
+    def choose_words(self, k=1, seed=None):
+        '''
+        Choosing words randomly according to their points (with replacement)
+        Parameters:
+            k: int, number of words
+            seed: any hashable or None, the same seed gives the same words
+        Return:
+            list of strings, k chosen words
+        '''
+        return self.get_sampler().sample(k=k, seed=seed)
+
+    # Methods to validate and complete words
+
+    def get_trie(self):
+        '''
+        Getting the trie of the vocabulary, building it if new words were added
+        since it was last built
+        Parameters:
+            None
+        Return:
+            Trie object
+        '''
+        if self.trie is None:
+            self.trie = Trie(words_=self.index, alphabet=self.alphabet)
+        return self.trie
+
+    def is_tiled(self):
+        '''
+        Checking if the patterns are taken from a pattern matrix (tiled or
+        compressed) instead of comparing the words directly
+        Parameters:
+            None
+        Return:
+            boolean
+        '''
+        return self.tile_size is not None or self.patterns_file is not None
+
+    def get_tiles(self):
+        '''
+        Getting the pattern matrix of the indexed words, creating it if new
+        words were indexed since it was created (by this language or by
+        another one sharing the index), it's loaded from patterns_file if given
+        Parameters:
+            None
+        Return:
+            PatternTiles or CompressedPatterns object
+        '''
+        if self.tiles is None or self.tiles.n != len(self.index):
+            if self.patterns_file is not None:
+                tiles = CompressedPatterns.load(self.patterns_file)
+                if tiles.words_ != list(self.index):
+                    raise ValueError(f'{self.patterns_file} is not the matrix of these words')
+                self.tiles = tiles
+            else:
+                self.tiles = PatternTiles(index=self.index, tile_size=self.tile_size or 1024,
+                                          max_bytes=self.tile_memory)
+        return self.tiles
+
+    def get_packed(self):
+        '''
+        Getting the bit-packed words of the index, creating them if new words
+        were indexed since they were created (by this language or by another
+        one sharing the index)
+        Parameters:
+            None
+        Return:
+            PackedWords object
+        '''
+        if self.packed is None or self.packed.n_words != len(self.index):
+            self.packed = PackedWords.of_words(self.index, length=self.length)
+        return self.packed
+
+    # Functions of the guesses (easy mode)
+
+    def get_guesses(self):
+        '''
+        Getting the words which may be guessed, the available words in hard
+        mode, the whole vocabulary otherwise (created if new words were added)
+        Parameters:
+            None
+        Return:
+            dictionary, keys = string words, values = Word objects
+        '''
+        if self.hard_mode:
+            return self.all_words
+        if len(self.guesses) != len(self.index):
+            self.guesses = {word_: Word(str=word_, points=0) for word_ in self.index}
+        return self.guesses
+
+    def best_guesses(self, k=1):
+        '''
+        Getting the best words to guess (after update_everything)
+        Parameters:
+            k: int, number of words
+        Return:
+            list of strings
+        '''
+        return list(islice(self.get_guesses(), k))
+
+    def completions(self, prefix='', k=10, available=True):
+        '''
+        Completing a prefix into words of the language
+        Parameters:
+            prefix: string, in any letter case
+            k: int, the most words to be found
+            available: boolean, if True only the still available words are
+                found, otherwise any word of the vocabulary
+        Return:
+            list of strings, the found words in alphabetical order
+        '''
+        among = self.all_words if available else None
+        return self.get_trie().complete(prefix=prefix.lower(), k=k, among=among)
 
     # Methods to apply on all the words of the language
     # All of them start with 'update_'
@@ -193,23 +721,24 @@ class Language():
         Return:
             None, working inplace and updating every word in self.all_words
         '''
-        iterative_object = tqdm(
-            self.all_words) if progress_bar else self.all_words
+        iterative_object = track(self.all_words, enabled=progress_bar)
         for word_ in iterative_object:
             self.all_words[word_].calc_prob(self.total_points)
 
     def update_possible_points(self, progress_bar=False):
         '''
-        Updating possible points of every word in the language
+        Updating possible points of every word in the language (from the tiled
+        pattern matrix if the language is tiled)
         Parameters:
             None
         Return:
             None, working inplace and updating every word in self.all_words
         '''
-        iterative_object = tqdm(
-            self.all_words) if progress_bar else self.all_words
+        tiles = self.get_tiles() if self.is_tiled() else None
+        packed = self.get_packed() if tiles is None else None
+        iterative_object = track(self.all_words, enabled=progress_bar)
         for word_ in iterative_object:
-            self.all_words[word_].calc_possible_points(self.all_words)
+            self.all_words[word_].calc_possible_points(self.all_words, tiles=tiles, packed=packed)
 
     def update_info(self, progress_bar=False):
         '''
@@ -219,77 +748,812 @@ class Language():
         Return:
             None, working inplace and updating every word in self.all_words
         '''
-        iterative_object = tqdm(self.all_words) if progress_bar else self.all_words
+        iterative_object = track(self.all_words, enabled=progress_bar)
         for word_ in iterative_object:
             self.all_words[word_].calc_info()
 
+    def update_sampled_info(self, progress_bar=False):
+        '''
+        Estimating expected information of every word in the language from a
+        weighted sample of the available words, then computing it exactly for
+        the top contenders only
+        A word is a contender if the upper bound of its info is not less than
+        the lower bound of the n_refine-th best estimated word, contenders are
+        refined in the order of their upper bounds and n_refine at most.
+        Parameters:
+            None
+        Return:
+            None, working inplace and updating every word in self.all_words
+        '''
+        sample = self.choose_words(k=self.sample_size)
+
+        iterative_object = track(self.all_words, enabled=progress_bar)
+        for word_ in iterative_object:
+            self.all_words[word_].calc_sampled_info(sample)
+
+        by_estimate = sorted(self.all_words.values(), key=lambda word: word.info, reverse=True)
+        kth_best = by_estimate[min(self.n_refine, len(by_estimate)) - 1]
+        lower_bound = kth_best.info - kth_best.info_err
+
+        by_upper_bound = sorted(by_estimate, key=lambda word: word.info + word.info_err, reverse=True)
+        for word in by_upper_bound[:self.n_refine]:
+            if word.info + word.info_err < lower_bound:
+                break
+            word.calc_possible_points(self.all_words, packed=self.get_packed())
+            word.calc_info()
+
+    def update_streamed_info(self, progress_bar=False):
+        '''
+        Updating expected information of every word in the language without
+        keeping the histograms, every word's list_of_all_possible_points is
+        computed, used and released before moving to the next word
+        Parameters:
+            None
+        Return:
+            None, working inplace and updating every word in self.all_words
+        '''
+        iterative_object = track(self.all_words, enabled=progress_bar)
+        for word_ in iterative_object:
+            word = self.all_words[word_]
+            word.calc_possible_points(self.all_words, packed=self.get_packed())
+            word.calc_info()
+            word.set_histogram([])
+
+    def update_freq_scores(self, progress_bar=False):
+        '''
+        Updating the heuristic score of every word in the language, it's
+        O(N * length) instead of the O(N^2) of the expected information
+        Parameters:
+            None
+        Return:
+            None, working inplace and updating every word in self.all_words
+        '''
+        positional = [{} for _ in range(self.length)]
+        overall = {}
+        for word_, word in self.all_words.items():
+            for i, ch in enumerate(word_):
+                positional[i][ch] = positional[i].get(ch, 0) + word.points
+            for ch in set(word_):
+                overall[ch] = overall.get(ch, 0) + word.points
+
+        iterative_object = track(self.all_words, enabled=progress_bar)
+        for word_ in iterative_object:
+            self.all_words[word_].calc_freq_score(positional, overall, self.total_points)
+
+    def update_shortlisted_info(self, progress_bar=False):
+        '''
+        Updating expected information of the shortlist_size words with the best
+        heuristic score only, the other words get info 0
+        Parameters:
+            None
+        Return:
+            None, working inplace and updating every word in self.all_words
+        '''
+        self.update_freq_scores()
+        for word in self.all_words.values():
+            word.info = word.info_err = 0
+            word.set_histogram([])
+
+        iterative_object = track(self.shortlist(self.shortlist_size), enabled=progress_bar)
+        for word in iterative_object:
+            word.calc_possible_points(self.all_words, packed=self.get_packed())
+            word.calc_info()
+
+    def update_budgeted_info(self, time_budget=1.0, progress_bar=False):
+        '''
+        Updating expected information of the words in the order of their
+        heuristic score until the time budget expires, the words not scored in
+        time get info 0 and self.partial is set
+        Parameters:
+            time_budget: float, seconds (at least one word is scored anyway)
+        Return:
+            list of Word objects, the words not scored in time (in priority order)
+        '''
+        deadline = perf_counter() + time_budget
+        self.update_freq_scores()
+        order = sorted(self.all_words.values(), key=lambda word: word.freq_score, reverse=True)
+
+        n_scored = 0
+        iterative_object = track(order, enabled=progress_bar)
+        for word in iterative_object:
+            if n_scored and perf_counter() > deadline:
+                break
+            word.calc_possible_points(self.all_words, packed=self.get_packed())
+            word.calc_info()
+            n_scored += 1
+
+        remaining = order[n_scored:]
+        for word in remaining:
+            word.info = word.info_err = 0
+            word.set_histogram([])
+        self.partial = bool(remaining)
+        return remaining
+
+    def update_planned_info(self, sampling=False, progress_bar=False):
+        '''
+        Updating possible points and expected information of every word in the
+        language by the backend the planner chooses for the number of words
+        Parameters:
+            sampling: boolean, if the info may be estimated from a sample (by
+                update_sampled_info) when the planner finds it faster
+        Return:
+            None, working inplace and updating every word in self.all_words
+        '''
+        planner = self.planner or default_planner()
+        plan = planner.plan(n_words=len(self.all_words), length=self.length,
+                            sample_size=self.sample_size if sampling else None,
+                            n_refine=self.n_refine)
+        start = perf_counter()
+        if plan['backend'] == 'sampled':
+            self.update_sampled_info(progress_bar=progress_bar)
+        elif plan['backend'] == 'python':
+            self.update_possible_points(progress_bar=progress_bar)
+            self.update_info(progress_bar=progress_bar)
+        else:
+            processes = plan['processes'] if plan['backend'] == 'pool' else None
+            self.update_vectorized_info(block_size=plan['block_size'], processes=processes,
+                                        progress_bar=progress_bar)
+        planner.record(plan, perf_counter() - start)
+
+    def update_vectorized_info(self, block_size=64, processes=None, progress_bar=False):
+        '''
+        Updating possible points and expected information of every word in the
+        language by blocks of NumPy computations
+        Parameters:
+            block_size: int, number of words computed at once
+            processes: int or None, if given the blocks are computed by a pool
+                of processes and the histograms are not kept (only the info)
+        Return:
+            None, working inplace and updating every word in self.all_words
+        '''
+        words = list(self.all_words.values())
+        codes, _ = pt.encode([word.str for word in words])
+        points = np.array([word.points for word in words], dtype=np.float64)
+
+        if processes:
+            infos = pt.info_parallel(codes, codes, points, processes=processes,
+                                     block_size=block_size)
+            for word, info in zip(words, infos.tolist()):
+                word.set_histogram([])
+                word.info = info
+                word.info_err = 0
+            return
+
+        total = points.sum()
+        starts = range(0, len(words), block_size)
+        for start in track(starts, enabled=progress_bar):
+            infos, histograms = pt.info_block(codes[start:start+block_size], codes, points,
+                                              histograms=True)
+            for word, info, histogram in zip(words[start:start+block_size], infos.tolist(),
+                                             histograms):
+                word.set_histogram(histogram.tolist(), total=total)
+                word.info = info
+                word.info_err = 0
+
+    def update_tiled_info(self, progress_bar=False):
+        '''
+        Updating expected information of every word in the language from the
+        tiled pattern matrix, tile by tile, the histograms are not kept
+        Parameters:
+            None
+        Return:
+            None, working inplace and updating every word in self.all_words
+        '''
+        tiles = self.get_tiles()
+        words = sorted(self.all_words.values(), key=lambda word: self.index[word.str])
+        ids = np.array([self.index[word.str] for word in words], dtype=np.int64)
+        points = np.array([word.points for word in words], dtype=np.float64)
+
+        with Progress(total=len(words), enabled=progress_bar) as progress:
+            infos = tiles.info(ids, points, progress=progress.tally())
+        for word, info in zip(words, infos.tolist()):
+            word.set_histogram([])
+            word.info = info
+            word.info_err = 0
+
+    def update_deduplicated_info(self, block_size=256, progress_bar=False):
+        '''
+        Updating expected information of every word in the language, scoring
+        only one word per class of equivalent words, two words are equivalent
+        if they split the available words into the same groups (so they have
+        the same info, for example commutative nerdle expressions), the classes
+        are found by hashing the words' pattern rows relabeled canonically
+        (see patterns.partition_key), the histograms are not kept
+        Parameters:
+            block_size: int, number of words whose pattern rows are computed at once
+        Return:
+            None, working inplace and updating every word in self.all_words and
+                self.equivalents
+        '''
+        words = list(self.all_words.values())
+        codes, _ = pt.encode([word.str for word in words])
+        points = np.array([word.points for word in words], dtype=np.float64)
+
+        classes = {}  # keys = digests of pattern rows, values = lists of words
+        rows = []  # pattern rows of the representatives (first word of every class)
+        for start in track(range(0, len(words), block_size), enabled=progress_bar):
+            block = pt.pattern_block(codes[start:start+block_size], codes)
+            for word, row in zip(words[start:start+block_size], block):
+                key = blake2b(pt.partition_key(row), digest_size=16).digest()
+                if key not in classes:
+                    classes[key] = []
+                    rows.append(row)
+                classes[key].append(word)
+
+        infos = pt.patterns_info(np.array(rows), points, length=self.length) if rows else []
+        self.equivalents = {}
+        for members, info in zip(classes.values(), list(infos)):
+            for word in members:
+                word.set_histogram([])
+                word.info = info
+                word.info_err = 0
+            if len(members) > 1:
+                self.equivalents[members[0].str] = [word.str for word in members[1:]]
+
+    def update_guess_info(self, progress_bar=False):
+        '''
+        Updating expected information of every word of the guess vocabulary
+        over the available words, in one rectangular pass (G guesses x N
+        available words) by the backend the planner chooses, the histograms
+        are not kept, and the available words get the info of their guesses
+        Parameters:
+            None
+        Return:
+            None, working inplace and updating every word in self.guesses and
+                self.all_words
+        '''
+        guesses = list(self.get_guesses().values())
+        answers = list(self.all_words.values())
+        planner = self.planner or default_planner()
+        plan = planner.plan(n_words=len(answers), length=self.length, n_guesses=len(guesses))
+        start = perf_counter()
+
+        if plan['backend'] == 'python':
+            for guess in track(guesses, enabled=progress_bar):
+                guess.calc_possible_points(self.all_words, packed=self.get_packed())
+                guess.calc_info()
+                guess.set_histogram([])
+        else:
+            guess_codes, symbols = pt.encode([guess.str for guess in guesses])
+            answer_codes, _ = pt.encode([word.str for word in answers], symbols=symbols)
+            points = np.array([word.points for word in answers], dtype=np.float64)
+            if plan['backend'] == 'pool':
+                infos = pt.info_parallel(guess_codes, answer_codes, points,
+                                         processes=plan['processes'],
+                                         block_size=plan['block_size'])
+            else:
+                block_size = plan['block_size']
+                infos = np.concatenate([np.zeros(0)] + [
+                    pt.info_block(guess_codes[first:first+block_size], answer_codes, points)
+                    for first in track(range(0, len(guesses), block_size),
+                                       enabled=progress_bar)])
+            for guess, info in zip(guesses, infos.tolist()):
+                guess.set_histogram([])
+                guess.info = info
+        planner.record(plan, perf_counter() - start)
+
+        for guess in guesses:
+            word = self.all_words.get(guess.str)
+            guess.info_err = 0
+            guess.prob = word.prob if word is not None else 0
+            if word is not None:
+                word.info = guess.info
+                word.info_err = 0
+
     # Functions to apply on the language globally
 
     def sort(self):
         '''
         Sorting all the words of the language by their expected information
+        (and the guesses too in easy mode, an available word comes first among
+        the guesses of the same info as it may be the answer)
         Parameters:
             None
         Return:
-            None, working inplace and updating self.all_words
+            None, working inplace and updating self.all_words (and self.guesses)
         '''
         self.all_words = {word_: word for word_, word in sorted(self.all_words.items(),
                                                                 key=lambda x: (
                                                                     x[1].info, x[1].prob),
                                                                 reverse=True)}
+        if not self.hard_mode:
+            self.guesses = {word_: word for word_, word in sorted(self.guesses.items(),
+                                                                  key=lambda x: (
+                                                                      x[1].info, x[1].prob),
+                                                                  reverse=True)}
 
     def massive_remove(self, word_='', pattern=0):
         '''
         Removing all words except those which meet the pattern with some specific word
+        The histograms of the words left are released (they were computed over
+        the removed words too), so the next update computes them in full.
         Parameters:
             word_: string, the specific word
             pattern: int, a pattern of colors mapped to a decimal value
         Return:
             None, working inplace and updating self.all_words
         '''
+        self.stop_refining()
         iterative_copy = self.all_words.copy()
-        for some_word_ in iterative_copy:
-            word = iterative_copy[some_word_]
-            if comparen(word_, word.str) != pattern:
-                self.remove_word(word)
+        if self.is_tiled() and word_ in self.index:
+            patterns = self.get_tiles().row(word_, iterative_copy).tolist()
+            for word, some_pattern in zip(list(iterative_copy.values()), patterns):
+                if some_pattern != pattern:
+                    self.remove_word(word)
+        elif word_ in self.index:
+            packed = self.get_packed()
+            patterns = packed.row(packed.pack(word_), [packed.pack(some_word_)
+                                                       for some_word_ in iterative_copy])
+            for word, some_pattern in zip(list(iterative_copy.values()), patterns):
+                if some_pattern != pattern:
+                    self.remove_word(word)
+        else:
+            for some_word_ in iterative_copy:
+                word = iterative_copy[some_word_]
+                if comparen(word_, word.str) != pattern:
+                    self.remove_word(word)
+        for word in self.all_words.values():
+            word.set_histogram([])
+
+    def shortlist(self, k=100):
+        '''
+        Getting the words with the best heuristic score (update_freq_scores has
+        to be called before)
+        Parameters:
+            k: int, number of words
+        Return:
+            list of Word objects, sorted by freq_score (the best first)
+        '''
+        return nlargest(k, self.all_words.values(), key=lambda word: word.freq_score)
 
-    def update_everything(self, prob_bar=False, pts_bar=False, info_bar=False):
+    def sub_language(self, words_=[]):
+        '''
+        Creating a new language of some words of this language, it has the same
+        parameters and fresh words (only their str and points are copied), so
+        updating it doesn't affect this language, but it shares the index and
+        the cache of this language
+        Parameters:
+            words_: iterable of strings, words of this language to be kept
+        Return:
+            Language object, not updated
+        '''
+        language = Language(alphabet=self.alphabet, length=self.length,
+                            approx_threshold=self.approx_threshold,
+                            sample_size=self.sample_size, n_refine=self.n_refine,
+                            memory_budget=self.memory_budget, cache=self.cache,
+                            shortlist_size=self.shortlist_size, planner=self.planner,
+                            tile_size=self.tile_size, tile_memory=self.tile_memory,
+                            dedup_threshold=self.dedup_threshold, hard_mode=self.hard_mode,
+                            patterns_file=self.patterns_file)
+        language.index = self.index
+        for word_ in words_:
+            language.add_word(Word(str=word_, points=self.all_words[word_].points))
+        language.tiles = self.tiles
+        language.packed = self.packed
+        return language
+
+    def update_everything(self, prob_bar=False, pts_bar=False, info_bar=False,
+                          time_budget=None, background=False, on_refined=None):
         '''
         Calling all 'update_' functions
+        If keeping all the histograms would exceed memory_budget then the info
+        is computed by update_streamed_info, otherwise it's computed by the
+        backend the planner chooses, which may estimate it by
+        update_sampled_info if there are more than approx_threshold available
+        words and it's faster. Before all, if there are
+        more than shortlist_size available words then only the shortlist is
+        scored by update_shortlisted_info. If the language is tiled (tile_size
+        or patterns_file) the exact info is computed by update_tiled_info
+        instead, and if there are no more than dedup_threshold available words
+        it's computed by update_deduplicated_info.
+        In easy mode (hard_mode is False) the whole guess vocabulary is scored
+        exactly by update_guess_info instead, and the cache is not consulted.
+        If there is a cache and it has the state of the available words then
+        nothing is computed but restored instead.
+        If there is a time budget, the words are scored exactly in priority order
+        by update_budgeted_info, and the ranking found when it expires is kept
+        (self.partial tells if it's exact or partial).
         Parameters:
             prob_bar: boolean, if update_prob progress bar is activated
             pts_bar: boolean, if update_possible_points progress bar is activated
             info_bar: boolean, if update_info progress bar is activated
+            time_budget: float or None, seconds, None for no time limit
+            background: boolean, if a partial ranking is refined in the background
+            on_refined: function or None, called with the language once the
+                background refinement is done
         Return:
             None, working inplace and updating self.all_words and its elements
         '''
+        self.stop_refining()
+        self.partial = False
+        self.equivalents = {}
         self.update_prob(progress_bar=prob_bar)
-        self.update_possible_points(progress_bar=pts_bar)
-        self.update_info(progress_bar=info_bar)
+        if not self.hard_mode:
+            self.update_guess_info(progress_bar=pts_bar)
+            self.sort()
+            return
+        if self.cache is not None:
+            key = self.candidates_key()
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.restore_state(entry)
+                return
+
+        if time_budget is not None:
+            remaining = self.update_budgeted_info(time_budget=time_budget, progress_bar=pts_bar)
+            self.sort()
+            if remaining and background:
+                self.refine_in_background(remaining, on_refined=on_refined)
+            elif not remaining and self.cache is not None:
+                self.cache_state(key)
+            return
+
+        if self.shortlist_size is not None and len(self.all_words) > self.shortlist_size:
+            self.update_shortlisted_info(progress_bar=pts_bar)
+        elif self.dedup_threshold is not None and len(self.all_words) <= self.dedup_threshold:
+            self.update_deduplicated_info(progress_bar=pts_bar)
+        elif self.is_tiled():
+            self.update_tiled_info(progress_bar=pts_bar)
+        elif self.over_budget(self.histograms_bytes()):
+            warn(f'keeping the histograms of {len(self.all_words)} words exceeds the memory '
+                 f'budget of {self.memory_budget} bytes, computing them on the fly instead')
+            self.update_streamed_info(progress_bar=pts_bar)
+        else:
+            sampling = self.approx_threshold is not None and\
+                len(self.all_words) > self.approx_threshold
+            self.update_planned_info(sampling=sampling, progress_bar=pts_bar)
         self.sort()
 
+        if self.cache is not None:
+            self.cache_state(key)
+
     def print(self, k=10):
         '''
         Not actually printing anythin, but returning logs summary including the
-        best k words to guess
+        best k words to guess, a word equivalent to a better one (see
+        update_deduplicated_info) is shown with it instead of on its own, in
+        easy mode the best guesses are shown (marked by * if not available)
         Parameters:
             k: int, number of words which will be printed
         Return:
             string, a brief summary of the game situation
         '''
         output = f'there are {len(self.all_words)} available words.\n'
+        if self.partial:
+            output += 'partial ranking, not all the words were scored in time.\n'
+        if not self.hard_mode:
+            output += 'easy mode, words marked by * can\'t be the answer.\n'
         output += "{:<4} {:<10} {:<20} {:30}".format(
             '#', 'word', 'info', 'prob')
         output += "\n"
-        for i, word_ in enumerate(self.all_words):
+        hidden = {word_ for equivalents in self.equivalents.values() for word_ in equivalents}
+        i = 0
+        guesses = self.get_guesses()
+        for word_ in guesses:
             if i == k:
                 return output
-            word = self.all_words[word_]
+            if word_ in hidden:
+                continue
+            word = guesses[word_]
+            info = round(word.info,4) if not word.info_err\
+                else f'{round(word.info,4)} ±{round(word.info_err,4)}'
             output += "{:<4} {:<10} {:<20} {:<30}".format(
-                i+1, word.str, round(word.info,4), round(word.prob,4))
+                i+1, word.str + ('' if word_ in self.all_words else '*'), info, round(word.prob,4))
             output += "\n"
+            equivalents = self.equivalents.get(word_, [])
+            if equivalents:
+                output += f"     equivalent to {', '.join(equivalents[:5])}"
+                output += f" and {len(equivalents) - 5} more\n" if len(equivalents) > 5 else "\n"
+            i += 1
         return output
 
+    # Ranking many sets of available words at once
+
+    def rank_batch(self, masks=[], k=10, block_size=256):
+        '''
+        Ranking the guesses of many sets of available words (of many games) in
+        one pass, the sets are bitsets of indices as candidates_bitset, every
+        block of guesses is compared once against the union of the sets and
+        the histograms of all the sets are summed at once, the sets found in
+        the cache aren't computed (hard mode only)
+        Every word of the sets has to be available in this language (the
+        language of the begining of the games), it's not changed.
+        Parameters:
+            masks: list of bytes, the bitsets of the sets
+            k: int, number of ranked words per set
+            block_size: int, number of guesses compared at once
+        Return:
+            list of lists of (word, info) tuples, the best k guesses of every
+                set (sorted as sort function)
+        '''
+        vocabulary = list(self.index)
+        n_words = len(vocabulary)
+        points = np.zeros(n_words)
+        for word_, word in self.all_words.items():
+            points[self.index[word_]] = word.points
+
+        sets, keys = [], []
+        for mask in masks:
+            bits = np.unpackbits(np.frombuffer(mask, dtype=np.uint8), bitorder='little')[:n_words]
+            sets.append(np.flatnonzero(bits))
+            keys.append(self.candidates_key(bytes(np.packbits(bits, bitorder='little')),
+                                            exact=True))
+
+        rankings = [None] * len(sets)
+        todo, first_of = [], {}
+        for m, (ids, key) in enumerate(zip(sets, keys)):
+            # The same set given many times (games at the same state) is ranked once
+            if key in first_of:
+                continue
+            first_of[key] = m
+            entry = self.cache.get(key) if self.cache is not None and self.hard_mode else None
+            if entry is None:
+                todo.append(m)
+                continue
+            infos = dict(zip(ids.tolist(), entry['infos']))
+            rankings[m] = [(word_, infos[self.index[word_]]) for word_ in entry['ranking'][:k]]
+        if todo:
+            self._rank_sets(sets, keys, todo, rankings, points, k, block_size)
+        return [rankings[first_of[key]] for key in keys]
+
+    def _rank_sets(self, sets, keys, todo, rankings, points, k, block_size):
+        '''
+        Ranking the sets (of indices) of rank_batch not found in the cache,
+        rankings are filled in place
+        '''
+        vocabulary = list(self.index)
+        n_words = len(vocabulary)
+
+        # Comparing every guess with the union of the sets, the guesses are the
+        # union itself in hard mode and the whole vocabulary otherwise, in hard
+        # mode the sets are ranked apart if they overlap too little to gain
+        codes, _ = pt.encode(vocabulary)
+        union = np.unique(np.concatenate([sets[m] for m in todo]))
+        groups = [todo]
+        if self.hard_mode and len(union)**2 > sum([len(sets[m])**2 for m in todo]):
+            groups = [[m] for m in todo]
+        infos = {}
+        for group in groups:
+            union = np.unique(np.concatenate([sets[m] for m in group]))
+            guesses = union if self.hard_mode else np.arange(n_words)
+            columns = {m: np.searchsorted(union, sets[m]) for m in group}
+            rows = {m: columns[m] if self.hard_mode else guesses for m in group}
+            infos.update({m: np.zeros(len(rows[m])) for m in group})
+
+            for start in range(0, len(guesses), block_size):
+                block = pt.pattern_block(codes[guesses[start:start+block_size]], codes[union])
+                parts, blocks, block_points = [], [], []
+                for m in group:
+                    first, last = np.searchsorted(rows[m], [start, start + block_size])
+                    if first == last:
+                        continue
+                    parts.append((m, first, last))
+                    blocks.append(block[np.ix_(rows[m][first:last] - start, columns[m])])
+                    block_points.append(points[sets[m]])
+                for (m, first, last), block_infos in zip(parts, pt.patterns_info_many(
+                        blocks, block_points, length=self.length)):
+                    infos[m][first:last] = block_infos
+
+        for m in todo:
+            ids = sets[m] if self.hard_mode else np.arange(n_words)
+            total = points[sets[m]].sum()
+            probs = np.zeros(n_words)
+            probs[sets[m]] = points[sets[m]] / total if total else 0
+            order = np.lexsort((-probs[ids], -infos[m]))
+            ranking = [(vocabulary[i], info) for i, info in zip(ids[order].tolist(),
+                                                                infos[m][order].tolist())]
+            rankings[m] = ranking[:k]
+            if self.cache is not None and self.hard_mode:
+                self.cache.put(keys[m], ranking=[word_ for word_, _ in ranking],
+                               infos=infos[m].tolist(), errs=[])
+
+    # Functions to refine a partial ranking in the background
+
+    def refine_in_background(self, words=[], on_refined=None):
+        '''
+        Scoring the words left by update_budgeted_info in a background thread,
+        then sorting, caching and calling on_refined
+        Parameters:
+            words: list of Word objects, the words to be scored
+            on_refined: function or None, called with the language when done
+        Return:
+            None
+        '''
+        self.stop_refining()
+        stop = Event()
+
+        def refine():
+            for word in words:
+                if stop.is_set():
+                    return
+                word.calc_possible_points(self.all_words, packed=self.get_packed())
+                word.calc_info()
+            self.partial = False
+            self.sort()
+            if self.cache is not None:
+                self.cache_state(self.candidates_key())
+            if on_refined is not None:
+                on_refined(self)
+
+        thread = Thread(target=refine, daemon=True)
+        self.refiner = (thread, stop)
+        thread.start()
+
+    def stop_refining(self):
+        '''
+        Stopping the background refinement (if any) and waiting for it, it has
+        to be called before the available words are changed
+        Parameters:
+            None
+        Return:
+            None
+        '''
+        if self.refiner is not None:
+            thread, stop = self.refiner
+            stop.set()
+            thread.join()
+            self.refiner = None
+
+    # Functions to cache the computed states
+
+    def candidates_bitset(self):
+        '''
+        Getting the bitset of the available words' indices (the bit i % 8 of
+        the byte i // 8 is set if the word of the index i is available)
+        Parameters:
+            None
+        Return:
+            bytes, of len(self.index) bits
+        '''
+        bitset = bytearray((len(self.index) + 7) // 8)
+        for word_ in self.all_words:
+            i = self.index[word_]
+            bitset[i >> 3] |= 1 << (i & 7)
+        return bytes(bitset)
+
+    def candidates_key(self, bitset=None, exact=False):
+        '''
+        Fingerprinting the available words, the same available words give the
+        same key whatever the order they were added or removed in, the key is
+        of the vocabulary (artifact_id) and the scoring too (scoring_id), so a
+        cache shared by many languages or scorings never mixes them up
+        Parameters:
+            bitset: bytes or None, a bitset as candidates_bitset (of the
+                available words if None)
+            exact: boolean, see scoring_id
+        Return:
+            bytes, a hash of the vocabulary, the scoring and the bitset
+        '''
+        bitset = self.candidates_bitset() if bitset is None else bitset
+        return blake2b(self.artifact_id() + self.scoring_id(exact) + bitset,
+                       digest_size=16).digest()
+
+    def artifact_id(self):
+        '''
+        Fingerprinting the vocabulary and its indices (the words ever added in
+        their order), so a bitset of available words or a word index saved
+        with one language is only read with the same one
+        Parameters:
+            None
+        Return:
+            bytes, a hash of the indexed words
+        '''
+        # The index only grows, so its size tells if the hash is still valid
+        n_words, vocabulary_id = self.vocabulary_id
+        if n_words != len(self.index):
+            vocabulary = '\n'.join(self.index).encode()
+            vocabulary_id = blake2b(vocabulary, digest_size=16,
+                                    person=str(self.length).encode()).digest()
+            self.vocabulary_id = (len(self.index), vocabulary_id)
+        return vocabulary_id
+
+    def scoring_id(self, exact=False):
+        '''
+        Fingerprinting the scoring configuration of update_everything, the
+        parameters which change the computed info (a shortlist or a sample
+        don't give the exact info of every word)
+        Parameters:
+            exact: boolean, if True the id of the exact scoring of every word
+                (as rank_batch), whatever the configuration of the language
+        Return:
+            bytes, a hash of the scoring configuration
+        '''
+        if exact:
+            config = (True, None, None, None)
+        else:
+            sampling = None if self.approx_threshold is None else\
+                (self.approx_threshold, self.sample_size, self.n_refine)
+            config = (self.hard_mode, self.shortlist_size, sampling, self.dedup_threshold)
+        return blake2b(repr(config).encode(), digest_size=16).digest()
+
+    def cache_state(self, key):
+        '''
+        Storing the computed state of the available words in the cache
+        Parameters:
+            key: bytes, the candidates key of the available words
+        Return:
+            None
+        '''
+        words = sorted(self.all_words.values(), key=lambda word: self.index[word.str])
+        errs = [word.info_err for word in words]
+        self.cache.put(key, ranking=list(self.all_words),
+                       infos=[word.info for word in words],
+                       errs=errs if any(errs) else [])
+
+    def restore_state(self, entry):
+        '''
+        Restoring the state of the available words from a cache entry, then
+        sorting them
+        Parameters:
+            entry: dictionary, as returned by StateCache.get
+        Return:
+            None, working inplace and updating every word in self.all_words
+        '''
+        words = sorted(self.all_words.values(), key=lambda word: self.index[word.str])
+        errs = entry['errs'] or [0] * len(words)
+        for word, info, info_err in zip(words, entry['infos'], errs):
+            word.info = info
+            word.info_err = info_err
+        self.sort()
+
+    # Functions to account for the memory of the language
+
+    def memory_report(self):
+        '''
+        Estimating the memory used by the language (in bytes)
+        Parameters:
+            None
+        Return:
+            dictionary, keys are 'word_strings', 'word_objects' (including
+                their scalar attributes), 'histograms', 'dictionary' (the
+                all_words dictionary itself), 'trie' (if built), 'tiles' (the
+                hot tiles in RAM, if created, the spilled ones are on disk) and
+                'total', values are bytes
+        '''
+        report = {'word_strings': 0, 'word_objects': 0, 'histograms': 0}
+        for word_, word in self.all_words.items():
+            report['word_strings'] += getsizeof(word_)
+            report['word_objects'] += getsizeof(word) + getsizeof(word.__dict__) +\
+                sum([getsizeof(value) for value in (word.points, word.prob, word.info, word.info_err, word.freq_score)])
+            histogram = word.list_of_all_possible_points
+            n_nonzero = len(histogram) - histogram.count(0)
+            report['histograms'] += getsizeof(histogram) + n_nonzero * getsizeof(word.points)
+
+        report['dictionary'] = getsizeof(self.all_words)
+        if self.trie is not None:
+            report['trie'] = self.trie.nbytes()
+        if self.tiles is not None:
+            report['tiles'] = self.tiles.nbytes()
+        report['total'] = sum(report.values())
+        return report
+
+    def histograms_bytes(self):
+        '''
+        Estimating the memory the histograms of all words would need if they
+        were all kept (the upper bound)
+        Parameters:
+            None
+        Return:
+            int, bytes
+        '''
+        n_words = len(self.all_words)
+        n_patterns = 3**self.length
+        points_size = getsizeof(next(iter(self.all_words.values())).points) if n_words else 0
+        return n_words * (getsizeof([0] * n_patterns) + min(n_words, n_patterns) * points_size)
+
+    def over_budget(self, extra_bytes=0):
+        '''
+        Checking if the language would exceed its memory budget
+        Parameters:
+            extra_bytes: int, bytes to be allocated in addition to the current ones
+        Return:
+            boolean, True if there is a budget and it would be exceeded
+        '''
+        if self.memory_budget is None:
+            return False
+        report = self.memory_report()
+        return report['total'] - report['histograms'] + extra_bytes > self.memory_budget
+
     # Saving language as csv file
 
     def to_csv(self, file_name='language.csv'):
@@ -304,7 +1568,7 @@ class Language():
         '''
         dict = {'Word': [], 'Points': [], 'Info': []}
 
-        for word_ in tqdm(self.all_words):
+        for word_ in track(self.all_words):
             word = self.all_words[word_]
             dict['Word'].append(word.str)
             dict['Points'].append(word.points)
@@ -312,3 +1576,48 @@ class Language():
 
         df = pd.DataFrame(dict)
         df.to_csv(file_name, index=False)
+
+    # Saving/loading the histograms (for incremental updates)
+
+    def save_histograms(self, file_name='language_histograms.npz'):
+        '''
+        Saving the histograms of the words (only their nonzero entries), so a
+        language loaded later from csv can be updated incrementally
+        Parameters:
+            file_name: string, destination file path (.npz)
+        Return:
+            None
+        '''
+        words_, offsets, patterns, points = [], [0], [], []
+        for word_, word in self.all_words.items():
+            histogram = word.list_of_all_possible_points
+            nonzero = [i for i, pts in enumerate(histogram) if pts]
+            words_.append(word_)
+            patterns.extend(nonzero)
+            points.extend([histogram[i] for i in nonzero])
+            offsets.append(len(patterns))
+
+        np.savez_compressed(file_name, words=np.array(words_), offsets=np.array(offsets, dtype=np.int64),
+                            patterns=np.array(patterns, dtype=np.uint32),
+                            points=np.array(points, dtype=np.float64))
+
+    def load_histograms(self, file_name='language_histograms.npz'):
+        '''
+        Loading the histograms saved by save_histograms into the words which
+        are in the language
+        Parameters:
+            file_name: string, source file path (.npz)
+        Return:
+            None, working inplace and updating every word in self.all_words
+        '''
+        data = np.load(file_name)
+        offsets, patterns, points = data['offsets'], data['patterns'], data['points']
+        for i, word_ in enumerate(data['words']):
+            word = self.all_words.get(str(word_))
+            if word is None:
+                continue
+            histogram = [0] * (3**self.length)
+            for pattern, pts in zip(patterns[offsets[i]:offsets[i+1]].tolist(),
+                                    points[offsets[i]:offsets[i+1]].tolist()):
+                histogram[pattern] = pts
+            word.set_histogram(histogram, total=float(points[offsets[i]:offsets[i+1]].sum()))
@@ -1,19 +1,32 @@
 '''
 This file contains the main procedure of the game
 
+In the lazy mode (nerdle only, see nerdle.lazy_language) the csv of the
+language isn't loaded: the language of the words consistent with the history
+is generated every turn, and while they are too many to be scored a
+heuristic guess is shown instead of the ranking.
+
 File contents:
     imports
     class Game:
         Constructor
         Methods:
             play
+            update_lazy
+            end_session
     Main Code
 '''
 
 
+import argparse
+import os
 import control as ctrl
+from cache import StateCache
+from game_core import gotit, LANGUAGES
 from language import Language
-from game_core import gotit
+from preload import Preloader, create_language, remember_language
+from session import save_session, read_session
+from strategies import Evaluator, get_strategy
 
 
 class Game():
@@ -24,43 +37,117 @@ class Game():
     Dynamic Variables:
         n_tryouts: int, number of available guesses
         language: Language object, the language of the game
+        session_file: string or None, path of the saved session of the game
+        history: list of (guess, pattern) tuples, the guesses so far and
+            their patterns as decimal values
+        the_word: string or None, the hidden word (if known)
+        lazy: module or None, the language module generating the language
+            every turn (lazy mode), None if the language is loaded
     '''
-    def __init__(self, language='engwordle'):
+    def __init__(self, language='engwordle', cache=None, hard_mode=True, session_file=None,
+                 preloader=None, lazy=False):
         '''
         Constructor of the Game object
         Parameters:
             language: string, the language of the game
+            cache: StateCache object or None, the cache of solver states to
+                consult every turn (a new one if None, pass the same one to
+                share states across games)
+            hard_mode: boolean, if False any word of the vocabulary may be
+                recommended, even if it can't be the answer (see Language)
+            session_file: string or None, if given the game is saved to it
+                after every guess, and resumed from it if it exists
+            preloader: Preloader object or None, if given the language is
+                taken from it (loaded in the background, with the cache and
+                hard_mode of the preloader), otherwise it's loaded now
+            lazy: boolean, if True the language is generated every turn
+                instead of loaded (the language module needs lazy_language),
+                a lazy game isn't saved to session_file
         '''
-        lang_params = ctrl.get_lang_params(language)
+        lang_params = ctrl.lang_params(language)
         self.n_tryouts = lang_params['n_tryouts']
-        self.language = Language(alphabet=lang_params['alphabet'],
-                                length=lang_params['length'],
-                                from_csv=language+'.csv')
-
-
-    def play(self, type='io', mode='with'):
+        self.lazy = None
+        if lazy:
+            self.lazy = __import__(language)
+            if not hasattr(self.lazy, 'lazy_language'):
+                raise ValueError(f'{language} has no lazy mode')
+            if session_file is not None:
+                raise ValueError('a lazy game can\'t be saved to a session file')
+            # Empty until the consistent words are few enough (see update_lazy)
+            self.language = Language(alphabet=lang_params['alphabet'],
+                                     length=lang_params['length'],
+                                     cache=cache if cache is not None else StateCache(),
+                                     hard_mode=hard_mode)
+        elif preloader is not None:
+            self.language = preloader.get(language)
+        else:
+            self.language = create_language(language, cache=cache, hard_mode=hard_mode)
+        remember_language(language)
+        self.session_file = session_file
+        self.history = []
+        self.the_word = None
+        if self.lazy is not None:
+            self.update_lazy()
+        if session_file is not None and os.path.exists(session_file):
+            self.language, self.history, self.the_word = read_session(session_file,
+                                                                      self.language)
+
+
+    def play(self, type='io', mode='with', time_budget=None, strategy=None):
         '''
         Playing main procedure
         Parameters:
             type: string ('io' or 'gui') the interface of game
             mode: string ('with', 'against' or 'multi') mode of the game
+            time_budget: float or None, seconds to compute the ranking every
+                turn, if it expires the best partial ranking is displayed and
+                then refined in the background, None for no time limit
+            strategy: string or None, name of a strategy (see strategies.py)
+                whose recommendations are displayed too, None for the
+                ranking of the language only
         Return:
             None
         '''
-        params = ctrl.get_params(type=type, mode=mode)
-        the_word = ctrl.get_theword(type=params['get_theword'],
-                                    language=self.language)
+        params = ctrl.mode_params(type=type, mode=mode)
+
+        def refined(language):
+            if params['print']:
+                ctrl.summary(type=params['disp_word'], message='refined:\n' + language.print())
+
+        # The strategy is created once there are words (in the lazy mode)
+        name, strategy = strategy, None
+
+        if self.the_word is None and not self.history:
+            if self.lazy is not None and params['get_theword'] == 'bg':
+                self.the_word = self.lazy.choose_expression()
+            else:
+                self.the_word = ctrl.get_theword(type=params['get_theword'],
+                                                 language=self.language)
+        the_word = self.the_word
 
         print("")
 
-        for i in range(self.n_tryouts):
-            if params['print']:
+        for i in range(len(self.history), self.n_tryouts):
+            generated = bool(self.language.all_words)
+            if name is not None and strategy is None and generated:
+                strategy = get_strategy(name, evaluator=Evaluator(index=self.language.index),
+                                        hard_mode=self.language.hard_mode)
+            if params['print'] and generated:
                 ctrl.summary(type=params['disp_word'], message=self.language.print())
-
+                if strategy is not None:
+                    ctrl.summary(type=params['disp_word'], message=f'{name} recommends: '
+                                 + ', '.join(strategy.choose(self.language, k=5)))
+            elif params['print']:
+                ctrl.summary(type=params['disp_word'],
+                             message='too many consistent words to rank, try '
+                             f'{self.lazy.heuristic_guess(self.history)}\n')
+
+            # Any word of the alphabet is guessed while there are no words
             word_ = ctrl.get_word(type=params['get_word'],
                                   alphabet=self.language.alphabet,
-                                  language_dict=self.language.all_words,
-                                  length=self.language.length)
+                                  language_dict=self.language.get_guesses() if generated else {},
+                                  length=self.language.length,
+                                  trie=self.language.get_trie() if generated else None)
 
             pattern = ctrl.get_pattern(type=params['get_pattern'],
                                        length=self.language.length,
@@ -71,23 +158,81 @@ class Game():
 
             if gotit(pattern=pattern, length=self.language.length):
                 ctrl.end_game(type=params['end_game'], winning_flag=True, score=i+1)
+                self.end_session()
                 return
 
             if i == self.n_tryouts - 1:
                 ctrl.end_game(type=params['end_game'], winning_flag=False, the_word=the_word)
+                self.end_session()
                 return
 
+            if not generated:
+                self.history.append((word_, int(pattern, 3)))
+                if self.update_lazy():
+                    continue
+                print('Something went wrong!')
+                exit()
+
             self.language.massive_remove(word_=word_, pattern=int(pattern,3))
-            self.language.update_everything()
+            self.language.update_everything(time_budget=time_budget, background=True,
+                                            on_refined=refined)
 
             if not len(self.language.all_words):
                 print('Something went wrong!')
                 exit()
 
+            self.history.append((word_, int(pattern, 3)))
+            if self.session_file is not None:
+                save_session(self.session_file, self.language, self.history,
+                             the_word=the_word if the_word in self.language.index else None)
+
+    def update_lazy(self):
+        '''
+        Generating the language of the words consistent with the history (lazy
+        mode), it's kept empty while they are too many to be scored
+        Parameters:
+            None
+        Return:
+            boolean, False if no word is consistent with the history, True
+                otherwise
+        '''
+        language = self.lazy.lazy_language(self.history, cache=self.language.cache,
+                                           hard_mode=self.language.hard_mode)
+        if language is not None:
+            self.language = language
+            return bool(language.all_words)
+        return self.lazy.heuristic_guess(self.history, n_words=1) is not None
+
+    def end_session(self):
+        '''
+        Removing the saved session of a finished game
+        Parameters:
+            None
+        Return:
+            None
+        '''
+        if self.session_file is not None and os.path.exists(self.session_file):
+            os.remove(self.session_file)
+
 
 # # # # # # MAIN # # # # # #
 '''
-A simple main code, creating a Game object then calling play function
+A simple main code, preloading the languages while the menus are shown,
+creating a Game object then calling play function
 '''
-game = Game(language=ctrl.get_language())
-game.play(type='io', mode=ctrl.get_mode())
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play a wordle like game.')
+    parser.add_argument('--lazy', action='store_true',
+                        help='generate the words of nerdle from the feedback instead of loading them')
+    args = parser.parse_args()
+
+    lazy = [language for language in LANGUAGES
+            if args.lazy and hasattr(__import__(language), 'lazy_language')]
+    preloader = Preloader(languages=[language for language in LANGUAGES if language not in lazy])
+    language, mode = ctrl.get_language(), ctrl.get_mode()
+    if language in lazy:
+        game = Game(language=language, lazy=True)
+    else:
+        game = Game(language=language, preloader=preloader)
+    preloader.stop()
+    game.play(type='io', mode=mode)
@@ -1,8 +1,10 @@
 from language import Language, Word
-from tqdm import tqdm, tqdm_gui
+from game_core import comparen
+from progress import Progress, track
 import multiprocessing as mp
+import multiprocessing.managers
+import random
 from copy import deepcopy
-from time import sleep
 
 digits = [chr(i) for i in range(ord('0'), ord('9')+1)]
 operators = ['+', '-', '*', '/']
@@ -10,19 +12,19 @@ alphabet = digits + operators + ['=']
 length = 8
 n_tryouts = 6
 zero = 1e-5
+max_words = 2000  # the most consistent expressions of the lazy mode scored exactly
 
-SHARED_SUM = mp.Value('i', 0)
-SHARED_DICT = mp.Manager().dict()
+# The shared memory of install, started by install only (not at import)
+SHARED_DICT = None
 mp.managers.BaseManager.register('Word', Word)
-manager = mp.managers.BaseManager()
-manager.start()
+manager = None
 
 
 def one_op():
     stored_expressions = []
     global operators, zero, length
 
-    for arg1 in tqdm(range(1000)):
+    for arg1 in track(range(1000)):
         for arg2 in range(1000):
             for op in operators:
 
@@ -58,7 +60,7 @@ def two_op():
     global operators, zero, length
     stored_expressions = []
 
-    for arg1 in tqdm(range(100)):
+    for arg1 in track(range(100)):
         for arg2 in range(100):
             for arg3 in range(100):
                 for op1 in operators:
@@ -93,29 +95,261 @@ def two_op():
     return stored_expressions
 
 
-def partiall_update(language, start, end):
-    global SHARED_SUM, SHARED_DICT
-    for i, word_ in enumerate(SHARED_DICT.keys()):
-        if i < start:
-            continue
-        if i == end:
+def evaluate(exp_to_eval):
+    '''
+    Evaluating the left hand side of an expression with the same checks used
+    by one_op and two_op
+    Parameters:
+        exp_to_eval: string, the left hand side of an expression
+    Return:
+        string, the result if it's a non-negative integer, None otherwise
+    '''
+    global zero
+
+    try:
+        res = eval(exp_to_eval)
+    except:
+        return None
+
+    if res < -zero:  # check if negative
+        return None
+
+    if (res + zero) % 1 > 2 * zero:  # check if not integer
+        return None
+
+    return str(int(res + zero))
+
+
+def colors(pattern=''):
+    '''
+    Getting the string of colors of a pattern
+    Parameters:
+        pattern: string of colors or int, its decimal value
+    Return:
+        string, the pattern as a string of colors
+    '''
+    global length
+
+    if isinstance(pattern, str):
+        return pattern
+    digits_ = []
+    for _ in range(length):
+        pattern, digit = divmod(pattern, 3)
+        digits_.append(str(digit))
+    return ''.join(reversed(digits_))
+
+
+def constraints(history=[]):
+    '''
+    Translating the feedback history into constraints on expressions
+    Parameters:
+        history: list of (guess, pattern) tuples, guess is a string and pattern
+            is a string of colors as returned by game_core.compare, or its
+            decimal value (as the history of a Game)
+    Return:
+        tuple of (allowed, min_count, max_count), allowed is a list of sets of
+            the characters allowed in every position, min_count and max_count
+            are dictionaries of the least and the most occurrences of characters
+    '''
+    global alphabet, length
+
+    allowed = [set(alphabet) for _ in range(length)]
+    min_count = {}
+    max_count = {}
+
+    for guess, pattern in history:
+        pattern = colors(pattern)
+        colored = {}
+        for i, (ch, pat) in enumerate(zip(guess, pattern)):
+            if pat == '2':
+                allowed[i] = allowed[i] & {ch}
+            else:
+                allowed[i].discard(ch)
+            if pat != '0':
+                colored[ch] = colored.get(ch, 0) + 1
+
+        for ch, pat in zip(guess, pattern):
+            n_colored = colored.get(ch, 0)
+            min_count[ch] = max(min_count.get(ch, 0), n_colored)
+            if pat == '0':
+                max_count[ch] = min(max_count.get(ch, length), n_colored)
+
+    return allowed, min_count, max_count
+
+
+def generate(history=[]):
+    '''
+    Generating lazily the expressions of one_op and two_op which are consistent
+    with the feedback history
+    The constraints are checked while the left hand side is being built, so the
+    inconsistent branches are never completed nor evaluated.
+    Parameters:
+        history: as history in constraints function
+    Return:
+        generator of strings, every consistent expression (once)
+    '''
+    global operators, length
+
+    allowed, min_count, max_count = constraints(history)
+    patterns = [(guess, int(colors(pattern), 3)) for guess, pattern in history]
+    counts = {}
+    expression = []
+
+    def push(ch):
+        '''
+        Appending ch to the expression if it doesn't violate the constraints
+        '''
+        if ch not in allowed[len(expression)] or counts.get(ch, 0) >= max_count.get(ch, length):
+            return False
+        counts[ch] = counts.get(ch, 0) + 1
+        expression.append(ch)
+        missing = sum([max(0, n - counts.get(ch_, 0)) for ch_, n in min_count.items()])
+        if missing > length - len(expression):
+            pop()
+            return False
+        return True
+
+    def pop():
+        counts[expression.pop()] -= 1
+
+    def close():
+        '''
+        Completing the expression with '=' and the result of its left hand side
+        '''
+        res = evaluate(''.join(expression))
+        if res is None or len(expression) + 1 + len(res) != length:
             return
+        exp_to_store = ''.join(expression) + '=' + res
+        if all([comparen(guess, exp_to_store) == pattern for guess, pattern in patterns]):
+            yield exp_to_store
+
+    def extend(n_ops, n_digits, longest):
+        '''
+        Extending the left hand side by one character in every valid way
+        n_ops: number of operators so far, n_digits: number of digits of the
+        current number (0 after an operator), longest: most digits of a number
+        '''
+        if n_ops and n_digits:
+            yield from close()
+
+        if len(expression) == length - 2:
+            return
+
+        # one_op numbers are up to 3 digits, two_op numbers are up to 2 digits
+        if n_digits != 1 or expression[-1] != '0':
+            if n_digits < (2 if n_ops == 2 else 3):
+                for ch in digits:
+                    if not push(ch):
+                        continue
+                    yield from extend(n_ops, n_digits + 1, max(longest, n_digits + 1))
+                    pop()
 
+        if n_digits and (n_ops == 0 or (n_ops == 1 and longest <= 2)):
+            for op in operators:
+                if push(op):
+                    yield from extend(n_ops + 1, 0, longest)
+                    pop()
+
+    yield from extend(0, 0, 0)
+
+
+def lazy_language(history=[], max_words=max_words, cache=None, hard_mode=True):
+    '''
+    Creating the language of the expressions which are consistent with the
+    feedback history, without any materialized list of expressions
+    Parameters:
+        history: as history in constraints function
+        max_words: int, the most expressions to be scored exactly
+        cache: StateCache object or None, see Language
+        hard_mode: boolean, see Language
+    Return:
+        Language object, updated and sorted, or None if there are still more
+            than max_words consistent expressions
+    '''
+    global alphabet, length
+
+    expressions = []
+    for expression in generate(history):
+        if len(expressions) == max_words:
+            return None
+        expressions.append(expression)
+
+    nerdle = Language(alphabet=alphabet, length=length, cache=cache, hard_mode=hard_mode)
+    for expression in expressions:
+        nerdle.add_word(Word(str=expression, points=1))
+    nerdle.update_everything()
+    return nerdle
+
+
+def heuristic_guess(history=[], n_words=200):
+    '''
+    Choosing a guess while there are too many consistent expressions to score
+    them (see lazy_language): the one of the most distinct characters among
+    the first consistent expressions
+    Parameters:
+        history: as history in constraints function
+        n_words: int, number of consistent expressions looked at
+    Return:
+        string, the guess, or None if no expression is consistent
+    '''
+    best = None
+    for i, expression in enumerate(generate(history)):
+        if i == n_words:
+            break
+        if best is None or len(set(expression)) > len(set(best)):
+            best = expression
+    return best
+
+
+def choose_expression(history=[], rng=random):
+    '''
+    Choosing a consistent expression uniformly (as all the expressions of
+    nerdle.csv have 1 point) without materializing them (reservoir sampling)
+    Parameters:
+        history: as history in constraints function
+        rng: random.Random object or the random module
+    Return:
+        string, the chosen expression, or None if no expression is consistent
+    '''
+    chosen = None
+    for i, expression in enumerate(generate(history)):
+        if rng.randrange(i + 1) == 0:
+            chosen = expression
+    return chosen
+
+
+def partiall_update(language, start, end, tally):
+    global SHARED_DICT
+    for word_ in SHARED_DICT.keys()[start:end]:
         copied_word = SHARED_DICT[word_].copy()
         copied_word.calc_possible_points(language.all_words)
         SHARED_DICT[word_] = copied_word
-        with SHARED_SUM.get_lock():
-            SHARED_SUM.value += 1
-
-
-def observe(N):
-    global SHARED_SUM
-    for i in tqdm(range(N)):
-        while SHARED_SUM.value <= i:
-            pass
-
-
-def install():
+        tally.add()
+    tally.flush()
+
+
+def create():
+    '''
+    Creating all the valid expressions (of one_op and two_op)
+    Parameters:
+        None
+    Return:
+        list of strings
+    '''
+    return one_op() + two_op()
+
+
+def install(words=None, file_name='nerdle.csv'):
+    '''
+    Installing function
+    To be called only once, then the language will be saved in a csv file
+    Parameters:
+        words: list of (string, points) tuples or None, the expressions, all
+            the expressions of create (1 point each) if None
+        file_name: string, path of the csv file
+    Return:
+        None
+    '''
 
     # Length
     Word.change_length(8)
@@ -124,16 +358,18 @@ def install():
     global alphabet
 
     # Creating valid expressions
-    print("Preparing expressions.")
-    expressions = one_op() + two_op()
+    if words is None:
+        print("Preparing expressions.")
+        words = [(expression, 1) for expression in create()]
+    expressions = [expression for expression, _ in words]
 
     # Creating an empty Language object
     nerdle = Language(alphabet=alphabet, length=8)
 
     # Adding all words
     print(f'Adding {len(expressions)} words to our language...')
-    for expression in tqdm(expressions):
-        word = Word(str=expression, points=1)
+    for expression, points in track(words):
+        word = Word(str=expression, points=points)
         nerdle.add_word(word)
 
     # HERE WE WILL NOT CALL update_everything AS USUAL
@@ -146,38 +382,44 @@ def install():
 
     # Copying words to a shared memory
     n_per_job = (len(expressions) // 4) + 1
-    global SHARED_DICT
+    global SHARED_DICT, manager
+    dict_manager = mp.Manager()
+    SHARED_DICT = dict_manager.dict()
+    manager = mp.managers.BaseManager()
+    manager.start()
     print("Copying words to a shared memory...")
-    for word_ in tqdm(nerdle.all_words):
+    for word_ in track(nerdle.all_words):
         word = nerdle.all_words[word_]
         SHARED_DICT[word_] = manager.Word(str=word.str, points=word.points)
 
-    # Creating 4 processes, in addition to an observer process
-    p1 = mp.Process(target=partiall_update, args=(nerdle, 0, n_per_job,))
-    p2 = mp.Process(target=partiall_update, args=(nerdle, n_per_job, 2*n_per_job,))
-    p3 = mp.Process(target=partiall_update, args=(nerdle, 2*n_per_job, 3*n_per_job,))
-    p4 = mp.Process(target=partiall_update, args=(nerdle, 3*n_per_job, len(expressions),))
-    observer = mp.Process(target=observe, args=(len(expressions),))
+    # Creating 4 processes, every one reports its progress in batches to a
+    # reporter thread of this process (which sleeps between its refreshes)
+    progress = Progress(total=len(expressions), desc='Scoring')
+    p1 = mp.Process(target=partiall_update, args=(nerdle, 0, n_per_job, progress.tally(),))
+    p2 = mp.Process(target=partiall_update, args=(nerdle, n_per_job, 2*n_per_job, progress.tally(),))
+    p3 = mp.Process(target=partiall_update, args=(nerdle, 2*n_per_job, 3*n_per_job, progress.tally(),))
+    p4 = mp.Process(target=partiall_update, args=(nerdle, 3*n_per_job, len(expressions), progress.tally(),))
 
     # Starting
     print("Let's start the multiprocessing party!!")
-    p1.start()
-    p2.start()
-    p3.start()
-    p4.start()
-    observer.start()
-
-    # Waiting
-    p1.join()
-    p2.join()
-    p3.join()
-    p4.join()
-    observer.join()
+    with progress:
+        p1.start()
+        p2.start()
+        p3.start()
+        p4.start()
+
+        # Waiting
+        p1.join()
+        p2.join()
+        p3.join()
+        p4.join()
 
     # Now it's time to copy back to our unshared memory
     print("Copying back to our memory scope...")
-    for word_ in tqdm(SHARED_DICT.keys()):
+    for word_ in track(SHARED_DICT.keys()):
         nerdle.all_words[word_] = SHARED_DICT[word_].copy()
+    manager.shutdown()
+    dict_manager.shutdown()
 
     # Back to our ordinary algorithm, let's update_info and sort
     nerdle.update_info(progress_bar=True)
@@ -185,4 +427,4 @@ def install():
 
     # Saving language
     print("Saving...")
-    nerdle.to_csv(file_name='nerdle.csv')
+    nerdle.to_csv(file_name=file_name)
@@ -0,0 +1,452 @@
+'''
+This file contains the exact optimal strategy search, unlike the greedy policy
+of Language.sort (guessing the word of the most expected information) it finds
+the decision tree of the least expected number of guesses (weighted by the
+words' points), or of the least worst case number of guesses.
+
+The search is a depth first search over (guess, partition of the available
+words by the guess's patterns) with branch and bound:
+    the lower bound of a set of n words is the cost of the best imaginable
+        tree, a guess solves one word and splits the others into at most
+        3^length - 1 groups, so at most (3^length - 1)^(d-1) words are solved
+        by the d-th guess, the heaviest words taking the earliest guesses
+    a guess is skipped if the bound of its partition can't beat the best
+        guess found so far, and every group is solved with the budget left by
+        the other groups' bounds, so a hopeless guess is left early
+    every solved set of words (and every proven bound of an unsolved one) is
+        memoized, as the same sets are reached by many guesses
+    the first guesses are searched by a pool of processes sharing the best cost
+        found so far
+
+A decision tree is a dictionary, keys are 'guess' (string) and 'children'
+(dictionary, keys = patterns as decimal values, values = decision trees), the
+solved pattern has no child.
+
+Usage:
+    python optimal.py --language primel --size 500 --processes 4
+
+File contents:
+    imports
+    class Solver:
+        Constructor
+        Methods:
+            lower_bound
+            partition
+            solve
+            solve_first
+            solve_parallel
+    Functions:
+        evaluate
+        greedy_tree
+        next_guess
+    Main Code
+'''
+
+import argparse
+import multiprocessing as mp
+from math import inf
+from time import perf_counter
+
+import numpy as np
+
+import patterns as pt
+
+
+class Solver():
+    '''
+    Class of solver
+    Static Variables:
+        None
+    Dynamic Variables:
+        answers: list of strings, the available words
+        guesses: list of strings, the words which may be guessed, the answers
+            themselves in hard mode
+        hard_mode: boolean, if only the available words are guessed
+        weights: array, the answers' points
+        objective: string, 'expected' (the total of guesses over all answers,
+            weighted by their points) or 'worst' (the most guesses of an answer)
+        matrix: array of shape (number of guesses, number of answers), the
+            patterns of every guess against every answer
+        solved_pattern: int, the pattern of a guessed answer
+        n_branches: int, the most groups a guess splits the answers into
+        memo: dictionary, keys = bytes of sets of answers, values = tuples of
+            (cost, tree), tree is None if cost is only a lower bound
+        max_memo: int, the most memoized sets
+        shared_best: multiprocessing Value or None, best cost of solve_parallel
+        nodes: int, number of searched sets (for statistics)
+    '''
+
+    def __init__(self, answers=[], weights=None, guesses=None, objective='expected',
+                 max_memo=10**6):
+        '''
+        Constructor of the Solver object
+        Parameters:
+            answers: list of strings, see the class docstring
+            weights: list of numbers or None, see the class docstring (all 1 if None)
+            guesses: list of strings or None, see the class docstring (hard
+                mode if None)
+            objective: string, see the class docstring
+            max_memo: int, see the class docstring
+        '''
+        self.answers = list(answers)
+        self.hard_mode = guesses is None
+        self.guesses = self.answers if self.hard_mode else list(guesses)
+        self.weights = np.ones(len(self.answers)) if weights is None\
+            else np.asarray(weights, dtype=np.float64)
+        self.objective = objective
+
+        symbols = sorted({ch for word_ in self.answers + self.guesses for ch in word_})
+        answer_codes, _ = pt.encode(self.answers, symbols=symbols)
+        guess_codes, _ = pt.encode(self.guesses, symbols=symbols)
+        length = answer_codes.shape[1]
+        self.matrix = np.concatenate([np.zeros((0, len(self.answers)), dtype=pt.pattern_dtype(length))] + [
+            pt.pattern_block(guess_codes[start:start+256], answer_codes)
+            for start in range(0, len(self.guesses), 256)])
+        self.solved_pattern = 3**length - 1
+        self.n_branches = 3**length - 1
+        self.memo = {}
+        self.max_memo = max_memo
+        self.shared_best = None
+        self.nodes = 0
+
+    # Methods of Solver class
+
+    def lower_bound(self, answers):
+        '''
+        Getting a lower bound of the cost of a set of answers
+        Parameters:
+            answers: array of ints, indices of the answers
+        Return:
+            float, the bound
+        '''
+        if self.objective == 'worst':
+            depth, capacity, level = 0, 0, 1
+            while capacity < len(answers):
+                depth += 1
+                capacity += level
+                level *= self.n_branches
+            return depth
+
+        weights = np.sort(self.weights[answers])[::-1]
+        bound, start, depth, level = 0, 0, 1, 1
+        while start < len(weights):
+            bound += depth * weights[start:start+level].sum()
+            start += level
+            depth += 1
+            level *= self.n_branches
+        return bound
+
+    def partition(self, guess, answers):
+        '''
+        Splitting answers by their patterns with a guess
+        Parameters:
+            guess: int, index of the guess
+            answers: array of ints, sorted indices of the answers
+        Return:
+            list of (pattern, array of ints) tuples, the groups which are not
+                solved by the guess, the biggest first
+        '''
+        row = self.matrix[guess, answers]
+        order = np.argsort(row, kind='stable')
+        values, starts = np.unique(row[order], return_index=True)
+        groups = np.split(answers[order], starts[1:])
+        groups = [(int(value), np.sort(group)) for value, group in zip(values.tolist(), groups)
+                  if value != self.solved_pattern]
+        return sorted(groups, key=lambda group: len(group[1]), reverse=True)
+
+    def _candidates(self, answers):
+        '''
+        Getting the guesses worth trying for a set of answers with a lower
+        bound of the cost of every one, the bound of a guess is the bound of
+        its partition (every group needs a guess more, all its answers but one
+        need two), the guesses of the least bound and then of the most info first
+        '''
+        guesses = answers if self.hard_mode else np.arange(len(self.guesses))
+        n_patterns = self.solved_pattern + 1
+        keys = self.matrix[np.ix_(guesses, answers)].astype(np.int64)
+        keys += np.arange(len(guesses), dtype=np.int64)[:, None] * n_patterns
+        weights = np.broadcast_to(self.weights[answers], keys.shape).ravel()
+        groups, inverse = np.unique(keys.ravel(), return_inverse=True)
+        owners = groups // n_patterns  # the guess of every group
+        solved = groups % n_patterns == self.solved_pattern
+        group_weights = np.bincount(inverse, weights=weights)
+        group_sizes = np.bincount(inverse)
+        total = group_weights[owners == 0].sum()
+
+        if self.objective == 'worst':
+            sizes = np.where(solved, 0, group_sizes)
+            biggest = np.zeros(len(guesses), dtype=np.int64)
+            np.maximum.at(biggest, owners, sizes)
+            bounds = np.ones(len(guesses))
+            capacity, level = 0, 1
+            while (biggest > capacity).any():
+                bounds += biggest > capacity
+                capacity += level
+                level *= self.n_branches
+        else:
+            heaviest = np.zeros(len(groups))
+            np.maximum.at(heaviest, inverse, weights)
+            group_bounds = np.where(group_sizes == 1, group_weights, 2 * group_weights - heaviest)
+            group_bounds[solved] = 0
+            bounds = total + np.bincount(owners, weights=group_bounds, minlength=len(guesses))
+
+        p = group_weights / total
+        infos = -np.bincount(owners, weights=p * np.log2(p), minlength=len(guesses))
+        order = np.lexsort((-infos, bounds))
+        return guesses[order], bounds[order]
+
+    def _best(self):
+        return inf if self.shared_best is None else self.shared_best.value
+
+    def solve(self, answers, limit=inf):
+        '''
+        Finding the optimal decision tree of a set of answers, if its cost is
+        less than a limit
+        Parameters:
+            answers: array of ints, sorted indices of the answers
+            limit: float, the cost to beat
+        Return:
+            tuple of (cost, tree), tree is None if no tree costs less than the
+                limit (then cost is a lower bound, at least the limit)
+        '''
+        self.nodes += 1
+        key = answers.tobytes()
+        entry = self.memo.get(key)
+        if entry is not None and (entry[1] is not None or entry[0] >= limit):
+            return entry if entry[0] < limit else (entry[0], None)
+
+        bound = self.lower_bound(answers)
+        if entry is not None:
+            bound = max(bound, entry[0])
+        if bound >= limit:
+            return bound, None
+
+        total = self.weights[answers].sum()
+        worst = self.objective == 'worst'
+        if len(answers) == 1:
+            return self._memoize(key, 1 if worst else total,
+                                 {'guess': self.answers[answers[0]], 'children': {}})
+
+        guesses, guess_bounds = self._candidates(answers)
+        bound = max(bound, guess_bounds[0])
+        if bound >= limit:
+            self._memoize(key, bound, None)
+            return bound, None
+
+        best_cost, best_tree = limit, None
+        for guess, guess_bound in zip(guesses.tolist(), guess_bounds.tolist()):
+            if guess_bound >= best_cost:
+                break  # the next guesses are bounded even more
+            groups = self.partition(guess, answers)
+            if len(groups) == 1 and len(groups[0][1]) == len(answers):
+                continue  # the guess doesn't split the answers at all
+            bounds = [self.lower_bound(group) for _, group in groups]
+            cost = 1 if worst else total
+            if (max(bounds, default=0) + 1 if worst else cost + sum(bounds)) >= best_cost:
+                continue
+
+            children = {}
+            rest = sum(bounds)
+            for (pattern, group), group_bound in zip(groups, bounds):
+                rest -= group_bound
+                budget = best_cost - 1 if worst else best_cost - cost - rest
+                group_cost, tree = self.solve(group, budget)
+                if tree is None:
+                    break
+                children[pattern] = tree
+                cost = max(cost, group_cost + 1) if worst else cost + group_cost
+            else:
+                best_cost = cost
+                best_tree = {'guess': self.guesses[guess], 'children': children}
+                if best_cost <= bound:
+                    break  # nothing can be better than the bound
+
+        if best_tree is None:
+            self._memoize(key, max(bound, limit), None)
+            return max(bound, limit), None
+        return self._memoize(key, best_cost, best_tree)
+
+    def _memoize(self, key, cost, tree):
+        if len(self.memo) < self.max_memo:
+            self.memo[key] = (cost, tree)
+        return cost, tree
+
+    def solve_first(self, guess, limit=inf):
+        '''
+        Finding the optimal decision tree starting with a given guess
+        Parameters:
+            guess: int, index of the first guess
+            limit: float, the cost to beat
+        Return:
+            tuple of (cost, tree), as solve function
+        '''
+        answers = np.arange(len(self.answers))
+        worst = self.objective == 'worst'
+        cost = 1 if worst else self.weights.sum()
+        groups = self.partition(guess, answers)
+        bounds = [self.lower_bound(group) for _, group in groups]
+        rest = sum(bounds)
+        children = {}
+        for (pattern, group), group_bound in zip(groups, bounds):
+            rest -= group_bound
+            limit = min(limit, self._best())
+            budget = limit - 1 if worst else limit - cost - rest
+            group_cost, tree = self.solve(group, budget)
+            if tree is None:
+                return inf, None
+            children[pattern] = tree
+            cost = max(cost, group_cost + 1) if worst else cost + group_cost
+        if cost >= min(limit, self._best()):
+            return inf, None
+        return cost, {'guess': self.guesses[guess], 'children': children}
+
+    def solve_parallel(self, processes=None, n_first=None):
+        '''
+        Finding the optimal decision tree of all the answers, the first guesses
+        are shared by a pool of processes
+        Parameters:
+            processes: int or None, size of the pool (number of cores if None)
+            n_first: int or None, number of the most informative first guesses
+                to be tried, None for all of them (exact)
+        Return:
+            tuple of (cost, tree), cost is the total (expected objective) or
+                the most (worst objective) guesses
+        '''
+        first_guesses = self._candidates(np.arange(len(self.answers)))[0].tolist()
+        if n_first is not None:
+            first_guesses = first_guesses[:n_first]
+
+        _SOLVER['solver'] = self
+        self.shared_best = mp.get_context('fork').Value('d', inf)
+        try:
+            with mp.get_context('fork').Pool(processes) as pool:
+                results = pool.imap_unordered(_solve_first, first_guesses)
+                best_cost, best_tree = inf, None
+                for cost, tree in results:
+                    if tree is not None and cost < best_cost:
+                        best_cost, best_tree = cost, tree
+        finally:
+            _SOLVER.clear()
+            self.shared_best = None
+        return best_cost, best_tree
+
+
+# The solver of the running solve_parallel, set before the pool is forked
+_SOLVER = {}
+
+
+def _solve_first(guess):
+    '''
+    Solving with a first guess (in a process of the pool), sharing the best cost
+    '''
+    solver = _SOLVER['solver']
+    cost, tree = solver.solve_first(guess)
+    if tree is not None:
+        with solver.shared_best.get_lock():
+            if cost < solver.shared_best.value:
+                solver.shared_best.value = cost
+    return cost, tree
+
+
+def evaluate(tree, answers=[], weights=None):
+    '''
+    Playing a decision tree against every answer
+    Parameters:
+        tree: dictionary, a decision tree
+        answers: list of strings
+        weights: list of numbers or None, the answers' points (all 1 if None)
+    Return:
+        dictionary, keys are 'expected' (mean guesses weighted by the points),
+            'worst' (most guesses) and 'failed' (list of the answers the tree
+            can't solve)
+    '''
+    from game_core import comparen
+
+    weights = [1] * len(answers) if weights is None else list(weights)
+    total, worst, failed = 0, 0, []
+    for answer, weight in zip(answers, weights):
+        node, n_guesses = tree, 1
+        while node is not None and node['guess'] != answer:
+            node = node['children'].get(comparen(node['guess'], answer))
+            n_guesses += 1
+        if node is None:
+            failed.append(answer)
+            continue
+        total += weight * n_guesses
+        worst = max(worst, n_guesses)
+    return {'expected': total / sum(weights) if weights else 0, 'worst': worst, 'failed': failed}
+
+
+def greedy_tree(language):
+    '''
+    Building the decision tree of the greedy policy of a language (guessing the
+    best word of update_everything every turn), the info is always computed
+    exactly (whatever the approx_threshold of the language), so the tree is
+    the true greedy baseline
+    Parameters:
+        language: Language object, not updated (not changed)
+    Return:
+        dictionary, a decision tree
+    '''
+    from game_core import comparen
+
+    language = language.sub_language(language.all_words)
+    language.approx_threshold = None
+    language.update_everything()
+    guess = language.best_guesses()[0]
+    groups = {}
+    for word_ in language.all_words:
+        pattern = comparen(guess, word_)
+        if pattern != 3**language.length - 1:
+            groups.setdefault(pattern, []).append(word_)
+    return {'guess': guess,
+            'children': {pattern: greedy_tree(language.sub_language(words_))
+                         for pattern, words_ in groups.items()}}
+
+
+def next_guess(tree, history=[]):
+    '''
+    Following a decision tree along a game
+    Parameters:
+        tree: dictionary, a decision tree
+        history: list of patterns as decimal values, the patterns got so far
+            (by the guesses of the tree)
+    Return:
+        string, the next guess, or None if the tree has no such game
+    '''
+    node = tree
+    for pattern in history:
+        node = node['children'].get(pattern)
+        if node is None:
+            return None
+    return node['guess']
+
+
+# # # # # # MAIN # # # # # #
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Comparing the optimal and the greedy strategies.')
+    parser.add_argument('--language', default='primel')
+    parser.add_argument('--size', type=int, default=None, help='number of words kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--objective', default='expected', choices=['expected', 'worst'])
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--first', type=int, default=None,
+                        help='number of first guesses tried (all if omitted)')
+    args = parser.parse_args()
+
+    from simulate import load_language
+    language = load_language(args.language, size=args.size, seed=args.seed)
+    answers = list(language.all_words)
+    weights = [language.all_words[word_].points for word_ in answers]
+
+    start = perf_counter()
+    greedy = evaluate(greedy_tree(language), answers, weights)
+    print(f"greedy:  expected {greedy['expected']:.4f}, worst {greedy['worst']} "
+          f"({perf_counter() - start:.1f}s)")
+
+    start = perf_counter()
+    solver = Solver(answers, weights=weights, objective=args.objective)
+    cost, tree = solver.solve_parallel(processes=args.processes, n_first=args.first)
+    optimal = evaluate(tree, answers, weights)
+    print(f"optimal: expected {optimal['expected']:.4f}, worst {optimal['worst']} "
+          f"({perf_counter() - start:.1f}s)")
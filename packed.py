@@ -0,0 +1,334 @@
+'''
+This file contains the bit-packed words, every word packed in one integer (a
+field of bits per character) so two words are compared with a few integer
+operations instead of the list manipulation of game_core.compare.
+
+The codes are over the symbols occurring in the words (of_words), not the
+input alphabet of the language (engwordle's takes the upper case letters too,
+but its words are lower case). A character takes a field of bits + 1 bits,
+bits for its code (4 for the 10 digits of primel and the 15 symbols of
+nerdle, 5 for the 26 lower case english letters) and a guard bit (always 0),
+the first character in the most significant field, so a word of primel fits
+in 25 bits, of engwordle in 30 and of nerdle in 40. Then:
+    greens: the fields of word ^ the_word are zero at the greens, adding low
+        (the code mask in every field) carries into the guard bit of every
+        non zero field only, so the guard bits left clear are the greens (SWAR,
+        all the fields at once, exactly, the guard bit stops the carries), and
+        the pattern value of the greens is looked up by that mask.
+    yellows: every word has a count vector (the count of every symbol in a
+        field of an integer), the counts of the greens are subtracted and
+        every other character of the guess is yellow if the count of its
+        symbol is not zero (then it's decremented), from the first character,
+        as compare does with duplicate characters. Words sharing no symbol
+        skip it (a mask of their symbols).
+
+Language packs its words (Language.get_packed) for the Python compares of
+the whole language: the histograms of Word.calc_possible_points (the 'python'
+backend of the planner, the streamed, shortlisted, budgeted and incremental
+scorings) and massive_remove. Single compares stay game_core.comparen.
+
+The equivalence with game_core.comparen is checked by self_check (run this
+file), on crafted duplicate letter cases, all the pairs of a small alphabet
+and random pairs of the registered languages' alphabets (tests/test_packed.py
+checks it too):
+    python packed.py --pairs 20000
+
+File contents:
+    imports
+    class PackedWords:
+        Constructor
+        Methods:
+            of_words
+            pack
+            unpack
+            profile
+            compare
+            row
+    Functions:
+        word_symbols
+        self_check
+        speed
+    Main Code
+'''
+
+import argparse
+import itertools
+import random
+from time import perf_counter
+
+import control as ctrl
+from game_core import comparen, LANGUAGES
+
+# Duplicate characters in the guess, the answer or both
+DUPLICATE_CASES = [('speed', 'abide'), ('abide', 'speed'), ('eerie', 'three'), ('three', 'eerie'),
+                   ('llama', 'hello'), ('hello', 'llama'), ('aabbb', 'bbaaa'), ('aaaaa', 'abcde'),
+                   ('abcde', 'aaaaa'), ('sassy', 'asses'), ('geese', 'eeeeg'), ('11317', '13711'),
+                   ('12+35=47', '35+12=47'), ('10-5*2=0', '2*5-10=0'), ('1+1+1=03', '03=1+1+1')]
+
+
+class PackedWords():
+    '''
+    Class of packed words, the packing of the words of an alphabet
+    Static Variables:
+        None
+    Dynamic Variables:
+        symbols: list of characters, the characters by their codes
+        table: dictionary, keys = characters, values = their codes
+        length: int, length of the words
+        bits: int, bits of a code (a field is bits + 1 bits)
+        low: int, the code mask in every field
+        high: int, the guard bit of every field
+        count_bits: int, bits of a count in the count vectors
+        green_patterns: dictionary, keys = masks of the guard bits of the
+            greens, values = tuples of (pattern value of the greens, green
+            positions, other positions)
+        weights: list of ints, the pattern value of a yellow by its position
+        profiles: dictionary, keys = packed words, values = tuples of
+            (codes, count vector, symbol mask), see profile method
+        values: dictionary, keys = string words, values = packed words (the
+            words packed so far)
+        n_words: int, number of words it was created of (see of_words), 0 if
+            created of symbols
+    '''
+
+    def __init__(self, symbols=[], length=5):
+        '''
+        Constructor of the PackedWords object
+        Parameters:
+            symbols: list of characters, the alphabet of the words
+            length: int, length of the words
+        '''
+        self.symbols = list(symbols)
+        self.table = {ch: code for code, ch in enumerate(self.symbols)}
+        self.length = length
+        self.bits = max(1, (len(self.symbols) - 1).bit_length())
+        width = self.bits + 1
+        self.low = sum([((1 << self.bits) - 1) << (width * i) for i in range(length)])
+        self.high = sum([1 << (width * i + self.bits) for i in range(length)])
+        self.count_bits = length.bit_length()
+
+        self.weights = [3**(length - 1 - i) for i in range(length)]
+        self.green_patterns = {}
+        for greens in itertools.product([False, True], repeat=length):
+            mask = sum([1 << (width * (length - 1 - i) + self.bits)
+                        for i in range(length) if greens[i]])
+            self.green_patterns[mask] = (2 * sum([self.weights[i] for i in range(length) if greens[i]]),
+                                         tuple([i for i in range(length) if greens[i]]),
+                                         tuple([i for i in range(length) if not greens[i]]))
+        self.profiles = {}
+        self.values = {}
+        self.n_words = 0  # initially
+
+    # Methods of PackedWords class
+
+    @staticmethod
+    def of_words(words_=[], length=None):
+        '''
+        Creating the packing of some words, over the symbols occurring in them
+        Parameters:
+            words_: iterable of strings, words of the same length
+            length: int or None, length of the words (of the first word if None)
+        Return:
+            PackedWords object
+        '''
+        words_ = list(words_)
+        if length is None:
+            length = len(words_[0]) if words_ else 0
+        packed = PackedWords(sorted({ch for word_ in words_ for ch in word_}), length)
+        packed.n_words = len(words_)
+        return packed
+
+    def pack(self, word_=''):
+        '''
+        Packing a word (cached)
+        Parameters:
+            word_: string, a word of the symbols and the length
+        Return:
+            int, the packed word
+        '''
+        value = self.values.get(word_)
+        if value is None:
+            value = 0
+            for ch in word_:
+                value = (value << (self.bits + 1)) | self.table[ch]
+            self.values[word_] = value
+        return value
+
+    def unpack(self, value=0):
+        '''
+        Unpacking a word
+        Parameters:
+            value: int, a packed word
+        Return:
+            string, the word
+        '''
+        return ''.join([self.symbols[code] for code in self.profile(value)[0]])
+
+    def profile(self, value=0):
+        '''
+        Getting the profile of a packed word (cached)
+        Parameters:
+            value: int, a packed word
+        Return:
+            tuple of (codes, counts, mask), codes is a tuple of the codes of
+                the characters, counts is the count vector (the count of the
+                code c in the bits count_bits * c and on) and mask has the bit
+                c set for every code c of the word
+        '''
+        profile = self.profiles.get(value)
+        if profile is None:
+            width = self.bits + 1
+            codes = tuple([(value >> (width * (self.length - 1 - i))) & ((1 << self.bits) - 1)
+                           for i in range(self.length)])
+            counts = sum([1 << (self.count_bits * code) for code in codes])
+            mask = 0
+            for code in codes:
+                mask |= 1 << code
+            profile = self.profiles[value] = (codes, counts, mask)
+        return profile
+
+    def compare(self, word=0, the_word=0):
+        '''
+        Comparing two packed words, as game_core.comparen
+        Parameters:
+            word: int, the packed guess
+            the_word: int, the packed answer
+        Return:
+            int, the pattern as a decimal value
+        '''
+        pattern, greens, others = self.green_patterns[self.high & ~((word ^ the_word) + self.low)]
+        if not others:
+            return pattern
+        codes, _, mask = self.profile(word)
+        the_codes, counts, the_mask = self.profile(the_word)
+        if not mask & the_mask:
+            return pattern
+
+        count_bits = self.count_bits
+        for i in greens:
+            counts -= 1 << (count_bits * the_codes[i])
+        full = (1 << count_bits) - 1
+        weights = self.weights
+        for i in others:
+            shift = count_bits * codes[i]
+            if (counts >> shift) & full:
+                pattern += weights[i]
+                counts -= 1 << shift
+        return pattern
+
+    def row(self, word=0, words=[]):
+        '''
+        Comparing a packed guess with many packed words
+        Parameters:
+            word: int, the packed guess
+            words: list of ints, the packed answers
+        Return:
+            list of ints, the patterns as decimal values
+        '''
+        compare = self.compare
+        return [compare(word, the_word) for the_word in words]
+
+
+def word_symbols(alphabet=[]):
+    '''
+    Getting the symbols the words of an alphabet are made of (the words are
+    lower case, see Word)
+    Parameters:
+        alphabet: list of characters, the alphabet of a language
+    Return:
+        list of characters, sorted
+    '''
+    return sorted({ch.lower() for ch in alphabet})
+
+
+def self_check(n_pairs=20000, seed=0):
+    '''
+    Checking that PackedWords.compare is game_core.comparen, on the duplicate
+    cases, all the pairs of words of length 4 over 3 characters and random
+    pairs over the registered languages' alphabets
+    Parameters:
+        n_pairs: int, number of random pairs per language
+        seed: any hashable, seed of the random pairs
+    Return:
+        int, number of pairs checked (an AssertionError is raised on the first
+            difference)
+    '''
+    def check(packed, word_, the_word):
+        expected = comparen(word_, the_word)
+        got = packed.compare(packed.pack(word_), packed.pack(the_word))
+        assert got == expected, f'{word_} against {the_word}: {got} instead of {expected}'
+
+    n_checked = 0
+    for word_, the_word in DUPLICATE_CASES:
+        check(PackedWords(sorted(set(word_ + the_word)), len(word_)), word_, the_word)
+        n_checked += 1
+
+    packed = PackedWords('abc', 4)
+    words_ = [''.join(letters) for letters in itertools.product('abc', repeat=4)]
+    for word_, the_word in itertools.product(words_, repeat=2):
+        check(packed, word_, the_word)
+        assert packed.unpack(packed.pack(word_)) == word_
+        n_checked += 1
+
+    rng = random.Random(seed)
+    for language in LANGUAGES:
+        lang_params = ctrl.lang_params(language)
+        alphabet, length = word_symbols(lang_params['alphabet']), lang_params['length']
+        packed = PackedWords(alphabet, length)
+        for _ in range(n_pairs):
+            # a few symbols only, for many duplicates
+            symbols = rng.sample(alphabet, rng.randint(1, min(len(alphabet), length)))
+            check(packed, ''.join(rng.choices(symbols, k=length)),
+                  ''.join(rng.choices(symbols, k=length)))
+            check(packed, ''.join(rng.choices(alphabet, k=length)),
+                  ''.join(rng.choices(alphabet, k=length)))
+            n_checked += 2
+    return n_checked
+
+
+def speed(n_words=300, seed=0):
+    '''
+    Timing PackedWords.compare against game_core.comparen (all the pairs of
+    random words of every registered language)
+    Parameters:
+        n_words: int, number of random words per language
+        seed: any hashable, seed of the words
+    Return:
+        dictionary, keys = languages, values = tuples of (comparen, packed)
+            comparisons per second
+    '''
+    rng = random.Random(seed)
+    speeds = {}
+    for language in LANGUAGES:
+        lang_params = ctrl.lang_params(language)
+        alphabet, length = word_symbols(lang_params['alphabet']), lang_params['length']
+        words_ = [''.join(rng.choices(alphabet, k=length)) for _ in range(n_words)]
+        packed = PackedWords(alphabet, length)
+        values = [packed.pack(word_) for word_ in words_]
+        for value in values:
+            packed.profile(value)
+
+        start = perf_counter()
+        for word_ in words_:
+            [comparen(word_, the_word) for the_word in words_]
+        plain = perf_counter() - start
+        start = perf_counter()
+        for value in values:
+            packed.row(value, values)
+        fast = perf_counter() - start
+        speeds[language] = (n_words**2 / plain, n_words**2 / fast)
+    return speeds
+
+
+# Main Code
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check and time the packed compare against comparen')
+    parser.add_argument('--pairs', type=int, default=20000)
+    parser.add_argument('--words', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{self_check(args.pairs, args.seed):,} pairs checked, all equal to comparen')
+    for language, (plain, fast) in speed(args.words, args.seed).items():
+        print(f'{language:10} comparen {plain:,.0f}/s, packed {fast:,.0f}/s ({fast / plain:.1f}x)')
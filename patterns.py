@@ -0,0 +1,241 @@
+'''
+This file contains the vectorized (NumPy) computation of color patterns, it
+gives the same values as game_core.comparen but for whole blocks of guesses
+against whole blocks of answers at once.
+
+For a guess letter which is not green, let c be the number of the non-green
+positions of the answer having this letter and k the number of the earlier
+non-green positions of the guess having it, then the letter is yellow if and
+only if k < c (the earlier ones take the available letters first), which is
+exactly what compare does with its list manipulation.
+
+File contents:
+    imports
+    Functions:
+        encode
+        pattern_dtype
+        pattern_block
+        patterns_info
+        patterns_info_many
+        partition_key
+        info_block
+        info_parallel
+'''
+
+import multiprocessing as mp
+import numpy as np
+
+
+def encode(words_=[], symbols=None):
+    '''
+    Encoding words as a matrix of character codes
+    Parameters:
+        words_: list of strings, words of the same length
+        symbols: list of characters or None, the characters by their codes, if
+            None they're taken from the words
+    Return:
+        tuple of (codes, symbols), codes is a uint8 array of shape
+            (number of words, length), symbols is the list of characters
+    '''
+    if symbols is None:
+        symbols = sorted({ch for word_ in words_ for ch in word_})
+    table = {ch: code for code, ch in enumerate(symbols)}
+    length = len(words_[0]) if words_ else 0
+    codes = np.array([[table[ch] for ch in word_] for word_ in words_],
+                     dtype=np.uint8).reshape(len(words_), length)
+    return codes, symbols
+
+
+def pattern_dtype(length=5):
+    '''
+    Getting the smallest unsigned integer type holding all patterns
+    Parameters:
+        length: int, the length of the words
+    Return:
+        numpy dtype
+    '''
+    return np.uint8 if 3**length <= 2**8 else np.uint16 if 3**length <= 2**16 else np.uint32
+
+
+def pattern_block(guesses, answers):
+    '''
+    Computing the patterns of every guess against every answer
+    Parameters:
+        guesses: array of codes of shape (G, length), as returned by encode
+        answers: array of codes of shape (N, length), encoded with the same symbols
+    Return:
+        array of shape (G, N), patterns as decimal values (as comparen)
+    '''
+    n_guesses, length = guesses.shape
+    n_answers = answers.shape[0]
+    n_symbols = int(max(guesses.max(initial=0), answers.max(initial=0))) + 1
+
+    # counts[s, a]: occurrences of the symbol s in the answer a
+    counts = np.zeros((n_symbols, n_answers), dtype=np.int8)
+    for j in range(length):
+        np.add.at(counts, (answers[:, j], np.arange(n_answers)), 1)
+    green = [guesses[:, j:j+1] == answers[None, :, j] for j in range(length)]  # (G, N) each
+    same = guesses[:, :, None] == guesses[:, None, :]  # (G, length, length)
+
+    patterns = np.zeros((n_guesses, n_answers), dtype=pattern_dtype(length))
+    for i in range(length):
+        # c = all the answer's occurrences of the letter - the green ones
+        # k = the earlier non-green positions of the guess having the letter
+        # (both only need a correction for the guesses repeating the letter)
+        available = counts[guesses[:, i]]
+        taken = np.zeros((n_guesses, n_answers), dtype=np.int8)
+        for j in range(length):
+            rows = np.flatnonzero(same[:, i, j]) if j != i else []
+            if not len(rows):
+                continue
+            available[rows] -= green[j][rows]
+            if j < i:
+                taken[rows] += ~green[j][rows]
+        patterns *= 3
+        patterns += (taken < available) & ~green[i]
+        patterns += green[i].view(np.uint8) << 1
+    return patterns
+
+
+def patterns_info(patterns, points, length=5, histograms=False):
+    '''
+    Computing the expected information of every guess from its patterns
+    Parameters:
+        patterns: array of shape (G, N), as returned by pattern_block
+        points: array of shape (N,), the answers' points
+        length: int, the length of the words
+        histograms: boolean, if the histograms are returned too
+    Return:
+        as info_block function
+    '''
+    n_guesses, n_answers = patterns.shape
+    n_patterns = 3**length
+    patterns = patterns.astype(np.int64)
+    patterns += np.arange(n_guesses, dtype=np.int64)[:, None] * n_patterns
+    weights = np.broadcast_to(points, patterns.shape).ravel()
+
+    if not histograms and n_answers < n_patterns:
+        # Fewer answers than patterns, only the non-empty bins are summed
+        keys, inverse = np.unique(patterns.ravel(), return_inverse=True)
+        sums = np.bincount(inverse, weights=weights)
+        owners = keys // n_patterns  # the guess of every non-empty bin
+        total = np.bincount(owners, weights=sums, minlength=n_guesses)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p = sums / total[owners]
+            return -np.bincount(owners, weights=np.where(p > 0, p * np.log2(p), 0),
+                                minlength=n_guesses)
+
+    hist = np.bincount(patterns.ravel(), weights=weights,
+                       minlength=n_guesses * n_patterns).reshape(n_guesses, n_patterns)
+
+    total = hist.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = hist / total
+        infos = -np.where(p > 0, p * np.log2(p), 0).sum(axis=1)
+    return (infos, hist) if histograms else infos
+
+
+def patterns_info_many(patterns_list=[], points_list=[], length=5):
+    '''
+    Computing the expected information of the guesses of many blocks at once
+    (the blocks may have different answers), one pass sums the non-empty bins
+    of all of them, instead of a histogram per block
+    Parameters:
+        patterns_list: list of arrays of shape (G_i, N_i), as returned by pattern_block
+        points_list: list of arrays of shape (N_i,), the answers' points of every block
+        length: int, the length of the words
+    Return:
+        list of arrays of shape (G_i,), the infos of every block
+    '''
+    n_patterns = 3**length
+    keys, weights, totals = [], [], []
+    n_rows = 0
+    for patterns, points in zip(patterns_list, points_list):
+        n_guesses = patterns.shape[0]
+        rows = np.arange(n_rows, n_rows + n_guesses, dtype=np.int64)[:, None]
+        keys.append((patterns.astype(np.int64) + rows * n_patterns).ravel())
+        weights.append(np.broadcast_to(points, patterns.shape).ravel())
+        totals.append(np.full(n_guesses, points.sum()))
+        n_rows += n_guesses
+    if not n_rows:
+        return [np.zeros(patterns.shape[0]) for patterns in patterns_list]
+
+    groups, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    sums = np.bincount(inverse, weights=np.concatenate(weights))
+    owners = groups // n_patterns  # the row of every non-empty bin
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = sums / np.concatenate(totals)[owners]
+        infos = -np.bincount(owners, weights=np.where(p > 0, p * np.log2(p), 0),
+                             minlength=n_rows)
+    bounds = np.cumsum([0] + [patterns.shape[0] for patterns in patterns_list])
+    return [infos[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def partition_key(row):
+    '''
+    Getting a key of the partition of the answers made by a guess, two guesses
+    have the same key if and only if they split the answers into the same
+    groups (whatever the patterns of the groups are), so they have the same info
+    Parameters:
+        row: array of shape (N,), the patterns of the guess against the answers
+    Return:
+        bytes, the key
+    '''
+    # Relabeling the groups by the order of their first answers
+    _, first, inverse = np.unique(row, return_index=True, return_inverse=True)
+    labels = np.empty(len(first), dtype=np.int64)
+    labels[np.argsort(first)] = np.arange(len(first))
+    return labels[inverse].astype(np.uint32).tobytes()
+
+
+def info_block(guesses, answers, points, histograms=False):
+    '''
+    Computing the expected information of every guess over the answers
+    Parameters:
+        guesses: array of codes of shape (G, length)
+        answers: array of codes of shape (N, length)
+        points: array of shape (N,), the answers' points
+        histograms: boolean, if the histograms are returned too
+    Return:
+        array of shape (G,) of infos, or a tuple of (infos, histograms) where
+            histograms has the shape (G, 3^length) as list_of_all_possible_points
+    '''
+    return patterns_info(pattern_block(guesses, answers), points, length=guesses.shape[1],
+                         histograms=histograms)
+
+
+# Global arrays of the running info_parallel, set before the pool is forked
+# so the processes inherit them instead of receiving copies
+_SHARED = {}
+
+
+def _info_rows(bounds):
+    '''
+    Computing info_block for a range of the shared guesses (in a process of the pool)
+    '''
+    start, end = bounds
+    return info_block(_SHARED['guesses'][start:end], _SHARED['answers'], _SHARED['points'])
+
+
+def info_parallel(guesses, answers, points, processes=None, block_size=64):
+    '''
+    Computing the expected information of every guess over the answers, the
+    guesses are split into blocks computed by a pool of processes
+    Parameters:
+        guesses: as guesses in info_block function
+        answers: as answers in info_block function
+        points: as points in info_block function
+        processes: int or None, size of the pool (number of cores if None)
+        block_size: int, number of guesses per task
+    Return:
+        array of shape (G,) of infos
+    '''
+    _SHARED.update(guesses=guesses, answers=answers, points=points)
+    bounds = [(start, min(start + block_size, len(guesses)))
+              for start in range(0, len(guesses), block_size)]
+    try:
+        with mp.get_context('fork').Pool(processes) as pool:
+            infos = pool.map(_info_rows, bounds)
+    finally:
+        _SHARED.clear()
+    return np.concatenate(infos) if infos else np.zeros(0)
@@ -0,0 +1,195 @@
+'''
+This file contains the execution planner of the exact scoring, it chooses how
+Language.update_everything computes the info of N words over N words:
+    'python': the plain loops of Word.calc_possible_points (no overhead, the
+        best for a handful of words)
+    'numpy': blocks of patterns.info_block (fast per pair, a small overhead
+        per block)
+    'pool': blocks of patterns.info_block over a pool of processes (the
+        overhead of starting the pool pays off for tens of thousands of words)
+    'sampled': the estimation of Language.update_sampled_info (N words over a
+        sample of the words, then the top contenders exactly), a candidate only
+        when the language allows it (approx_threshold), it's pure Python so it
+        pays off only when N is much larger than the sample
+
+The choice is made by estimating the time of every backend from calibration
+data, which a quick micro benchmark measures on the first plan. Every plan and
+its actual timing are logged (logger 'planner'), so thresholds can be tuned
+per machine.
+
+File contents:
+    imports
+    class Planner:
+        Constructor
+        Methods:
+            calibrate
+            plan
+            record
+    Functions:
+        default_planner
+'''
+
+import logging
+import os
+from random import Random
+from time import perf_counter
+
+import numpy as np
+
+import patterns as pt
+from game_core import comparen
+
+LOGGER = logging.getLogger('planner')
+BACKENDS = ['python', 'numpy', 'pool']
+
+
+class Planner():
+    '''
+    Class of planner
+    Static Variables:
+        None
+    Dynamic Variables:
+        backends: list of strings, the backends which may be chosen
+        n_cores: int, number of available cores
+        calibration: dictionary or None, seconds measured by calibrate, keys are
+            'python_pair', 'sampled_pair', 'numpy_pair', 'numpy_block' and
+            'pool_start'
+        history: list of (plan, seconds) tuples, every recorded plan
+    '''
+
+    def __init__(self, backends=BACKENDS, n_cores=None):
+        '''
+        Constructor of the Planner object
+        Parameters:
+            backends: list of strings, see the class docstring
+            n_cores: int or None, see the class docstring (detected if None)
+        '''
+        self.backends = list(backends)
+        if n_cores is None:
+            n_cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity')\
+                else os.cpu_count() or 1
+        self.n_cores = n_cores
+        self.calibration = None
+        self.history = []
+
+    # Methods of Planner class
+
+    def calibrate(self):
+        '''
+        Measuring the speed of the backends on random words of length 5 (takes
+        a fraction of a second)
+        Parameters:
+            None
+        Return:
+            None, working inplace and updating self.calibration
+        '''
+        rand = Random(0)
+        words_ = [''.join(rand.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(5))
+                  for _ in range(1000)]
+        codes, _ = pt.encode(words_)
+        points = np.ones(len(words_))
+
+        start = perf_counter()
+        for word_ in words_[:20]:
+            for the_word in words_:
+                comparen(word_, the_word)
+        python_pair = (perf_counter() - start) / (20 * len(words_))
+
+        start = perf_counter()
+        for word_ in words_[:20]:
+            counts = {}
+            for the_word in words_:
+                pattern = comparen(word_, the_word)
+                counts[pattern] = counts.get(pattern, 0) + 1
+        sampled_pair = (perf_counter() - start) / (20 * len(words_))
+
+        start = perf_counter()
+        for i in range(20):
+            pt.info_block(codes[i:i+1], codes[:8], points[:8])
+        numpy_block = (perf_counter() - start) / 20
+
+        start = perf_counter()
+        pt.info_block(codes[:100], codes, points)
+        numpy_pair = max(perf_counter() - start - numpy_block, 0) / (100 * len(words_))
+
+        pool_start = float('inf')
+        if 'pool' in self.backends and self.n_cores > 1:
+            start = perf_counter()
+            pt.info_parallel(codes[:self.n_cores], codes[:8], points[:8],
+                             processes=self.n_cores, block_size=1)
+            pool_start = perf_counter() - start
+
+        self.calibration = {'python_pair': python_pair, 'sampled_pair': sampled_pair,
+                            'numpy_pair': numpy_pair,
+                            'numpy_block': numpy_block, 'pool_start': pool_start}
+        LOGGER.info('calibration on %d cores: %s', self.n_cores, self.calibration)
+
+    def plan(self, n_words=0, length=5, n_guesses=None, sample_size=None, n_refine=0):
+        '''
+        Choosing the fastest backend to score n_guesses words over n_words words
+        Parameters:
+            n_words: int, number of available words (answers)
+            length: int, length of the words
+            n_guesses: int or None, number of scored words (n_words if None)
+            sample_size: int or None, if given 'sampled' is a candidate too,
+                scoring the words over a sample of sample_size words
+            n_refine: int, number of words the sampled backend scores exactly
+        Return:
+            dictionary, keys are 'backend', 'block_size', 'processes' and
+                'estimates' (dictionary of estimated seconds of every backend)
+        '''
+        if self.calibration is None:
+            self.calibrate()
+        calibration = self.calibration
+        n_guesses = n_words if n_guesses is None else n_guesses
+        pairs = n_guesses * n_words
+        # about 2**20 pairs per block keeps the temporary arrays small
+        block_size = max(1, min(256, 2**20 // max(n_words, 1)))
+        n_blocks = -(-n_guesses // block_size)
+
+        # Python compares are linear in length, the vectorized ones quadratic
+        numpy_time = pairs * calibration['numpy_pair'] * (length / 5)**2 +\
+            n_blocks * calibration['numpy_block']
+        estimates = {'python': pairs * calibration['python_pair'] * length / 5,
+                     'numpy': numpy_time,
+                     'pool': calibration['pool_start'] + numpy_time / self.n_cores}
+        backends = list(self.backends)
+        if sample_size is not None:
+            estimates['sampled'] = (n_guesses * sample_size * calibration['sampled_pair'] +
+                                    n_refine * n_words * calibration['python_pair']) * length / 5
+            backends.append('sampled')
+        backend = min(backends, key=lambda backend: estimates[backend])
+        return {'backend': backend, 'block_size': block_size, 'processes': self.n_cores,
+                'n_words': n_words, 'n_guesses': n_guesses, 'length': length,
+                'estimates': estimates}
+
+    def record(self, plan={}, seconds=0):
+        '''
+        Logging a plan with its actual timing
+        Parameters:
+            plan: dictionary, as returned by plan
+            seconds: float, the actual time of the plan
+        Return:
+            None
+        '''
+        self.history.append((plan, seconds))
+        LOGGER.info('%s for %d x %d words of length %d: estimated %.4fs, took %.4fs',
+                    plan['backend'], plan['n_guesses'], plan['n_words'], plan['length'],
+                    plan['estimates'][plan['backend']], seconds)
+
+
+_DEFAULT = None
+
+
+def default_planner():
+    '''
+    Getting the planner shared by the languages which have none of their own
+    Parameters:
+        None
+    Return:
+        Planner object
+    '''
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = Planner()
+    return _DEFAULT
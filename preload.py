@@ -0,0 +1,227 @@
+'''
+This file contains the preloading of the languages, a Preloader loads them
+(their csv files) in a background thread while the menus are shown, the most
+recently used language first, so the selected language is usually ready when
+the game starts: get hands it over as soon as it's loaded (at once if it
+already is), a language not loaded yet is loaded next. A load superseded by
+get (of another language) or by stop is cancelled, so it doesn't compete with
+the game. The loading shows no progress bar (it would print over the menus).
+
+The most recently used language is remembered in a small file in the user's
+configuration directory (RECENT_FILE).
+
+File contents:
+    imports
+    Functions:
+        create_language
+        recent_language
+        remember_language
+    class Preloader:
+        Constructor
+        Methods:
+            get
+            ready
+            stop
+            _load
+'''
+
+import os
+import threading
+
+import control as ctrl
+from language import Language
+from cache import StateCache
+
+RECENT_FILE = os.path.join(os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config'),
+                           'wordle-like-games-solver', 'recent_language')
+
+
+def create_language(language='engwordle', cache=None, hard_mode=True, progress_bar=True,
+                    cancelled=None):
+    '''
+    Loading a language from its csv
+    Parameters:
+        language: string, the language (its python file and csv have to exist)
+        cache: StateCache object or None, the cache of solver states (a new one
+            if None)
+        hard_mode: boolean, see Language
+        progress_bar: boolean, if the progress bar of the loading is activated
+        cancelled: threading.Event or None, if it's set the loading stops
+    Return:
+        Language object, or None if the loading was cancelled
+    '''
+    lang_params = ctrl.lang_params(language)
+    loaded = Language(alphabet=lang_params['alphabet'],
+                      length=lang_params['length'],
+                      cache=cache if cache is not None else StateCache(),
+                      hard_mode=hard_mode)
+    if not loaded.load_csv(language+'.csv', progress_bar=progress_bar, cancelled=cancelled):
+        return None
+    return loaded
+
+
+def recent_language(recent_file=RECENT_FILE):
+    '''
+    Reading the most recently used language
+    Parameters:
+        recent_file: string, path of the file it's remembered in
+    Return:
+        string or None, the language, None if there is none
+    '''
+    try:
+        with open(recent_file) as file:
+            return file.read().strip() or None
+    except OSError:
+        return None
+
+
+def remember_language(language='engwordle', recent_file=RECENT_FILE):
+    '''
+    Remembering the most recently used language
+    Parameters:
+        language: string, the language
+        recent_file: string, path of the file it's remembered in
+    Return:
+        None
+    '''
+    try:
+        os.makedirs(os.path.dirname(recent_file) or '.', exist_ok=True)
+        with open(recent_file, 'w') as file:
+            file.write(language)
+    except OSError:
+        pass  # only a hint for the next start
+
+
+class Preloader():
+    '''
+    Class of preloader, loading languages in a background thread
+    Static Variables:
+        None
+    Dynamic Variables:
+        queue: list of strings, the languages left to load (the next first)
+        languages: dictionary, keys = languages, values = Language objects
+            (or the exception raised while loading them) not handed over yet
+        current: string or None, the language being loaded
+        cancelled: threading.Event, set to cancel the load of current
+        wanted: dictionary, keys = languages, values = number of gets waiting
+            for them (their loads are not cancelled)
+        loading: boolean, if the thread is running
+        cache: StateCache object or None, given to all the languages
+        hard_mode: boolean, given to all the languages
+        condition: threading.Condition, guarding queue and languages
+        thread: threading.Thread, the loading thread (a daemon)
+    '''
+
+    def __init__(self, languages=[], cache=None, hard_mode=True, recent_only=False,
+                 recent_file=RECENT_FILE):
+        '''
+        Constructor of the Preloader object, starting to load
+        Parameters:
+            languages: list of strings, the registered languages
+            cache: StateCache object or None, see the class docstring
+            hard_mode: boolean, see the class docstring
+            recent_only: boolean, if True only the most recently used language
+                is preloaded (the others are loaded when asked for)
+            recent_file: string, path of the file of the most recently used
+                language
+        '''
+        recent = recent_language(recent_file)
+        self.queue = [language for language in languages if language == recent]
+        if not recent_only:
+            self.queue += [language for language in languages if language != recent]
+        self.languages = {}
+        self.current = None  # initially
+        self.cancelled = threading.Event()
+        self.wanted = {}
+        self.loading = True  # initially
+        self.cache = cache
+        self.hard_mode = hard_mode
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._load, daemon=True)
+        self.thread.start()
+
+    # Methods of Preloader class
+
+    def get(self, language='engwordle'):
+        '''
+        Getting a language, waiting for it to be loaded, it's handed over (a
+        next get loads it again, as a game changes its language), the load of
+        another language in progress is cancelled
+        Parameters:
+            language: string, the language
+        Return:
+            Language object
+        '''
+        with self.condition:
+            if language not in self.languages and language != self.current:
+                if self.current is not None and not self.wanted.get(self.current):
+                    self.cancelled.set()  # superseded
+                if language in self.queue:
+                    self.queue.remove(language)
+                self.queue.insert(0, language)  # the next one
+                if not self.loading:
+                    self.loading = True
+                    self.thread = threading.Thread(target=self._load, daemon=True)
+                    self.thread.start()
+            self.wanted[language] = self.wanted.get(language, 0) + 1
+            while language not in self.languages:
+                self.condition.wait()
+            self.wanted[language] -= 1
+            loaded = self.languages.pop(language)
+        if isinstance(loaded, Exception):
+            raise loaded
+        return loaded
+
+    def ready(self, language='engwordle'):
+        '''
+        Checking if a language is loaded
+        Parameters:
+            language: string, the language
+        Return:
+            boolean, True if get would return at once
+        '''
+        with self.condition:
+            return language in self.languages
+
+    def stop(self):
+        '''
+        Stopping the loading, the load in progress is cancelled (the languages
+        not loaded yet are loaded by get when asked for)
+        Parameters:
+            None
+        Return:
+            None
+        '''
+        with self.condition:
+            self.queue = [language for language in self.queue if self.wanted.get(language)]
+            if self.current is not None and not self.wanted.get(self.current):
+                self.cancelled.set()
+
+    def _load(self):
+        '''
+        Loading the languages of the queue one by one (the thread's target)
+        Parameters:
+            None
+        Return:
+            None
+        '''
+        while True:
+            with self.condition:
+                if not self.queue:
+                    self.loading = False
+                    return
+                language = self.queue.pop(0)
+                if language in self.languages:
+                    continue
+                self.current = language
+                self.cancelled.clear()
+            try:
+                loaded = create_language(language, cache=self.cache, hard_mode=self.hard_mode,
+                                         progress_bar=False, cancelled=self.cancelled)
+            except Exception as error:
+                loaded = error
+            with self.condition:
+                if loaded is not None:  # otherwise cancelled
+                    self.languages[language] = loaded
+                self.current = None
+                self.condition.notify_all()
@@ -43,12 +43,14 @@ def create():
     return primes
 
 
-def install():
+def install(words=None, file_name='primel.csv'):
     '''
     Installing function
     To be called only once, then the language will be saved in a csv file
     Parameters:
-        None
+        words: list of (string, points) tuples or None, the words, all the
+            primes of create (1 point each) if None
+        file_name: string, path of the csv file
     Return:
         None
     '''
@@ -60,18 +62,19 @@ def install():
     digits = [chr(i) for i in range(ord('0'), ord('9')+1)]
 
     # Creating primes
-    primes = create()
+    if words is None:
+        words = [(prime, 1) for prime in create()]
 
     # Creating an empty language object
-    primel = Language(alphabet=digits, length=5)
+    primel = Language(alphabet=digits, length=5, approx_threshold=None)
 
     # Adding all words
-    for prime in primes:
-        word = Word(str=prime, points=1)
+    for prime, points in words:
+        word = Word(str=prime, points=points)
         primel.add_word(word)
 
     # Doing all the information job
     primel.update_everything(True, True, True)
 
     # Saving language
-    primel.to_csv(file_name='primel.csv')
+    primel.to_csv(file_name=file_name)
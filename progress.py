@@ -0,0 +1,234 @@
+'''
+This file contains the progress reporting of the long jobs (installing the
+languages and updating the information of their words).
+
+The workers never touch the progress bar, they count locally in a Tally and add
+their count to a shared counter once per batch (or once per interval of time
+for the slow items), so the shared counter's lock is taken a few times per
+second at most. A reporter thread of the main process sleeps between its
+refreshes of a tqdm bar, so nothing spins while waiting for the workers.
+
+Usage:
+    with Progress(total=N, desc='Scoring') as progress:
+        tally = progress.tally()  # in the main process or before forking
+        for item in items:
+            ...
+            tally.add()
+        tally.flush()
+
+    for word_ in track(language.all_words, enabled=progress_bar):
+        ...
+
+File contents:
+    imports
+    class Tally:
+        Constructor
+        Methods:
+            add
+            flush
+    class Progress:
+        Constructor
+        Methods:
+            tally
+            start
+            stop
+            done
+    Functions:
+        track
+'''
+
+import multiprocessing as mp
+from threading import Thread, Event
+from time import perf_counter
+
+from tqdm import tqdm
+
+
+class Tally():
+    '''
+    Class of tally, the local counter of a worker
+    Static Variables:
+        None
+    Dynamic Variables:
+        counter: multiprocessing Value, the shared counter
+        batch: int, the most items counted before adding them to the counter
+        interval: float, the most seconds before adding the items to the counter
+        pending: int, items counted and not added yet
+        deadline: float, perf_counter time of the next addition
+    '''
+
+    def __init__(self, counter=None, batch=256, interval=0.25):
+        '''
+        Constructor of the Tally object
+        Parameters:
+            counter: multiprocessing Value, see the class docstring
+            batch: int, see the class docstring
+            interval: float, see the class docstring
+        '''
+        self.counter = counter
+        self.batch = batch
+        self.interval = interval
+        self.pending = 0
+        self.deadline = perf_counter() + interval
+
+    # Methods of Tally class
+
+    def add(self, n=1):
+        '''
+        Counting items
+        Parameters:
+            n: int, number of items
+        Return:
+            None
+        '''
+        self.pending += n
+        if self.pending >= self.batch or perf_counter() >= self.deadline:
+            self.flush()
+
+    def flush(self):
+        '''
+        Adding the pending items to the shared counter
+        Parameters:
+            None
+        Return:
+            None
+        '''
+        if self.pending:
+            with self.counter.get_lock():
+                self.counter.value += self.pending
+            self.pending = 0
+        self.deadline = perf_counter() + self.interval
+
+
+class Progress():
+    '''
+    Class of progress, a shared counter reported by a sleeping thread
+    Static Variables:
+        None
+    Dynamic Variables:
+        total: int or None, number of items of the job
+        desc: string, description shown with the bar
+        interval: float, seconds between the refreshes of the bar
+        enabled: boolean, if False nothing is shown (the counter still counts)
+        counter: multiprocessing Value, number of done items, it must be
+            created before forking the workers so they inherit it
+        bar: tqdm object or None
+        stopped: threading Event, set to stop the reporter
+        reporter: Thread or None, the reporter thread
+    '''
+
+    def __init__(self, total=None, desc='', interval=0.5, enabled=True):
+        '''
+        Constructor of the Progress object
+        Parameters:
+            total: int or None, see the class docstring
+            desc: string, see the class docstring
+            interval: float, see the class docstring
+            enabled: boolean, see the class docstring
+        '''
+        self.total = total
+        self.desc = desc
+        self.interval = interval
+        self.enabled = enabled
+        self.counter = mp.Value('q', 0)
+        self.bar = None
+        self.stopped = Event()
+        self.reporter = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Methods of Progress class
+
+    def tally(self, batch=256, interval=0.25):
+        '''
+        Creating a local counter adding to this progress
+        Parameters:
+            batch: int, see Tally class
+            interval: float, see Tally class
+        Return:
+            Tally object
+        '''
+        return Tally(self.counter, batch=batch, interval=interval)
+
+    def start(self):
+        '''
+        Showing the bar and starting the reporter thread
+        Parameters:
+            None
+        Return:
+            None
+        '''
+        if not self.enabled or self.reporter is not None:
+            return
+        self.bar = tqdm(total=self.total, desc=self.desc or None)
+        self.stopped.clear()
+
+        def report():
+            while not self.stopped.wait(self.interval):
+                self.bar.update(self.counter.value - self.bar.n)
+
+        self.reporter = Thread(target=report, daemon=True)
+        self.reporter.start()
+
+    def stop(self):
+        '''
+        Stopping the reporter thread and closing the bar with the final count
+        Parameters:
+            None
+        Return:
+            None
+        '''
+        if self.reporter is None:
+            return
+        self.stopped.set()
+        self.reporter.join()
+        self.reporter = None
+        self.bar.update(self.counter.value - self.bar.n)
+        self.bar.close()
+
+    def done(self):
+        '''
+        Getting the number of done items (added by the tallies so far)
+        Parameters:
+            None
+        Return:
+            int
+        '''
+        return self.counter.value
+
+
+def track(iterable, enabled=True, total=None, desc='', batch=256):
+    '''
+    Iterating while reporting the progress, as tqdm(iterable) but the bar is
+    refreshed by the reporter thread instead of the loop
+    Parameters:
+        iterable: any iterable
+        enabled: boolean, if False the iterable itself is returned
+        total: int or None, number of items (len(iterable) if None and it has one)
+        desc: string, description shown with the bar
+        batch: int, see Tally class
+    Return:
+        iterable
+    '''
+    if not enabled:
+        return iterable
+    if total is None and hasattr(iterable, '__len__'):
+        total = len(iterable)
+    return _tracked(iterable, total, desc, batch)
+
+
+def _tracked(iterable, total, desc, batch):
+    '''
+    Generator of track function
+    '''
+    with Progress(total=total, desc=desc) as progress:
+        tally = progress.tally(batch=batch)
+        for item in iterable:
+            yield item
+            tally.add()
+        tally.flush()
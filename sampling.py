@@ -0,0 +1,90 @@
+'''
+This file contains the weighted sampler used to choose hidden words, it is a
+Vose alias table, so after an O(n) construction every draw is O(1) whatever
+the number of words is.
+
+File contents:
+    imports
+    class AliasTable:
+        Constructor
+        Methods:
+            draw
+            sample
+'''
+
+from random import Random, random
+
+
+class AliasTable():
+    '''
+    Class of alias table
+    Static Variables:
+        None
+    Dynamic Variables:
+        items: list, the items to be drawn
+        prob: list of floats, probability of keeping the item of every column
+        alias: list of ints, the column to draw instead when not keeping
+    '''
+
+    def __init__(self, items=[], weights=[]):
+        '''
+        Constructor of the AliasTable object (Vose's algorithm)
+        Parameters:
+            items: iterable, the items to be drawn
+            weights: iterable of numerical values, items' corresponding weights
+        '''
+        self.items = list(items)
+        n = len(self.items)
+        weights = list(weights)
+        total = sum(weights)
+        scaled = [weight * n / total for weight in weights]
+
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, weight in enumerate(scaled) if weight < 1]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1]
+
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1
+            if scaled[more] < 1:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # Whatever remains in small or large has a scaled weight of 1 (up to
+        # floating point errors), so it keeps its initial prob of 1.0
+
+    # Methods of AliasTable class
+
+    def draw(self, rand=None):
+        '''
+        Drawing a single item
+        Parameters:
+            rand: Random object or None, the generator to use (the global one if None)
+        Return:
+            an item, drawn according to the weights
+        '''
+        x = (rand.random() if rand else random()) * len(self.items)
+        i = int(x)
+        return self.items[i] if x - i < self.prob[i] else self.items[self.alias[i]]
+
+    def sample(self, k=1, seed=None):
+        '''
+        Drawing k items with replacement
+        Parameters:
+            k: int, number of items
+            seed: any hashable or None, the same seed gives the same items
+        Return:
+            list, k items drawn according to the weights
+        '''
+        uniform = Random(seed).random
+        items, prob, alias, n = self.items, self.prob, self.alias, len(self.items)
+        drawn = []
+        for _ in range(k):
+            x = uniform() * n
+            i = int(x)
+            drawn.append(items[i] if x - i < prob[i] else items[alias[i]])
+        return drawn
@@ -0,0 +1,131 @@
+'''
+This file contains the compact sessions of games, a game is saved as:
+    the artifact id of its language (Language.artifact_id)
+    the hidden word (if the solver knows it) and the history of guesses and
+        patterns, as indices of the language and decimal values
+    the bitset of the available words (Language.candidates_bitset)
+so restoring it doesn't replay the guesses, the available words are read from
+the bitset (O(N/8) bytes) and their ranking is restored from the language's
+StateCache when it has it (no rescoring), a service can then swap idle
+sessions to disk and bring them back instantly.
+
+The format is binary: a header (struct HEADER), the history (struct ENTRY per
+guess) then the bitset compressed by zlib (long runs of removed words take a
+few bytes).
+
+File contents:
+    imports
+    Functions:
+        dump_session
+        load_session
+        restore_session
+        save_session
+        read_session
+'''
+
+import os
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b'WLGS'
+VERSION = 1
+# magic, version, artifact id, number of indexed words, hidden word (-1 if
+# unknown), number of guesses
+HEADER = struct.Struct('<4sB16sIiH')
+# guess index, pattern
+ENTRY = struct.Struct('<II')
+
+
+def dump_session(language, history=[], the_word=None):
+    '''
+    Serializing a game
+    Parameters:
+        language: Language object, the language of the game (its available words)
+        history: list of (guess, pattern) tuples, guess is a string (a word of
+            the language) and pattern is a decimal value
+        the_word: string or None, the hidden word if known
+    Return:
+        bytes, the session
+    '''
+    the_word = language.index[the_word] if the_word is not None else -1
+    data = HEADER.pack(MAGIC, VERSION, language.artifact_id(), len(language.index),
+                       the_word, len(history))
+    data += b''.join([ENTRY.pack(language.index[guess], pattern) for guess, pattern in history])
+    return data + zlib.compress(language.candidates_bitset())
+
+
+def load_session(data=b''):
+    '''
+    Deserializing a game
+    Parameters:
+        data: bytes, as returned by dump_session
+    Return:
+        dictionary, keys are 'artifact_id', 'n_words', 'the_word' (index, or
+            None), 'history' (list of (index, pattern) tuples) and 'bitset'
+    '''
+    magic, version, artifact_id, n_words, the_word, n_guesses = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a session (or of another version)')
+    offset = HEADER.size
+    history = [ENTRY.unpack_from(data, offset + i * ENTRY.size) for i in range(n_guesses)]
+    offset += n_guesses * ENTRY.size
+    return {'artifact_id': artifact_id, 'n_words': n_words,
+            'the_word': the_word if the_word >= 0 else None, 'history': history,
+            'bitset': zlib.decompress(data[offset:])}
+
+
+def restore_session(root, data=b''):
+    '''
+    Restoring a game on its language
+    Parameters:
+        root: Language object, the language the game was started with (all its
+            words available), it's not changed
+        data: bytes, as returned by dump_session
+    Return:
+        tuple of (language, history, the_word), language is the updated
+            language of the available words (a sub language of root), history
+            and the_word are as given to dump_session
+    '''
+    session = load_session(data)
+    if session['artifact_id'] != root.artifact_id():
+        raise ValueError('the session was saved with another language')
+
+    vocabulary = list(root.index)
+    bits = np.unpackbits(np.frombuffer(session['bitset'], dtype=np.uint8), bitorder='little')
+    available = np.flatnonzero(bits[:session['n_words']]).tolist()
+    language = root.sub_language([vocabulary[i] for i in available])
+    language.update_everything()  # restored from the cache if it has the state
+
+    history = [(vocabulary[guess], pattern) for guess, pattern in session['history']]
+    the_word = vocabulary[session['the_word']] if session['the_word'] is not None else None
+    return language, history, the_word
+
+
+def save_session(file_name, language, history=[], the_word=None):
+    '''
+    Saving a game to a file, as dump_session (the file is replaced atomically)
+    Parameters:
+        file_name: string, path of the file
+        language, history, the_word: as in dump_session function
+    Return:
+        None
+    '''
+    temporary = file_name + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(dump_session(language, history, the_word))
+    os.replace(temporary, file_name)
+
+
+def read_session(file_name, root):
+    '''
+    Restoring a game from a file, as restore_session
+    Parameters:
+        file_name: string, path of the file
+        root: Language object, as in restore_session function
+    Return:
+        as restore_session function
+    '''
+    with open(file_name, 'rb') as file:
+        return restore_session(root, file.read())
@@ -0,0 +1,316 @@
+'''
+This file contains the simulation harness of the solver, it plays many games
+against hidden words drawn according to their points, always guessing the top
+of the ranking, and reports the guess quality and the latency of every
+configuration of the solver.
+
+A configuration is a dictionary of Language attributes, for example
+{'shortlist_size': 100} scores only the 100 words with the best letter
+frequencies, so comparing it with {} (exact scoring) shows how much guess
+quality the shortlist costs and how much latency it saves, and
+{'hard_mode': False} guesses from the whole vocabulary (easy mode).
+Every configuration has its own StateCache shared by its games, latency is
+measured on the turns which didn't hit the cache (the turns actually computed).
+
+Usage:
+    python simulate.py --language nerdle --games 200 --shortlist 0 50 200
+    python simulate.py --language engwordle --size 2000 --games 500
+    python simulate.py --language engwordle --size 2000 --shortlist 0 --easy
+    python simulate.py --language nerdle --games 200 --batch
+    python simulate.py --language engwordle --size 2000 --strategies entropy minimax lookahead
+
+The strategies (see strategies.py) are compared by tournament: every strategy
+plays the same hidden words, and all of them share one Evaluator, so a state
+or a pattern row reached by several strategies is computed once (--separate
+plays them with an Evaluator each too, to compare the cost).
+
+File contents:
+    imports
+    Functions:
+        load_language
+        play
+        play_batch
+        simulate
+        print_report
+        tournament
+        print_tournament
+    Main Code
+'''
+
+import argparse
+from random import Random
+from time import perf_counter
+
+import control as ctrl
+from cache import StateCache
+from game_core import comparen
+from language import Language
+from strategies import Evaluator, get_strategy
+
+
+def load_language(language='engwordle', size=None, seed=0):
+    '''
+    Loading a language from its csv, scored exactly (approx_threshold None)
+    unless a configuration sets otherwise
+    Parameters:
+        language: string, the language (its csv has to exist)
+        size: int or None, number of words randomly kept (reproducibly), None for all
+        seed: any hashable, seed of the random choice of the kept words
+    Return:
+        Language object, not updated
+    '''
+    lang_params = ctrl.lang_params(language)
+    full = Language(alphabet=lang_params['alphabet'], length=lang_params['length'],
+                    from_csv=language+'.csv', approx_threshold=None)
+    words_ = list(full.all_words)
+    if size is not None and size < len(words_):
+        words_ = Random(seed).sample(words_, size)
+    return full.sub_language(words_)
+
+
+def play(root, the_word='', n_tryouts=6):
+    '''
+    Playing a game, the solver always guesses the top of the ranking
+    Parameters:
+        root: Language object, the language at the begining of the game (not
+            changed, the game is played on a sub language of it)
+        the_word: string, the hidden word
+        n_tryouts: int, number of available guesses
+    Return:
+        dictionary, keys are 'solved' (boolean), 'guesses' (int) and
+            'latencies' (list of seconds of the turns which didn't hit the cache)
+    '''
+    language = root.sub_language(root.all_words)
+    latencies = []
+    solved_pattern = 3**language.length - 1
+
+    for i in range(n_tryouts):
+        hits = language.cache.hits
+        start = perf_counter()
+        language.update_everything()
+        if language.cache.hits == hits:
+            latencies.append(perf_counter() - start)
+
+        guess = language.best_guesses()[0]
+        pattern = comparen(guess, the_word)
+        if pattern == solved_pattern:
+            return {'solved': True, 'guesses': i + 1, 'latencies': latencies}
+        language.massive_remove(word_=guess, pattern=pattern)
+
+    return {'solved': False, 'guesses': n_tryouts, 'latencies': latencies}
+
+
+def play_batch(root, hidden_words=[], n_tryouts=6):
+    '''
+    Playing many games in lockstep, every turn the guesses of all the running
+    games are ranked at once by Language.rank_batch
+    Parameters:
+        root: Language object, the language at the begining of the games (not
+            changed)
+        hidden_words: list of strings, the hidden word of every game
+        n_tryouts: int, number of available guesses
+    Return:
+        tuple of (results, seconds), results is a list of dictionaries as
+            returned by play (the latency of a turn is shared by its games),
+            seconds is the total time of the ranking
+    '''
+    vocabulary = list(root.index)
+    solved_pattern = 3**root.length - 1
+    candidates = [list(root.all_words) for _ in hidden_words]
+    results = [{'solved': False, 'guesses': n_tryouts, 'latencies': []} for _ in hidden_words]
+    running = list(range(len(hidden_words)))
+    seconds = 0
+
+    for i in range(n_tryouts):
+        masks = []
+        for game in running:
+            bitset = bytearray((len(vocabulary) + 7) // 8)
+            for word_ in candidates[game]:
+                index = root.index[word_]
+                bitset[index >> 3] |= 1 << (index & 7)
+            masks.append(bytes(bitset))
+        start = perf_counter()
+        rankings = root.rank_batch(masks, k=1)
+        latency = perf_counter() - start
+        seconds += latency
+
+        still_running = []
+        for game, ranking in zip(running, rankings):
+            guess = ranking[0][0]
+            results[game]['latencies'].append(latency / len(running))
+            pattern = comparen(guess, hidden_words[game])
+            if pattern == solved_pattern:
+                results[game].update(solved=True, guesses=i + 1)
+                continue
+            candidates[game] = [word_ for word_ in candidates[game]
+                                if comparen(guess, word_) == pattern]
+            still_running.append(game)
+        running = still_running
+        if not running:
+            break
+
+    return results, seconds
+
+
+def simulate(language, configurations=[{}], n_games=100, n_tryouts=6, seed=0):
+    '''
+    Playing the same hidden words with every configuration
+    Parameters:
+        language: Language object, not updated
+        configurations: list of dictionaries, keys = Language attributes,
+            values = their values in this configuration
+        n_games: int, number of games per configuration
+        n_tryouts: int, number of available guesses
+        seed: any hashable, seed of the hidden words
+    Return:
+        list of dictionaries, a summary per configuration, keys are
+            'configuration', 'games', 'solved', 'mean_guesses' (of solved
+            games), 'mean_latency', 'max_latency' and 'total_latency' (seconds)
+    '''
+    hidden_words = language.choose_words(k=n_games, seed=seed)
+    summaries = []
+    for configuration in configurations:
+        root = language.sub_language(language.all_words)
+        root.cache = StateCache()
+        for attribute, value in configuration.items():
+            setattr(root, attribute, value)
+
+        results = [play(root, the_word, n_tryouts) for the_word in hidden_words]
+        solved = [result['guesses'] for result in results if result['solved']]
+        latencies = [latency for result in results for latency in result['latencies']]
+        summaries.append({'configuration': configuration,
+                          'games': n_games,
+                          'solved': len(solved),
+                          'mean_guesses': sum(solved) / len(solved) if solved else None,
+                          'mean_latency': sum(latencies) / len(latencies) if latencies else 0,
+                          'max_latency': max(latencies, default=0),
+                          'total_latency': sum(latencies)})
+    return summaries
+
+
+def print_report(summaries=[]):
+    '''
+    Printing the summaries of the configurations as a table
+    Parameters:
+        summaries: list of dictionaries, as returned by simulate
+    Return:
+        None
+    '''
+    print("{:<30} {:<8} {:<12} {:<16} {:<16} {:<16}".format(
+        'configuration', 'solved', 'mean guesses', 'mean latency ms', 'max latency ms',
+        'total latency s'))
+    for summary in summaries:
+        mean_guesses = round(summary['mean_guesses'], 3) if summary['mean_guesses'] else '-'
+        print("{:<30} {:<8} {:<12} {:<16} {:<16} {:<16}".format(
+            str(summary['configuration'] or 'exact'),
+            f"{summary['solved']}/{summary['games']}", mean_guesses,
+            round(summary['mean_latency'] * 1000, 2), round(summary['max_latency'] * 1000, 2),
+            round(summary['total_latency'], 2)))
+
+
+def tournament(language, strategies=['entropy'], n_games=100, n_tryouts=6, seed=0, shared=True):
+    '''
+    Playing the same hidden words with every strategy
+    Parameters:
+        language: Language object, not updated
+        strategies: list of strings, names of strategies (see strategies.py)
+        n_games: int, number of games per strategy
+        n_tryouts: int, number of available guesses
+        seed: any hashable, seed of the hidden words
+        shared: boolean, if the strategies share one Evaluator (otherwise
+            every strategy has its own)
+    Return:
+        tuple of (summaries, counters), summaries is a list of dictionaries,
+            a summary per strategy, keys are 'strategy', 'games', 'solved',
+            'mean_guesses' (of solved games), 'max_guesses' and 'seconds',
+            counters is a list of the counters of the evaluators
+    '''
+    hidden_words = language.choose_words(k=n_games, seed=seed)
+    evaluator = Evaluator(index=language.index, tiles=language.tiles)
+    root_ids, root_points = evaluator.state_ids(language)
+    solved_pattern = 3**language.length - 1
+    summaries, evaluators = [], [evaluator]
+
+    for name in strategies:
+        if not shared and summaries:
+            evaluator = Evaluator(index=language.index, tiles=language.tiles)
+            evaluators.append(evaluator)
+        strategy = get_strategy(name, evaluator=evaluator, hard_mode=language.hard_mode)
+        solved = []
+        start = perf_counter()
+        for the_word in hidden_words:
+            ids, points = root_ids, root_points
+            for i in range(n_tryouts):
+                guess = strategy.rank(ids, points)[0]
+                pattern = comparen(guess, the_word)
+                if pattern == solved_pattern:
+                    solved.append(i + 1)
+                    break
+                kept = evaluator.row(evaluator.index[guess])[ids] == pattern
+                ids, points = ids[kept], points[kept]
+        summaries.append({'strategy': name, 'games': n_games, 'solved': len(solved),
+                          'mean_guesses': sum(solved) / len(solved) if solved else None,
+                          'max_guesses': max(solved, default=None),
+                          'seconds': perf_counter() - start})
+    return summaries, [evaluator.counters() for evaluator in evaluators]
+
+
+def print_tournament(summaries=[]):
+    '''
+    Printing the summaries of the strategies as a table
+    Parameters:
+        summaries: list of dictionaries, as returned by tournament
+    Return:
+        None
+    '''
+    print("{:<16} {:<8} {:<12} {:<12} {:<10}".format(
+        'strategy', 'solved', 'mean guesses', 'max guesses', 'seconds'))
+    for summary in summaries:
+        mean_guesses = round(summary['mean_guesses'], 3) if summary['mean_guesses'] else '-'
+        print("{:<16} {:<8} {:<12} {:<12} {:<10}".format(
+            summary['strategy'], f"{summary['solved']}/{summary['games']}", mean_guesses,
+            summary['max_guesses'] or '-', round(summary['seconds'], 2)))
+
+
+# # # # # # MAIN # # # # # #
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulating games played by the solver.')
+    parser.add_argument('--language', default='engwordle')
+    parser.add_argument('--size', type=int, default=None, help='number of words kept')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--shortlist', type=int, nargs='*', default=[0, 100],
+                        help='shortlist sizes to compare, 0 for exact scoring')
+    parser.add_argument('--easy', action='store_true',
+                        help='compare with the easy mode too (exact scoring)')
+    parser.add_argument('--batch', action='store_true',
+                        help='play the games in lockstep, ranked by batches (exact scoring)')
+    parser.add_argument('--strategies', nargs='+', default=None,
+                        help='strategies to compare by tournament (see strategies.py)')
+    parser.add_argument('--separate', action='store_true',
+                        help='play the tournament without sharing the evaluator too')
+    args = parser.parse_args()
+
+    language = load_language(args.language, size=args.size, seed=args.seed)
+    n_tryouts = ctrl.lang_params(args.language)['n_tryouts']
+    configurations = [{'shortlist_size': size} if size else {} for size in args.shortlist]
+    if args.easy:
+        configurations.append({'hard_mode': False})
+    if args.strategies:
+        for shared in [True, False] if args.separate else [True]:
+            summaries, counters = tournament(language, args.strategies, n_games=args.games,
+                                             n_tryouts=n_tryouts, seed=args.seed, shared=shared)
+            print('shared evaluator:' if shared else 'an evaluator per strategy:')
+            print_tournament(summaries)
+            print(f"total {sum([summary['seconds'] for summary in summaries]):.2f}s, "
+                  f"states computed {sum([counter['misses'] for counter in counters])}, "
+                  f"found {sum([counter['hits'] for counter in counters])}\n")
+    elif args.batch:
+        hidden_words = language.choose_words(k=args.games, seed=args.seed)
+        results, seconds = play_batch(language, hidden_words, n_tryouts=n_tryouts)
+        solved = [result['guesses'] for result in results if result['solved']]
+        print(f"batched: {len(solved)}/{args.games} solved, mean guesses "
+              f"{sum(solved) / max(len(solved), 1):.3f}, ranking took {seconds:.2f}s")
+    else:
+        print_report(simulate(language, configurations, n_games=args.games,
+                              n_tryouts=n_tryouts, seed=args.seed))
@@ -0,0 +1,368 @@
+'''
+This file contains the strategies of the solver, the policies choosing the
+next guess, selected by their names (see STRATEGIES):
+    'entropy': the most expected information (the ranking of Language.sort)
+    'minimax': the smallest worst case, the most words left by a pattern
+    'expected_size': the smallest expected number of words left
+    'frequency': the best letter frequencies (as Language.update_freq_scores),
+        O(N * length) instead of O(N^2)
+    'lookahead': the most expected information of the guess and the best next
+        guess after it (two plies), for the best entropy guesses only
+Ties are broken by the probability of the guess being the answer.
+
+A state is the set of the available words, as their numbers in the index of
+the language (Language.index) and their points. All the strategies take the
+patterns and the statistics of the states from an Evaluator, which caches
+them by the state, so strategies sharing an Evaluator (a tournament) compute
+every state and every pattern row once, whichever strategy reached it first.
+
+File contents:
+    imports
+    class Evaluator:
+        Constructor
+        Methods:
+            state_ids
+            row
+            stats
+            counters
+    class Strategy:
+        Constructor
+        Methods:
+            scores
+            rank
+            choose
+    Strategies: Entropy, Minimax, ExpectedSize, Frequency, Lookahead
+    Functions:
+        get_strategy
+'''
+
+from collections import OrderedDict
+from hashlib import blake2b
+
+import numpy as np
+
+import patterns as pt
+
+
+class Evaluator():
+    '''
+    Class of evaluator, the shared pattern lookups and statistics of states
+    Static Variables:
+        None
+    Dynamic Variables:
+        index: dictionary, keys = string words, values = their numbers (the
+            index of the language, shared with it)
+        vocabulary: list of strings, the words by their numbers
+        codes: array, the words' codes (see patterns.encode)
+        length: int, length of the words
+        tiles: PatternTiles or CompressedPatterns object or None, the pattern
+            matrix the rows are taken from, None to compute them
+        rows: OrderedDict, keys = word numbers, values = arrays, the patterns
+            of the word against all the words (least recently used first)
+        states: OrderedDict, keys = digests of states, values = dictionaries
+            of arrays, see stats method (least recently used first)
+        max_rows, max_states: int, the most rows and states kept
+        hits, misses: int, counters of the states found and computed
+    '''
+
+    def __init__(self, index={}, tiles=None, max_rows=4096, max_states=100000):
+        '''
+        Constructor of the Evaluator object
+        Parameters:
+            index: dictionary, see the class docstring
+            tiles: PatternTiles or CompressedPatterns object or None, see the
+                class docstring
+            max_rows: int, see the class docstring
+            max_states: int, see the class docstring
+        '''
+        self.index = index
+        self.vocabulary = list(index)
+        self.codes, _ = pt.encode(self.vocabulary)
+        self.length = self.codes.shape[1]
+        self.tiles = tiles
+        self.rows = OrderedDict()
+        self.states = OrderedDict()
+        self.max_rows = max_rows
+        self.max_states = max_states
+        self.hits = self.misses = 0
+
+    # Methods of Evaluator class
+
+    def state_ids(self, language):
+        '''
+        Getting the state of a language (of this index)
+        Parameters:
+            language: Language object
+        Return:
+            tuple of (ids, points), sorted word numbers and their points
+        '''
+        ids = np.array(sorted([self.index[word_] for word_ in language.all_words]), dtype=np.int64)
+        points = np.array([language.all_words[self.vocabulary[i]].points for i in ids.tolist()],
+                          dtype=np.float64)
+        return ids, points
+
+    def row(self, guess=0):
+        '''
+        Getting the patterns of a word against all the words
+        Parameters:
+            guess: int, number of the word
+        Return:
+            array of the patterns, in the order of the numbers
+        '''
+        patterns = self.rows.get(guess)
+        if patterns is not None:
+            self.rows.move_to_end(guess)
+            return patterns
+        if self.tiles is not None:
+            patterns = self.tiles.row(self.vocabulary[guess], self.vocabulary)
+        else:
+            patterns = pt.pattern_block(self.codes[guess:guess+1], self.codes)[0]
+        self.rows[guess] = patterns
+        if len(self.rows) > self.max_rows:
+            self.rows.popitem(last=False)
+        return patterns
+
+    def stats(self, ids, points, hard_mode=True, block_size=256):
+        '''
+        Getting the statistics of every guess of a state (cached)
+        Parameters:
+            ids: array of ints, sorted numbers of the available words
+            points: array, their points
+            hard_mode: boolean, if True the guesses are the available words,
+                otherwise all the words
+            block_size: int, number of guesses compared at once
+        Return:
+            dictionary of arrays (one value per guess), keys are 'guesses'
+                (their numbers), 'info' (expected information), 'worst' (the
+                most words left by a pattern), 'expected' (the expected number
+                of words left) and 'prob' (the probability of being the answer)
+        '''
+        digest = blake2b(ids.tobytes(), digest_size=16)
+        digest.update(points.tobytes())
+        key = (digest.digest(), hard_mode)
+        stats = self.states.get(key)
+        if stats is not None:
+            self.states.move_to_end(key)
+            self.hits += 1
+            return stats
+        self.misses += 1
+
+        guesses = ids if hard_mode else np.arange(len(self.vocabulary))
+        total = points.sum()
+        n_patterns = 3**self.length
+        info, worst, expected = [], [], []
+        for start in range(0, len(guesses), block_size):
+            block = pt.pattern_block(self.codes[guesses[start:start+block_size]], self.codes[ids])
+            n_guesses = len(block)
+            keys = block.astype(np.int64) + np.arange(n_guesses)[:, None] * n_patterns
+            bins, inverse = np.unique(keys.ravel(), return_inverse=True)
+            sums = np.bincount(inverse, weights=np.broadcast_to(points, keys.shape).ravel())
+            counts = np.bincount(inverse)
+            owners = bins // n_patterns
+            p = sums / total
+            with np.errstate(divide='ignore', invalid='ignore'):
+                plogp = np.where(p > 0, p * np.log2(p), 0)
+            info.append(-np.bincount(owners, weights=plogp, minlength=n_guesses))
+            firsts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+            worst.append(np.maximum.reduceat(counts, firsts))
+            expected.append(np.bincount(owners, weights=p * counts, minlength=n_guesses))
+
+        prob = np.zeros(len(guesses))
+        prob[np.searchsorted(guesses, ids)] = points / total
+        stats = {'guesses': guesses, 'info': np.concatenate(info), 'worst': np.concatenate(worst),
+                 'expected': np.concatenate(expected), 'prob': prob}
+        self.states[key] = stats
+        if len(self.states) > self.max_states:
+            self.states.popitem(last=False)
+        return stats
+
+    def counters(self):
+        '''
+        Getting the counters of the evaluator
+        Parameters:
+            None
+        Return:
+            dictionary, keys are 'hits', 'misses', 'states' and 'rows'
+        '''
+        return {'hits': self.hits, 'misses': self.misses, 'states': len(self.states),
+                'rows': len(self.rows)}
+
+
+class Strategy():
+    '''
+    Class of strategy, the base of the strategies, a strategy defines scores
+    Static Variables:
+        name: string, the name of the strategy in STRATEGIES
+    Dynamic Variables:
+        evaluator: Evaluator object, shared by the strategies compared together
+        hard_mode: boolean, if True only the available words are guessed
+    '''
+    name = None
+
+    def __init__(self, evaluator=None, hard_mode=True):
+        '''
+        Constructor of the Strategy object
+        Parameters:
+            evaluator: Evaluator object, see the class docstring
+            hard_mode: boolean, see the class docstring
+        '''
+        self.evaluator = evaluator
+        self.hard_mode = hard_mode
+
+    # Methods of Strategy class
+
+    def scores(self, ids, points):
+        '''
+        Scoring the guesses of a state (the greater the better)
+        Parameters:
+            ids: array of ints, sorted numbers of the available words
+            points: array, their points
+        Return:
+            tuple of (guesses, scores), arrays of the guesses' numbers and scores
+        '''
+        raise NotImplementedError
+
+    def rank(self, ids, points, k=1):
+        '''
+        Ranking the guesses of a state
+        Parameters:
+            ids: array of ints, sorted numbers of the available words
+            points: array, their points
+            k: int, number of guesses
+        Return:
+            list of strings, the best k guesses (the best first)
+        '''
+        guesses, scores = self.scores(ids, points)
+        prob = np.zeros(len(guesses))
+        prob[np.searchsorted(guesses, ids)] = points / points.sum()
+        order = np.lexsort((-prob, -scores))[:k]
+        return [self.evaluator.vocabulary[i] for i in guesses[order].tolist()]
+
+    def choose(self, language, k=1):
+        '''
+        Ranking the guesses of a language (as rank)
+        Parameters:
+            language: Language object, of the evaluator's index
+            k: int, number of guesses
+        Return:
+            list of strings, the best k guesses (the best first)
+        '''
+        ids, points = self.evaluator.state_ids(language)
+        return self.rank(ids, points, k)
+
+
+# Strategies
+
+class Entropy(Strategy):
+    '''
+    The most expected information
+    '''
+    name = 'entropy'
+
+    def scores(self, ids, points):
+        stats = self.evaluator.stats(ids, points, self.hard_mode)
+        return stats['guesses'], stats['info']
+
+
+class Minimax(Strategy):
+    '''
+    The smallest worst case (ties by the expected information)
+    '''
+    name = 'minimax'
+
+    def scores(self, ids, points):
+        stats = self.evaluator.stats(ids, points, self.hard_mode)
+        # The information (less than log2 of the words) only breaks the ties
+        return stats['guesses'], -stats['worst'] + stats['info'] / (np.log2(len(ids)) + 2)
+
+
+class ExpectedSize(Strategy):
+    '''
+    The smallest expected number of words left
+    '''
+    name = 'expected_size'
+
+    def scores(self, ids, points):
+        stats = self.evaluator.stats(ids, points, self.hard_mode)
+        return stats['guesses'], -stats['expected']
+
+
+class Frequency(Strategy):
+    '''
+    The best letter frequencies (the score of Word.calc_freq_score), the
+    patterns are not computed
+    '''
+    name = 'frequency'
+
+    def scores(self, ids, points):
+        codes = self.evaluator.codes
+        guesses = ids if self.hard_mode else np.arange(len(codes))
+        n_symbols = int(codes.max()) + 1
+        positional = np.zeros((self.evaluator.length, n_symbols))
+        for i in range(self.evaluator.length):
+            np.add.at(positional[i], codes[ids, i], points)
+        present = np.zeros((len(ids), n_symbols), dtype=bool)
+        present[np.arange(len(ids))[:, None], codes[ids]] = True
+        overall = points @ present
+
+        guess_codes = codes[guesses]
+        scores = positional[np.arange(self.evaluator.length), guess_codes].sum(axis=1)
+        distinct = np.zeros((len(guesses), n_symbols), dtype=bool)
+        distinct[np.arange(len(guesses))[:, None], guess_codes] = True
+        scores += distinct @ overall
+        return guesses, scores / points.sum()
+
+
+class Lookahead(Strategy):
+    '''
+    The most expected information of the guess and the best next guess after
+    it, computed for the width best entropy guesses of the states of no more
+    than max_words words (the others are ranked by entropy)
+    '''
+    name = 'lookahead'
+
+    def __init__(self, evaluator=None, hard_mode=True, width=10, max_words=1000):
+        super().__init__(evaluator, hard_mode)
+        self.width = width
+        self.max_words = max_words
+
+    def scores(self, ids, points):
+        stats = self.evaluator.stats(ids, points, self.hard_mode)
+        guesses, scores = stats['guesses'], stats['info'].copy()
+        if len(ids) > self.max_words or len(ids) <= 2:
+            return guesses, scores
+
+        total = points.sum()
+        solved = 3**self.evaluator.length - 1
+        for g in np.argsort(-scores, kind='stable')[:self.width].tolist():
+            patterns = self.evaluator.row(int(guesses[g]))[ids]
+            second = 0
+            for pattern in np.unique(patterns).tolist():
+                part = patterns == pattern
+                if pattern == solved or part.sum() == 1:
+                    continue
+                child = self.evaluator.stats(ids[part], points[part], self.hard_mode)
+                second += points[part].sum() / total * child['info'].max()
+            # Above every guess not looked ahead, whose info is at most log2(N)
+            scores[g] += second + np.log2(len(ids)) + 1
+        return guesses, scores
+
+
+STRATEGIES = {strategy.name: strategy
+              for strategy in [Entropy, Minimax, ExpectedSize, Frequency, Lookahead]}
+
+
+def get_strategy(name='entropy', evaluator=None, hard_mode=True, **kwargs):
+    '''
+    Creating a strategy by its name
+    Parameters:
+        name: string, a key of STRATEGIES
+        evaluator: Evaluator object, shared by the strategies compared together
+        hard_mode: boolean, if True only the available words are guessed
+        kwargs: the parameters of the strategy (for example width of lookahead)
+    Return:
+        Strategy object
+    '''
+    if name not in STRATEGIES:
+        raise ValueError(f"unknown strategy '{name}', the strategies are {', '.join(STRATEGIES)}")
+    return STRATEGIES[name](evaluator=evaluator, hard_mode=hard_mode, **kwargs)
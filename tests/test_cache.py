@@ -0,0 +1,92 @@
+import pytest
+
+from cache import StateCache
+from game_core import comparen
+from language import Language, Word
+
+
+def make_language(words_, cache=None, **kwargs):
+    alphabet = sorted({ch for word_ in words_ for ch in word_})
+    language = Language(alphabet=alphabet, length=len(words_[0]), approx_threshold=None,
+                        cache=cache, **kwargs)
+    for i, word_ in enumerate(words_):
+        language.add_word(Word(word_, 10 + i))
+    return language
+
+
+def infos(language):
+    return {word_: word.info for word_, word in language.all_words.items()}
+
+
+def test_put_get_and_eviction():
+    cache = StateCache(top_k=2)
+    cache.put(b'a', ranking=['x', 'y', 'z'], infos=[1.0, 2.0, 3.0])
+    entry = cache.get(b'a')
+    assert entry['ranking'] == ('x', 'y') and list(entry['infos']) == [1.0, 2.0, 3.0]
+    assert cache.get(b'b') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.max_bytes = cache.nbytes + 1
+    cache.put(b'b', ranking=['x'], infos=[1.0])
+    assert cache.get(b'a') is None and cache.get(b'b') is not None
+    assert cache.evictions == 1 and cache.nbytes <= cache.max_bytes
+
+    cache.put(b'c', infos=[0.0] * 10**5)  # bigger than the whole cache
+    assert cache.get(b'c') is None
+
+
+def test_restore_equals_computed():
+    words_ = ['abcde', 'abdce', 'edcba', 'aabbc', 'ccdde', 'baced', 'eabcd']
+    cache = StateCache()
+    language = make_language(words_, cache=cache)
+    language.update_everything()
+    computed = infos(language)
+    order = list(language.all_words)
+
+    again = make_language(words_, cache=cache)
+    again.update_everything()
+    assert cache.hits == 1
+    assert infos(again) == pytest.approx(computed)
+    assert list(again.all_words) == order
+
+
+def test_languages_sharing_a_cache():
+    cache = StateCache()
+    first = make_language(['abc', 'abd', 'bca', 'ddd'], cache=cache)
+    first.update_everything()
+    second = make_language(['111', '112', '113', '333'], cache=cache)
+    second.update_everything()
+    assert cache.hits == 0
+    exact = make_language(['111', '112', '113', '333'])
+    exact.update_everything()
+    assert infos(second) == pytest.approx(infos(exact))
+
+
+def test_shortlisted_state_not_restored_as_exact():
+    words_ = ['abcde', 'abdce', 'edcba', 'aabbc', 'ccdde', 'baced', 'eabcd', 'dceab']
+    cache = StateCache()
+    make_language(words_, cache=cache, shortlist_size=2).update_everything()
+    exact = make_language(words_, cache=cache)
+    exact.update_everything()
+    assert cache.hits == 0
+    assert all(info > 0 for info in infos(exact).values())
+
+
+def test_rank_batch_uses_exact_entries():
+    words_ = ['abcde', 'abdce', 'edcba', 'aabbc', 'ccdde', 'baced', 'eabcd', 'dceab']
+    cache = StateCache()
+    language = make_language(words_, cache=cache)
+    guess, the_word = words_[0], words_[2]
+    state = make_language(words_)
+    state.massive_remove(word_=guess, pattern=comparen(guess, the_word))
+    mask = state.candidates_bitset()  # the same index as language
+
+    ranking, = language.rank_batch([mask], k=len(words_))
+    sub = language.sub_language(state.all_words)
+    sub.update_everything()
+    assert cache.hits == 1
+    assert dict(ranking) == pytest.approx(infos(sub))
+
+    shortlisted = language.sub_language(state.all_words)
+    shortlisted.shortlist_size = 1
+    assert shortlisted.candidates_key() != sub.candidates_key()
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from game_core import comparen
+from language import Language, Word
+
+ALPHABET = list('abcdefg')
+
+
+def make_words(n_words=200, seed=0):
+    rng = random.Random(seed)
+    words_ = sorted({''.join(rng.choices(ALPHABET, k=5)) for _ in range(n_words)})
+    return [(word_, rng.randint(1, 100)) for word_ in words_]
+
+
+def make_language(words, **kwargs):
+    language = Language(alphabet=ALPHABET, length=5, approx_threshold=None, **kwargs)
+    for word_, points in words:
+        language.add_word(Word(word_, points))
+    return language
+
+
+def assert_exact(language):
+    exact = make_language([(word.str, word.points) for word in language.all_words.values()])
+    for word_, word in exact.all_words.items():
+        word.calc_possible_points(exact.all_words)
+        word.calc_info()
+        assert language.all_words[word_].info == pytest.approx(word.info, abs=1e-9), word_
+
+
+def test_add_words_after_massive_remove():
+    words = make_words()
+    language = make_language(words)
+    language.update_everything()
+    guess = words[0][0]
+    the_word = words[-1][0]
+    language.massive_remove(word_=guess, pattern=comparen(guess, the_word))
+    removed = [Word(word_, points) for word_, points in words if word_ not in language.all_words]
+    language.add_words(removed[:20])
+    assert_exact(language)
+
+
+def test_remove_then_add_words():
+    words = make_words(seed=1)
+    language = make_language(words)
+    language.update_everything()
+    language.remove_words([word_ for word_, _ in words[:30]])
+    assert_exact(language)
+    language.add_words([Word(word_, points) for word_, points in words[:10]])
+    assert_exact(language)
+
+
+def test_add_words_after_sampled_and_budgeted_info():
+    words = make_words(seed=2)
+    language = make_language(words[:150])
+    language.update_everything()
+    for word_, _ in words[:10]:
+        language.remove_word(language.all_words[word_])
+    language.update_sampled_info()
+    language.add_words([Word(word_, points) for word_, points in words[150:170]])
+    assert_exact(language)
+
+    for word_, _ in words[150:160]:
+        language.remove_word(language.all_words[word_])
+    language.update_budgeted_info(time_budget=0)
+    language.add_words([Word(word_, points) for word_, points in words[170:]])
+    assert_exact(language)
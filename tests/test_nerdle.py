@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+import main_play
+import nerdle
+from game_core import comparen
+
+
+@pytest.fixture(scope='module')
+def expressions():
+    return nerdle.create()
+
+
+def histories(expressions, n_histories=6, seed=0):
+    rng = random.Random(seed)
+    for n_guesses in [1, 1, 1, 2, 2, 3][:n_histories]:
+        the_word = rng.choice(expressions)
+        guesses = rng.sample(expressions, n_guesses)
+        yield [(guess, comparen(guess, the_word)) for guess in guesses]
+
+
+def test_generate_equals_filtering_create(expressions):
+    for history in histories(expressions):
+        expected = [expression for expression in expressions
+                    if all(comparen(guess, expression) == pattern for guess, pattern in history)]
+        generated = list(nerdle.generate(history))
+        assert len(generated) == len(set(generated))
+        assert set(generated) == set(expected), history
+
+
+def test_colors():
+    assert nerdle.colors(comparen('12+35=47', '35+12=47')) == '11211222'
+    assert nerdle.colors('00000000') == '00000000'
+
+
+def test_lazy_game(expressions, monkeypatch):
+    monkeypatch.setattr(main_play, 'remember_language', lambda language: None)
+    game = main_play.Game(language='nerdle', lazy=True)
+    assert not game.language.all_words
+    assert nerdle.heuristic_guess(game.history) in expressions
+
+    the_word = '35+12=47'
+    for guess in ['12+35=47', '9*8-7=65', '10-5*2=0']:
+        if game.language.all_words:
+            break
+        game.history.append((guess, comparen(guess, the_word)))
+        assert game.update_lazy()
+    assert the_word in game.language.all_words
+    assert len(game.language.all_words) <= nerdle.max_words
@@ -0,0 +1,73 @@
+import itertools
+import random
+from math import inf
+
+import numpy as np
+import pytest
+
+from game_core import comparen
+from optimal import Solver, evaluate
+
+
+def brute_force(answers, weights, guesses=None, worst=False):
+    '''
+    The cost of the optimal tree by trying every guess at every node
+    '''
+    if len(answers) == 1:
+        return 1 if worst else weights[answers[0]]
+    best = inf
+    for guess in guesses or answers:
+        groups = {}
+        for answer in answers:
+            groups.setdefault(comparen(guess, answer), []).append(answer)
+        if len(groups) == 1 and guess not in answers:
+            continue  # nothing learnt
+        costs = [brute_force(group, weights, guesses, worst)
+                 for pattern, group in groups.items() if pattern != 3**len(guess) - 1]
+        if worst:
+            cost = 1 + max(costs, default=0)
+        else:
+            cost = sum([weights[answer] for answer in answers]) + sum(costs)
+        best = min(best, cost)
+    return best
+
+
+def tiny_sets(n_sets=6, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [''.join(letters) for letters in itertools.product('abc', repeat=3)]
+    for _ in range(n_sets):
+        answers = rng.sample(vocabulary, rng.randint(3, 7))
+        yield answers, {answer: rng.randint(1, 5) for answer in answers}
+
+
+@pytest.mark.parametrize('objective', ['expected', 'worst'])
+def test_solver_equals_brute_force(objective):
+    worst = objective == 'worst'
+    for answers, weights in tiny_sets():
+        solver = Solver(answers, weights=[weights[answer] for answer in answers],
+                        objective=objective)
+        cost, tree = solver.solve(np.arange(len(answers)))
+        assert cost == pytest.approx(brute_force(answers, weights, worst=worst)), answers
+
+        played = evaluate(tree, answers, [weights[answer] for answer in answers])
+        assert not played['failed']
+        if worst:
+            assert played['worst'] == cost
+        else:
+            assert played['expected'] * sum(weights.values()) == pytest.approx(cost)
+
+
+def test_solver_easy_mode_equals_brute_force():
+    guesses = ['abc', 'bca', 'cab', 'aab', 'ccc']
+    for answers, weights in tiny_sets(n_sets=4, seed=1):
+        solver = Solver(answers, weights=[weights[answer] for answer in answers],
+                        guesses=answers + [guess for guess in guesses if guess not in answers])
+        cost, _ = solver.solve(np.arange(len(answers)))
+        assert cost == pytest.approx(brute_force(answers, weights, guesses=solver.guesses))
+
+
+def test_parallel_equals_sequential():
+    answers, weights = next(tiny_sets(seed=2))
+    points = [weights[answer] for answer in answers]
+    cost, _ = Solver(answers, weights=points).solve(np.arange(len(answers)))
+    assert Solver(answers, weights=points).solve_parallel(processes=2)[0] == pytest.approx(cost)
@@ -0,0 +1,70 @@
+import itertools
+import random
+
+import pytest
+
+import control as ctrl
+from game_core import comparen, LANGUAGES
+from language import Language, Word
+from packed import DUPLICATE_CASES, PackedWords, word_symbols
+
+
+def assert_equivalent(packed, pairs):
+    for word_, the_word in pairs:
+        assert packed.compare(packed.pack(word_), packed.pack(the_word)) ==\
+            comparen(word_, the_word), (word_, the_word)
+
+
+@pytest.mark.parametrize('word_, the_word', DUPLICATE_CASES)
+def test_duplicate_cases(word_, the_word):
+    assert_equivalent(PackedWords.of_words([word_, the_word]), [(word_, the_word)])
+
+
+def test_all_pairs_of_a_small_alphabet():
+    words_ = [''.join(letters) for letters in itertools.product('abc', repeat=4)]
+    packed = PackedWords.of_words(words_)
+    assert_equivalent(packed, itertools.product(words_, repeat=2))
+    assert [packed.unpack(packed.pack(word_)) for word_ in words_] == words_
+
+
+@pytest.mark.parametrize('language', LANGUAGES)
+def test_random_pairs(language):
+    lang_params = ctrl.lang_params(language)
+    symbols, length = word_symbols(lang_params['alphabet']), lang_params['length']
+    packed = PackedWords(symbols, length)
+    rng = random.Random(language)
+    pairs = []
+    for _ in range(3000):
+        few = rng.sample(symbols, rng.randint(1, min(len(symbols), length)))
+        pairs.append((''.join(rng.choices(few, k=length)), ''.join(rng.choices(few, k=length))))
+        pairs.append((''.join(rng.choices(symbols, k=length)),
+                      ''.join(rng.choices(symbols, k=length))))
+    assert_equivalent(packed, pairs)
+
+
+@pytest.mark.parametrize('language, bits', [('engwordle', 30), ('primel', 25), ('nerdle', 40)])
+def test_word_bits(language, bits):
+    lang_params = ctrl.lang_params(language)
+    packed = PackedWords(word_symbols(lang_params['alphabet']), lang_params['length'])
+    assert packed.high.bit_length() == bits
+
+
+def test_language_compares_packed():
+    rng = random.Random(0)
+    words_ = sorted({''.join(rng.choices('abcdef', k=5)) for _ in range(300)})
+    language = Language(alphabet=list('abcdef'), length=5)
+    for word_ in words_:
+        language.add_word(Word(word_, rng.randint(1, 50)))
+
+    guess = words_[0]
+    for word in language.all_words.values():
+        word.calc_possible_points(language.all_words, packed=language.get_packed())
+        expected = [0] * 3**5
+        for word_ in words_:
+            expected[comparen(word.str, word_)] += language.all_words[word_].points
+        assert word.list_of_all_possible_points == expected
+
+    pattern = comparen(guess, words_[-1])
+    language.massive_remove(word_=guess, pattern=pattern)
+    assert list(language.all_words) == [word_ for word_ in words_
+                                        if comparen(guess, word_) == pattern]
@@ -0,0 +1,60 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import patterns as pt
+from compressed import CompressedPatterns
+from game_core import comparen
+from tiles import PatternTiles
+
+
+def all_words(symbols='abcd', length=3):
+    return [''.join(letters) for letters in itertools.product(symbols, repeat=length)]
+
+
+def test_pattern_block_equals_comparen():
+    words_ = all_words()
+    codes, _ = pt.encode(words_)
+    block = pt.pattern_block(codes, codes)
+    assert block.tolist() == [[comparen(word_, the_word) for the_word in words_]
+                              for word_ in words_]
+
+
+@pytest.mark.parametrize('tile_size, max_bytes', [(7, 2**20), (16, 2**20), (5, 200)])
+def test_tiles_row_equals_pattern_block(tile_size, max_bytes):
+    words_ = all_words()
+    codes, _ = pt.encode(words_)
+    matrix = pt.pattern_block(codes, codes)
+    tiles = PatternTiles({word_: i for i, word_ in enumerate(words_)}, tile_size=tile_size,
+                         max_bytes=max_bytes)
+    rng = np.random.default_rng(0)
+    for _ in range(2):  # the second time from the hot tiles or the spill
+        for i in rng.permutation(len(words_))[:20].tolist():
+            answers = rng.choice(len(words_), size=15, replace=False)
+            assert tiles.row(words_[i], [words_[j] for j in answers]).tolist() ==\
+                matrix[i, answers].tolist()
+    ids = np.arange(0, len(words_), 3)
+    points = rng.integers(1, 10, len(ids)).astype(float)
+    assert tiles.info(ids, points) == pytest.approx(
+        pt.patterns_info(matrix[np.ix_(ids, ids)], points, 3))
+
+
+@pytest.mark.parametrize('symbols, length', [('abcd', 3), ('ab', 5), ('0123456789+-*/=', 2)])
+def test_compressed_decode_equals_pattern_block(symbols, length, tmp_path):
+    words_ = all_words(symbols, length)
+    codes, _ = pt.encode(words_)
+    matrix = pt.pattern_block(codes, codes)
+    compressed = CompressedPatterns.compress(words_, block_size=17)
+    assert compressed.decode_rows(np.arange(len(words_))).tolist() == matrix.tolist()
+
+    compressed.save(str(tmp_path / 'patterns.npz'))
+    loaded = CompressedPatterns.load(str(tmp_path / 'patterns.npz'))
+    rows = np.array([len(words_) - 1, 0, 3])
+    assert loaded.decode_rows(rows).tolist() == matrix[rows].tolist()
+    assert loaded.row(words_[2], words_[::-1]).tolist() == matrix[2, ::-1].tolist()
+
+    ids = np.arange(1, len(words_), 2)
+    points = np.linspace(1, 2, len(ids))
+    assert loaded.info(ids, points, block_size=5) == pytest.approx(
+        pt.patterns_info(matrix[np.ix_(ids, ids)], points, length))
@@ -0,0 +1,30 @@
+from collections import Counter
+
+import pytest
+
+from sampling import AliasTable
+
+
+def exact_distribution(table):
+    n = len(table.items)
+    distribution = Counter()
+    for i in range(n):
+        distribution[table.items[i]] += table.prob[i] / n
+        distribution[table.items[table.alias[i]]] += (1 - table.prob[i]) / n
+    return distribution
+
+
+@pytest.mark.parametrize('weights', [[1, 1, 1, 1], [1, 2, 3, 4, 10], [5, 0, 0.5, 100, 7, 7, 1e-3]])
+def test_alias_table_distribution(weights):
+    items = [f'w{i}' for i in range(len(weights))]
+    distribution = exact_distribution(AliasTable(items, weights))
+    for item, weight in zip(items, weights):
+        assert distribution[item] == pytest.approx(weight / sum(weights), abs=1e-12)
+
+
+def test_sample_is_seeded():
+    table = AliasTable(['a', 'b', 'c'], [1, 0, 3])
+    drawn = table.sample(k=4000, seed=1)
+    assert drawn == table.sample(k=4000, seed=1)
+    assert 'b' not in drawn
+    assert drawn.count('c') / len(drawn) == pytest.approx(0.75, abs=0.03)
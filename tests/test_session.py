@@ -0,0 +1,51 @@
+import pytest
+
+from cache import StateCache
+from game_core import comparen
+from language import Language, Word
+from session import dump_session, load_session, restore_session
+
+WORDS = ['abcde', 'abdce', 'edcba', 'aabbc', 'ccdde', 'baced', 'eabcd', 'dceab', 'bbbbb']
+
+
+def make_language(words_=WORDS, cache=None):
+    language = Language(alphabet=list('abcde'), length=5, approx_threshold=None, cache=cache)
+    for i, word_ in enumerate(words_):
+        language.add_word(Word(word_, 10 + i))
+    return language
+
+
+def test_round_trip():
+    root = make_language(cache=StateCache())
+    root.update_everything()
+    language = root.sub_language(root.all_words)
+    the_word = 'edcba'
+    history = []
+    for guess in ['abcde', 'ccdde']:
+        pattern = comparen(guess, the_word)
+        language.massive_remove(word_=guess, pattern=pattern)
+        language.update_everything()
+        history.append((guess, pattern))
+
+    data = dump_session(language, history, the_word)
+    session = load_session(data)
+    assert session['n_words'] == len(WORDS) and session['the_word'] == WORDS.index(the_word)
+
+    hits = root.cache.hits
+    restored, restored_history, restored_word = restore_session(root, data)
+    assert root.cache.hits == hits + 1  # not rescored
+    assert restored_history == history and restored_word == the_word
+    assert list(restored.all_words) == list(language.all_words)
+    for word_, word in language.all_words.items():
+        assert restored.all_words[word_].info == pytest.approx(word.info)
+    assert len(root.all_words) == len(WORDS)
+
+
+def test_unknown_word_and_other_language():
+    language = make_language()
+    data = dump_session(language)
+    assert load_session(data)['the_word'] is None
+    with pytest.raises(ValueError):
+        restore_session(make_language(WORDS[:-1]), data)
+    with pytest.raises(ValueError):
+        load_session(b'XXXX' + data[4:])
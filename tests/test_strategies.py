@@ -0,0 +1,60 @@
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+
+from game_core import comparen
+from language import Language, Word
+from strategies import Evaluator, get_strategy, STRATEGIES
+
+
+def make_state(seed=0):
+    rng = random.Random(seed)
+    vocabulary = [''.join(letters) for letters in itertools.product('abcd', repeat=3)]
+    index = {word_: i for i, word_ in enumerate(vocabulary)}
+    ids = np.array(sorted(rng.sample(range(len(vocabulary)), 20)))
+    points = np.array([float(rng.randint(1, 9)) for _ in ids])
+    return vocabulary, index, ids, points
+
+
+@pytest.mark.parametrize('hard_mode', [True, False])
+def test_stats_equal_comparen(hard_mode):
+    vocabulary, index, ids, points = make_state()
+    stats = Evaluator(index=index).stats(ids, points, hard_mode=hard_mode, block_size=7)
+    total = points.sum()
+    for g, guess in enumerate(stats['guesses'].tolist()):
+        groups = {}
+        for i, point in zip(ids.tolist(), points.tolist()):
+            weight, count = groups.get(comparen(vocabulary[guess], vocabulary[i]), (0, 0))
+            groups[comparen(vocabulary[guess], vocabulary[i])] = (weight + point, count + 1)
+        info = -sum([weight / total * math.log2(weight / total) for weight, _ in groups.values()])
+        assert stats['info'][g] == pytest.approx(info)
+        assert stats['worst'][g] == max([count for _, count in groups.values()])
+        assert stats['expected'][g] == pytest.approx(
+            sum([weight / total * count for weight, count in groups.values()]))
+
+
+def test_entropy_ranks_as_language():
+    vocabulary, index, ids, points = make_state(seed=1)
+    language = Language(alphabet=list('abcd'), length=3, approx_threshold=None)
+    for i, point in zip(ids.tolist(), points.tolist()):
+        language.add_word(Word(vocabulary[i], point))
+    language.update_everything()
+    evaluator = Evaluator(index=language.index)
+    strategy = get_strategy('entropy', evaluator=evaluator)
+    best = language.best_guesses()[0]
+    assert language.all_words[strategy.choose(language)[0]].info ==\
+        pytest.approx(language.all_words[best].info)
+
+
+def test_strategies_share_the_evaluator():
+    vocabulary, index, ids, points = make_state(seed=2)
+    evaluator = Evaluator(index=index)
+    for name in STRATEGIES:
+        ranked = get_strategy(name, evaluator=evaluator).rank(ids, points, k=3)
+        assert len(ranked) == 3 and all(index[word_] in ids for word_ in ranked)
+    assert evaluator.counters()['misses'] >= 1 and evaluator.counters()['hits'] >= 1
+    with pytest.raises(ValueError):
+        get_strategy('unknown', evaluator=evaluator)
@@ -0,0 +1,20 @@
+import itertools
+
+from trie import Trie
+
+
+def test_contains_and_complete():
+    words_ = [''.join(letters) for letters in itertools.product('abc', repeat=3)][::2]
+    trie = Trie(words_ + words_[:3], alphabet=list('abcd'))
+    assert trie.n_words == len(words_)
+    for word_ in itertools.product('abcd', repeat=3):
+        word_ = ''.join(word_)
+        assert trie.contains(word_) == (word_ in words_)
+    assert not trie.contains('ab') and not trie.contains('abcc') and not trie.contains('xyz')
+
+    for prefix in ['', 'a', 'bc', 'cab', 'd', 'x']:
+        expected = sorted([word_ for word_ in words_ if word_.startswith(prefix)])
+        assert trie.complete(prefix, k=100) == expected
+        assert trie.complete(prefix, k=2) == expected[:2]
+    among = set(words_[1::3])
+    assert trie.complete('', k=100, among=among) == sorted(among)
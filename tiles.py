@@ -0,0 +1,293 @@
+'''
+This file contains the tiled pattern matrix of a language, the patterns of
+every word against every word without keeping the whole matrix in memory (for
+nerdle it would take 40346 x 40346 x 2 bytes, more than 3 GB).
+
+The words are numbered by Language.index, and the matrix is split into square
+tiles of tile_size x tile_size patterns, a tile is:
+    computed by patterns.pattern_block on its first use,
+    kept in a bounded LRU of hot tiles in RAM (max_bytes),
+    spilled to a memory mapped file once computed, so a tile evicted from the
+    RAM is read back from the disk instead of being computed again.
+When only a few patterns of a tile are needed (late turns of a game) and the
+tile was never computed, the needed patterns are computed alone instead.
+
+File contents:
+    imports
+    class PatternTiles:
+        Constructor
+        Methods:
+            close
+            block
+            row
+            info
+            nbytes
+            stats
+'''
+
+import os
+from collections import OrderedDict
+from tempfile import mkstemp
+from weakref import finalize
+
+import numpy as np
+
+import patterns as pt
+
+
+class PatternTiles():
+    '''
+    Class of pattern tiles
+    Static Variables:
+        None
+    Dynamic Variables:
+        index: dictionary, keys = string words, values = int, the numbering of
+            the words (Language.index, shared with the language)
+        n: int, number of numbered words when the tiles were created
+        tile_size: int, number of rows (and columns) of a tile
+        n_tiles: int, number of tiles per row (and column) of the matrix
+        length: int, length of the words
+        n_patterns: int, number of possible patterns (3^length)
+        codes: array, the words' codes by their numbers (see patterns.encode)
+        dtype: numpy dtype of the patterns
+        max_bytes: int, the most bytes of hot tiles kept in RAM
+        hot: OrderedDict, keys = (row tile, column tile), values = arrays, the
+            hot tiles from the least recently used
+        spill_file: string or None, path of the memory mapped file
+        spill: numpy memmap or None, the spilled matrix
+        spilled: bytearray, 1 for every tile written to the spill
+        hits, loads, computes, partials, evictions: int, counters of tiles
+            found hot, read from the spill, computed, patterns computed alone
+            and tiles evicted
+    '''
+
+    def __init__(self, index={}, tile_size=1024, max_bytes=2**28, spill=True, spill_file=None):
+        '''
+        Constructor of the PatternTiles object
+        Parameters:
+            index: dictionary, see the class docstring
+            tile_size: int, see the class docstring
+            max_bytes: int, see the class docstring
+            spill: boolean, if the computed tiles are spilled to a file
+            spill_file: string or None, path of the spill, a temporary file
+                (removed with the object) if None
+        '''
+        self.index = index
+        self.n = len(index)
+        self.tile_size = tile_size
+        self.n_tiles = -(-self.n // tile_size)
+        self.codes, _ = pt.encode(list(index))
+        self.length = self.codes.shape[1]
+        self.n_patterns = 3**self.length
+        self.dtype = pt.pattern_dtype(self.length)
+        self.max_bytes = max_bytes
+        self.hot = OrderedDict()
+        self.hits = self.loads = self.computes = self.partials = self.evictions = 0
+
+        self.spill_file = None
+        self.spill = None
+        self.spilled = bytearray(self.n_tiles**2)
+        if spill and self.n:
+            if spill_file is None:
+                handle, spill_file = mkstemp(suffix='.tiles')
+                os.close(handle)
+                finalize(self, os.remove, spill_file)
+            self.spill_file = spill_file
+            # The file is sparse, only the spilled tiles take disk space
+            self.spill = np.memmap(spill_file, dtype=self.dtype, mode='w+', shape=(self.n, self.n))
+
+    # Methods of PatternTiles class
+
+    def close(self):
+        '''
+        Dropping the hot tiles and the spill (the file is kept if it was given)
+        Parameters:
+            None
+        Return:
+            None
+        '''
+        self.hot.clear()
+        self.spill = None
+        self.spilled = bytearray(self.n_tiles**2)
+
+    def _bounds(self, tile):
+        start = tile * self.tile_size
+        return start, min(start + self.tile_size, self.n)
+
+    def _tile(self, r, c):
+        '''
+        Getting a whole tile, from the hot tiles, the spill or computing it
+        '''
+        key = (r, c)
+        tile = self.hot.get(key)
+        if tile is not None:
+            self.hot.move_to_end(key)
+            self.hits += 1
+            return tile
+
+        r0, r1 = self._bounds(r)
+        c0, c1 = self._bounds(c)
+        if self.spilled[r * self.n_tiles + c]:
+            tile = np.array(self.spill[r0:r1, c0:c1])
+            self.loads += 1
+        else:
+            tile = pt.pattern_block(self.codes[r0:r1], self.codes[c0:c1])
+            self.computes += 1
+            if self.spill is not None:
+                self.spill[r0:r1, c0:c1] = tile
+                self.spilled[r * self.n_tiles + c] = 1
+
+        self.hot[key] = tile
+        used = sum([hot_tile.nbytes for hot_tile in self.hot.values()])
+        while used > self.max_bytes and len(self.hot) > 1:
+            _, evicted = self.hot.popitem(last=False)
+            used -= evicted.nbytes
+            self.evictions += 1
+        return tile
+
+    def block(self, r=0, c=0, rows=None, cols=None):
+        '''
+        Getting the patterns of some words of a row tile against some words of
+        a column tile
+        Parameters:
+            r: int, the row tile (of the guesses)
+            c: int, the column tile (of the answers)
+            rows: array of ints, positions of the guesses in the row tile
+            cols: array of ints, positions of the answers in the column tile
+        Return:
+            array of shape (len(rows), len(cols)), the patterns
+        '''
+        if self._alone(r, c, len(rows), len(cols)):
+            self.partials += 1
+            r0, c0 = r * self.tile_size, c * self.tile_size
+            return pt.pattern_block(self.codes[r0 + rows], self.codes[c0 + cols])
+        return self._tile(r, c)[np.ix_(rows, cols)]
+
+    def _alone(self, r, c, n_rows, n_cols):
+        '''
+        Checking if some patterns of a tile are better computed alone, it's
+        the case of a few patterns of a tile which is neither hot nor spilled
+        '''
+        if (r, c) in self.hot or self.spilled[r * self.n_tiles + c]:
+            return False
+        r0, r1 = self._bounds(r)
+        c0, c1 = self._bounds(c)
+        return 4 * n_rows * n_cols < (r1 - r0) * (c1 - c0)
+
+    def _split(self, ids):
+        '''
+        Splitting sorted word numbers by their tiles, generator of (tile,
+        positions in the tile, slice of ids)
+        '''
+        ends = np.searchsorted(ids, np.arange(1, self.n_tiles + 1) * self.tile_size)
+        start = 0
+        for tile, end in enumerate(ends.tolist()):
+            if end > start:
+                yield tile, ids[start:end] - tile * self.tile_size, slice(start, end)
+            start = end
+
+    def row(self, word_='', words_=[]):
+        '''
+        Getting the patterns of a word against some words (as comparen)
+        Parameters:
+            word_: string, the guess (a numbered word)
+            words_: iterable of strings, the answers (numbered words)
+        Return:
+            array of the patterns, in the order of words_
+        '''
+        ids = np.array([self.index[some_word_] for some_word_ in words_], dtype=np.int64)
+        order = np.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+        guess = self.index[word_]
+        r = guess // self.tile_size
+        rows = np.array([guess - r * self.tile_size])
+
+        patterns = np.zeros(len(ids), dtype=self.dtype)
+        for c, cols, part in self._split(sorted_ids):
+            patterns[order[part]] = self.block(r, c, rows, cols)[0]
+        return patterns
+
+    def info(self, ids, points, block_size=256, progress=None):
+        '''
+        Computing the expected information of some words over the same words,
+        tile by tile
+        Parameters:
+            ids: array of ints, sorted numbers of the words
+            points: array, the words' points (in the order of ids)
+            block_size: int, the most guesses whose histograms are built at once
+            progress: Tally object or None, counts the scored words
+        Return:
+            array of the infos, in the order of ids
+        '''
+        ids = np.asarray(ids, dtype=np.int64)
+        points = np.asarray(points, dtype=np.float64)
+        total = points.sum()
+        infos = np.zeros(len(ids))
+        columns = list(self._split(ids))
+
+        for r, rows, part in self._split(ids):
+            for start in range(0, len(rows), block_size):
+                block_rows = rows[start:start+block_size]
+                n_guesses = len(block_rows)
+                offsets = np.arange(n_guesses, dtype=np.int64)[:, None] * self.n_patterns
+                hist = np.zeros(n_guesses * self.n_patterns)
+                alone = []
+                for c, cols, col_part in columns:
+                    if self._alone(r, c, n_guesses, len(cols)):
+                        alone.append((c, cols, col_part))
+                        continue
+                    patterns = self.block(r, c, block_rows, cols)
+                    hist += self._bincount(patterns, offsets, points[col_part], len(hist))
+
+                # The patterns computed alone are computed at once for all tiles
+                if alone:
+                    self.partials += 1
+                    answers = np.concatenate([c * self.tile_size + cols for c, cols, _ in alone])
+                    patterns = pt.pattern_block(self.codes[r * self.tile_size + block_rows],
+                                                self.codes[answers])
+                    answer_points = np.concatenate([points[col_part] for _, _, col_part in alone])
+                    hist += self._bincount(patterns, offsets, answer_points, len(hist))
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    p = hist.reshape(n_guesses, self.n_patterns) / total
+                    block_infos = -np.where(p > 0, p * np.log2(p), 0).sum(axis=1)
+                first = part.start + start
+                infos[first:first + n_guesses] = block_infos
+                if progress is not None:
+                    progress.add(n_guesses)
+        return infos
+
+    @staticmethod
+    def _bincount(patterns, offsets, points, size):
+        '''
+        Summing the points of the answers by guess and pattern (flat histograms)
+        '''
+        patterns = patterns.astype(np.int64) + offsets
+        return np.bincount(patterns.ravel(), weights=np.broadcast_to(points, patterns.shape).ravel(),
+                           minlength=size)
+
+    def nbytes(self):
+        '''
+        Getting the RAM used by the hot tiles
+        Parameters:
+            None
+        Return:
+            int, bytes
+        '''
+        return sum([tile.nbytes for tile in self.hot.values()])
+
+    def stats(self):
+        '''
+        Getting the counters of the tiles
+        Parameters:
+            None
+        Return:
+            dictionary, keys are 'hot_tiles', 'hot_bytes', 'spilled_tiles',
+                'spilled_bytes', 'hits', 'loads', 'computes', 'partials' and
+                'evictions'
+        '''
+        tile_bytes = self.tile_size**2 * np.dtype(self.dtype).itemsize
+        return {'hot_tiles': len(self.hot), 'hot_bytes': self.nbytes(),
+                'spilled_tiles': sum(self.spilled),
+                'spilled_bytes': sum(self.spilled) * tile_bytes,
+                'hits': self.hits, 'loads': self.loads, 'computes': self.computes,
+                'partials': self.partials, 'evictions': self.evictions}
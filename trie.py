@@ -0,0 +1,143 @@
+'''
+This file contains the trie of a language's vocabulary, used to validate words
+in O(length) and to complete prefixes while a word is being entered.
+
+The trie is stored flat in breadth first order, so the children of a node are
+consecutive nodes sorted by their characters and a node costs 7 bytes only:
+    start: array, index of the first child of every node
+    count: array, number of children of every node
+    labels: array, code of the character leading to every node
+    terminal: bytearray, 1 if a word ends at the node
+
+File contents:
+    imports
+    class Trie:
+        Constructor
+        Methods:
+            find
+            contains
+            complete
+            nbytes
+'''
+
+from array import array
+from bisect import bisect_left
+
+
+class Trie():
+    '''
+    Class of trie
+    Static Variables:
+        None
+    Dynamic Variables:
+        alphabet: list of characters, the characters by their codes
+        codes: dictionary, keys = characters, values = their codes
+        start, count, labels, terminal: the flat nodes (see the file docstring)
+        n_words: int, number of words in the trie
+    '''
+
+    def __init__(self, words_=[], alphabet=[]):
+        '''
+        Constructor of the Trie object
+        Parameters:
+            words_: iterable of strings, the vocabulary
+            alphabet: list of characters, if empty it's taken from the words
+        '''
+        words_ = sorted(set(words_))
+        self.alphabet = sorted(set(alphabet) | {ch for word_ in words_ for ch in word_})
+        self.codes = {ch: code for code, ch in enumerate(self.alphabet)}
+        self.n_words = len(words_)
+
+        # A nested dictionaries trie first, then flattened in breadth first order
+        root = {}
+        for word_ in words_:
+            node = root
+            for ch in word_:
+                node = node.setdefault(self.codes[ch], {})
+            node[None] = True
+
+        self.start = array('I')
+        self.count = array('B')
+        self.labels = array('B', [0])
+        self.terminal = bytearray()
+        queue = [root]
+        n_nodes = 1
+        for node in queue:  # the queue grows while iterating
+            children = sorted(code for code in node if code is not None)
+            self.start.append(n_nodes)
+            self.count.append(len(children))
+            self.terminal.append(None in node)
+            for code in children:
+                self.labels.append(code)
+                queue.append(node[code])
+            n_nodes += len(children)
+
+    # Methods of Trie class
+
+    def find(self, prefix=''):
+        '''
+        Finding the node of a prefix
+        Parameters:
+            prefix: string
+        Return:
+            int, the node, or None if no word starts with the prefix
+        '''
+        node = 0
+        for ch in prefix:
+            code = self.codes.get(ch)
+            if code is None:
+                return None
+            lo = self.start[node]
+            hi = lo + self.count[node]
+            node = bisect_left(self.labels, code, lo, hi)
+            if node == hi or self.labels[node] != code:
+                return None
+        return node
+
+    def contains(self, word_=''):
+        '''
+        Checking if a word is in the vocabulary
+        Parameters:
+            word_: string
+        Return:
+            boolean, True if the word is in the vocabulary, False otherwise
+        '''
+        node = self.find(word_)
+        return node is not None and bool(self.terminal[node])
+
+    def complete(self, prefix='', k=10, among=None):
+        '''
+        Finding words which start with a prefix (in alphabetical order)
+        Parameters:
+            prefix: string
+            k: int, the most words to be found
+            among: dictionary, set or None, if given only words in it are found
+                (for example the still available words of a language)
+        Return:
+            list of strings, the found words
+        '''
+        node = self.find(prefix)
+        if node is None:
+            return []
+
+        found = []
+        stack = [(node, prefix)]
+        while stack and len(found) < k:
+            node, word_ = stack.pop()
+            if self.terminal[node] and (among is None or word_ in among):
+                found.append(word_)
+            first = self.start[node]
+            for child in range(first + self.count[node] - 1, first - 1, -1):
+                stack.append((child, word_ + self.alphabet[self.labels[child]]))
+        return found
+
+    def nbytes(self):
+        '''
+        Getting the memory used by the nodes
+        Parameters:
+            None
+        Return:
+            int, bytes
+        '''
+        return (self.start.itemsize * len(self.start) + self.count.itemsize * len(self.count) +
+                self.labels.itemsize * len(self.labels) + len(self.terminal))